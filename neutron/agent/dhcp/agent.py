@@ -14,15 +14,19 @@
 #    under the License.
 
 import collections
+import contextlib
 import os
 
 import eventlet
 
+from oslo_concurrency import processutils
 from oslo_config import cfg
 from oslo_log import log as logging
 import oslo_messaging
 from oslo_service import loopingcall
 from oslo_utils import importutils
+from oslo_utils import timeutils
+import six
 
 from neutron._i18n import _, _LE, _LI, _LW
 from neutron.agent.linux import dhcp
@@ -40,6 +44,37 @@ from neutron import manager
 LOG = logging.getLogger(__name__)
 
 
+class SyncTimings(object):
+    """Durations of the stages of a state synchronization."""
+
+    def __init__(self):
+        self.durations = collections.OrderedDict()
+        self._watch = timeutils.StopWatch().start()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        watch = timeutils.StopWatch().start()
+        try:
+            yield
+        finally:
+            self.durations.setdefault(name, []).append(watch.elapsed())
+
+    def timed(self, name, func):
+        """Wrap func so that its calls are accounted to a stage."""
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def __str__(self):
+        stages = ['%(name)s: %(count)d in %(total).2fs (max %(max).2fs)' %
+                  {'name': name, 'count': len(durations),
+                   'total': sum(durations), 'max': max(durations)}
+                  for name, durations in self.durations.items()]
+        stages.append('elapsed: %.2fs' % self._watch.elapsed())
+        return ', '.join(stages)
+
+
 class DhcpAgent(manager.Manager):
     """DHCP agent service manager.
 
@@ -70,6 +105,7 @@ class DhcpAgent(manager.Manager):
         self._process_monitor = external_process.ProcessMonitor(
             config=self.conf,
             resource_type='dhcp')
+        self._initial_sync_done = False
 
     def init_host(self):
         self.sync_state()
@@ -148,27 +184,57 @@ class DhcpAgent(manager.Manager):
         """
         only_nets = set([] if (not networks or None in networks) else networks)
         LOG.info(_LI('Synchronizing state'))
-        pool = eventlet.GreenPool(self.conf.num_sync_threads)
+        pool_size = self.conf.num_sync_threads
+        if not self._initial_sync_done:
+            pool_size = (self.conf.bootstrap_sync_threads or
+                         max(pool_size, processutils.get_worker_count()))
+        pool = eventlet.GreenPool(pool_size)
+        timings = SyncTimings()
         known_network_ids = set(self.cache.get_network_ids())
 
         try:
-            active_networks = self.plugin_rpc.get_active_networks_info()
-            active_network_ids = set(network.id for network in active_networks)
+            digests = None
+            with timings.stage('retrieve'):
+                if self.conf.sync_changed_networks_only:
+                    # Networks to be specifically synced are always retrieved
+                    known_digests = dict(
+                        (net_id, utils.get_dhcp_network_digest(
+                            self.cache.get_network_by_id(net_id)))
+                        for net_id in known_network_ids
+                        if net_id not in only_nets)
+                    digests, active_networks = (
+                        self.plugin_rpc.get_changed_networks_info(
+                            known_digests))
+                else:
+                    active_networks = (
+                        self.plugin_rpc.get_active_networks_info())
+            if digests is not None:
+                active_network_ids = set(digests)
+            else:
+                active_network_ids = set(
+                    network.id for network in active_networks)
             for deleted_id in known_network_ids - active_network_ids:
                 try:
-                    self.disable_dhcp_helper(deleted_id)
+                    with timings.stage('disable'):
+                        self.disable_dhcp_helper(deleted_id)
                 except Exception as e:
                     self.schedule_resync(e, deleted_id)
                     LOG.exception(_LE('Unable to sync network state on '
                                       'deleted network %s'), deleted_id)
 
             for network in active_networks:
-                if (not only_nets or  # specifically resync all
-                        network.id not in known_network_ids or  # missing net
-                        network.id in only_nets):  # specific network to sync
-                    pool.spawn(self.safe_configure_dhcp_for_network, network)
+                if (only_nets and  # not specifically resyncing all
+                        network.id in known_network_ids and  # not missing
+                        network.id not in only_nets):  # not to be synced
+                    continue
+                # With digests, only the networks which changed or are
+                # unknown have been returned
+                pool.spawn(timings.timed(
+                    'configure', self.safe_configure_dhcp_for_network),
+                    network)
             pool.waitall()
-            LOG.info(_LI('Synchronizing state complete'))
+            self._initial_sync_done = True
+            LOG.info(_LI('Synchronizing state complete (%s)'), timings)
 
         except Exception as e:
             if only_nets:
@@ -410,6 +476,7 @@ class DhcpPluginApi(object):
         1.0 - Initial version.
         1.1 - Added get_active_networks_info, create_dhcp_port,
               and update_dhcp_port methods.
+        1.4 - Added get_changed_networks_info method.
 
     """
 
@@ -429,6 +496,26 @@ class DhcpPluginApi(object):
                               host=self.host)
         return [dhcp.NetModel(n) for n in networks]
 
+    def get_changed_networks_info(self, network_digests):
+        """Make a remote process call to retrieve changed network info.
+
+        :returns: a tuple of the digests of all the active networks, and
+                  of the networks whose digest differ from network_digests.
+                  Digests are None, and all the networks are returned, if
+                  the server does not support digests.
+        """
+        try:
+            cctxt = self.client.prepare(version='1.4')
+            result = cctxt.call(self.context, 'get_changed_networks_info',
+                                network_digests=network_digests,
+                                host=self.host)
+        except oslo_messaging.UnsupportedVersion:
+            LOG.warn(_LW('Synchronizing changed networks only requires a '
+                         'server upgrade.'))
+            return None, self.get_active_networks_info()
+        return (result['digests'],
+                [dhcp.NetModel(n) for n in result['networks']])
+
     def get_network_info(self, network_id):
         """Make a remote process call to retrieve network info."""
         cctxt = self.client.prepare()
@@ -503,41 +590,31 @@ class NetworkCache(object):
 
     def put_port(self, port):
         network = self.get_network_by_id(port.network_id)
-        for index in range(len(network.ports)):
-            if network.ports[index].id == port.id:
-                network.ports[index] = port
-                break
-        else:
-            network.ports.append(port)
+        network.ports.put(port)
 
         self.port_lookup[port.id] = network.id
 
     def remove_port(self, port):
         network = self.get_network_by_port_id(port.id)
 
-        for index in range(len(network.ports)):
-            if network.ports[index] == port:
-                del network.ports[index]
-                del self.port_lookup[port.id]
-                break
+        if port in network.ports:
+            network.ports.pop(port.id)
+            del self.port_lookup[port.id]
 
     def get_port_by_id(self, port_id):
         network = self.get_network_by_port_id(port_id)
         if network:
-            for port in network.ports:
-                if port.id == port_id:
-                    return port
+            return network.ports.get(port_id)
 
     def get_state(self):
-        net_ids = self.get_network_ids()
-        num_nets = len(net_ids)
+        # Ports can be added to a network by the DHCP driver itself, hence
+        # they are counted from the networks rather than tracked here
         num_subnets = 0
         num_ports = 0
-        for net_id in net_ids:
-            network = self.get_network_by_id(net_id)
+        for network in six.itervalues(self.cache):
             num_subnets += len(network.subnets)
             num_ports += len(network.ports)
-        return {'networks': num_nets,
+        return {'networks': len(self.cache),
                 'subnets': num_subnets,
                 'ports': num_ports}
 
@@ -56,7 +56,22 @@ DHCP_AGENT_OPTS = [
     cfg.IntOpt('num_sync_threads', default=4,
                help=_('Number of threads to use during sync process. '
                       'Should not exceed connection pool size configured on '
-                      'server.'))
+                      'server.')),
+    cfg.IntOpt('bootstrap_sync_threads', min=1,
+               help=_('Number of threads to use during the first sync '
+                      'process after the agent starts, when every network '
+                      'is configured. Setting up a network mostly waits '
+                      'for ip and dnsmasq child processes, so this scales '
+                      'with the number of CPUs of the host. Defaults to the '
+                      'number of CPUs of the host, or num_sync_threads if '
+                      'greater.')),
+    cfg.BoolOpt('sync_changed_networks_only', default=False,
+                help=_("When synchronizing its state, only retrieve and "
+                       "reconfigure the networks whose DHCP configuration "
+                       "changed since the agent last configured them, based "
+                       "on digests of the attributes used to configure the "
+                       "DHCP servers. Networks are fully synchronized if "
+                       "the server does not support it.")),
 ]
 
 DHCP_OPTS = [
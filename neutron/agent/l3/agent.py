@@ -89,6 +89,7 @@ class L3PluginApi(object):
               - delete_agent_gateway_port
         1.8 - Added address scope information
         1.9 - Added get_router_ids
+        1.10 - Added get_arp_entries_by_subnet
     """
 
     def __init__(self, topic, host):
@@ -129,6 +130,12 @@ class L3PluginApi(object):
         return cctxt.call(context, 'get_ports_by_subnet', host=self.host,
                           subnet_id=subnet_id)
 
+    def get_arp_entries_by_subnet(self, context, subnet_id):
+        """Retrieve the ip and mac addresses of the ports on a subnet."""
+        cctxt = self.client.prepare(version='1.10')
+        return cctxt.call(context, 'get_arp_entries_by_subnet',
+                          host=self.host, subnet_id=subnet_id)
+
     def get_agent_gateway_port(self, context, fip_net):
         """Get or create an agent_gateway_port."""
         cctxt = self.client.prepare(version='1.2')
@@ -322,6 +329,8 @@ class L3NATAgent(firewall_l3_agent.FWaaSL3AgentRpcCallback,
         if router.get('distributed') and router.get('ha'):
             if self.conf.agent_mode == l3_constants.L3_AGENT_MODE_DVR_SNAT:
                 kwargs['state_change_callback'] = self.enqueue_state_change
+                kwargs['keepalived_reload_batcher'] = (
+                    self.keepalived_reload_batcher)
                 return dvr_edge_ha_router.DvrEdgeHaRouter(*args, **kwargs)
 
         if router.get('distributed'):
@@ -332,6 +341,8 @@ class L3NATAgent(firewall_l3_agent.FWaaSL3AgentRpcCallback,
 
         if router.get('ha'):
             kwargs['state_change_callback'] = self.enqueue_state_change
+            kwargs['keepalived_reload_batcher'] = (
+                self.keepalived_reload_batcher)
             return ha_router.HaRouter(*args, **kwargs)
 
         return legacy_router.LegacyRouter(*args, **kwargs)
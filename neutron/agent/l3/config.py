@@ -100,6 +100,12 @@ OPTS = [
                help=_('Iptables mangle mark used to mark ingress from '
                       'external network. This mark will be masked with '
                       '0xffff so that only the lower 16 bits will be used.')),
+    cfg.BoolOpt('dvr_ip_batch', default=False,
+                help=_("Program the addresses, rules and routes of DVR "
+                       "floating IPs, and the ARP entries of the subnets "
+                       "attached to DVR routers, with a single 'ip -batch' "
+                       "call per namespace instead of running one ip "
+                       "command per floating IP or ARP entry.")),
 ]
 
 OPTS += config.EXT_NET_BRIDGE_OPTS
@@ -14,8 +14,15 @@
 
 import weakref
 
+from oslo_log import log as logging
+import oslo_messaging
+
+from neutron._i18n import _LW
 from neutron.agent.l3 import dvr_fip_ns
 from neutron.agent.l3 import dvr_snat_ns
+from neutron.common import constants as l3_constants
+
+LOG = logging.getLogger(__name__)
 
 
 # TODO(Carl) Following constants retained to increase SNR during refactoring
@@ -49,6 +56,25 @@ class AgentMixin(object):
     def get_ports_by_subnet(self, subnet_id):
         return self.plugin_rpc.get_ports_by_subnet(self.context, subnet_id)
 
+    def get_arp_entries_by_subnet(self, subnet_id):
+        """Return the ip/mac pairs to program for the ports of a subnet."""
+        try:
+            return self.plugin_rpc.get_arp_entries_by_subnet(self.context,
+                                                             subnet_id)
+        except oslo_messaging.RemoteError as e:
+            if e.exc_type != 'UnsupportedVersion':
+                raise
+            LOG.warning(_LW('Server does not support '
+                            'get_arp_entries_by_subnet, falling back to '
+                            'get_ports_by_subnet'))
+        return [{'ip_address': fixed_ip['ip_address'],
+                 'mac_address': port['mac_address']}
+                for port in self.get_ports_by_subnet(subnet_id)
+                if port['device_owner'] not in
+                l3_constants.ROUTER_INTERFACE_OWNERS
+                for fixed_ip in port['fixed_ips']
+                if fixed_ip['subnet_id'] == subnet_id]
+
     def add_arp_entry(self, context, payload):
         """Add arp entry into router namespace.  Called from RPC."""
         router_id = payload['router_id']
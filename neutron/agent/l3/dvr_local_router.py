@@ -47,6 +47,10 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
         self.dist_fip_count = None
         self.fip_ns = None
         self._pending_arp_set = set()
+        # ip batches, by namespace, and the floating IPs queued in them, used
+        # while processing floating IPs when dvr_ip_batch is enabled
+        self._fip_batches = None
+        self._batched_fips = None
 
     def get_floating_ips(self):
         """Filter Floating IPs to be hosted on this agent."""
@@ -70,34 +74,124 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
 
         self.iptables_manager.apply()
 
+    def _get_fip_batch(self, namespace):
+        batch = self._fip_batches.get(namespace)
+        if batch is None:
+            batch = self._fip_batches[namespace] = ip_lib.IPBatch(namespace)
+        return batch
+
+    def process_floating_ip_addresses(self, interface_name):
+        if not self.agent_conf.dvr_ip_batch:
+            return super(DvrLocalRouter, self).process_floating_ip_addresses(
+                interface_name)
+
+        # Queue the commands of the added floating IPs and run them with a
+        # single ip process per namespace.
+        self._fip_batches = {}
+        self._batched_fips = []
+        try:
+            fip_statuses = super(
+                DvrLocalRouter, self).process_floating_ip_addresses(
+                    interface_name)
+            batches, batched_fips = self._fip_batches, self._batched_fips
+        finally:
+            self._fip_batches = None
+            self._batched_fips = None
+
+        try:
+            for batch in batches.values():
+                batch.execute()
+        except RuntimeError:
+            # Only the floating IPs which cannot be configured on their own
+            # are put in error state.
+            LOG.warning(_LW("Failed to configure the floating IPs of router "
+                            "%s in a batch, configuring them one by one"),
+                        self.router_id)
+            device = ip_lib.IPDevice(interface_name, namespace=self.ns_name)
+            existing_cidrs = self.get_router_cidrs(device)
+            for fip, fip_cidr, rule_pr in batched_fips:
+                fip_statuses[fip['id']] = self._add_batched_floating_ip(
+                    fip, fip_cidr, rule_pr, device, existing_cidrs)
+        else:
+            for fip, fip_cidr, rule_pr in batched_fips:
+                self.floating_ips_dict[fip['floating_ip_address']] = rule_pr
+                self._send_floating_ip_adv_notif(fip)
+        return fip_statuses
+
+    def _add_batched_floating_ip(self, fip, fip_cidr, rule_pr, device,
+                                 existing_cidrs):
+        """Configure a floating IP of a failed batch on its own.
+
+        The commands of the batch which succeeded may have configured part of
+        the floating IP already.
+        """
+        if (fip_cidr not in existing_cidrs and
+                not self._add_fip_addr_to_device(fip, device)):
+            self.fip_ns.deallocate_rule_priority(fip['floating_ip_address'])
+            self.dist_fip_count = self.dist_fip_count - 1
+            return l3_constants.FLOATINGIP_STATUS_ERROR
+        try:
+            self._configure_floating_ip_dist(fip, fip_cidr, rule_pr)
+        except RuntimeError:
+            LOG.warning(_LW("Unable to configure floating IP %s in the FIP "
+                            "namespace"), fip['id'])
+            self.dist_fip_count = self.dist_fip_count - 1
+            return l3_constants.FLOATINGIP_STATUS_ERROR
+        self._send_floating_ip_adv_notif(fip)
+        return l3_constants.FLOATINGIP_STATUS_ACTIVE
+
+    def _get_fip_route(self):
+        """Return the FIP namespace, device and next hop of FIP routes."""
+        if self.rtr_fip_subnet is None:
+            self.rtr_fip_subnet = self.fip_ns.local_subnets.allocate(
+                self.router_id)
+        rtr_2_fip, _ = self.rtr_fip_subnet.get_pair()
+        return (self.fip_ns.get_name(),
+                self.fip_ns.get_int_device_name(self.router_id),
+                str(rtr_2_fip.ip))
+
     def floating_ip_added_dist(self, fip, fip_cidr):
         """Add floating IP to FIP namespace."""
         floating_ip = fip['floating_ip_address']
-        fixed_ip = fip['fixed_ip_address']
         rule_pr = self.fip_ns.allocate_rule_priority(floating_ip)
-        self.floating_ips_dict[floating_ip] = rule_pr
-        fip_2_rtr_name = self.fip_ns.get_int_device_name(self.router_id)
+        if self._fip_batches is None:
+            self._configure_floating_ip_dist(fip, fip_cidr, rule_pr)
+            self._send_floating_ip_adv_notif(fip)
+            # update internal structures
+            self.dist_fip_count = self.dist_fip_count + 1
+            return
+
+        self._get_fip_batch(self.ns_name).add_rule(
+            fip['fixed_ip_address'], table=dvr_fip_ns.FIP_RT_TBL,
+            priority=rule_pr)
+        fip_ns_name, fip_2_rtr_name, via = self._get_fip_route()
+        self._get_fip_batch(fip_ns_name).add_route(
+            fip_cidr, via=via, device_name=fip_2_rtr_name)
+        # The floating IP is only recorded once the batches succeeded, but
+        # it is counted right away so that the floating IPs removed before
+        # the batches run do not tear down the link to the FIP namespace.
+        self._batched_fips.append((fip, fip_cidr, rule_pr))
+        self.dist_fip_count = self.dist_fip_count + 1
+
+    def _configure_floating_ip_dist(self, fip, fip_cidr, rule_pr):
+        self.floating_ips_dict[fip['floating_ip_address']] = rule_pr
         ip_rule = ip_lib.IPRule(namespace=self.ns_name)
-        ip_rule.rule.add(ip=fixed_ip,
+        ip_rule.rule.add(ip=fip['fixed_ip_address'],
                          table=dvr_fip_ns.FIP_RT_TBL,
                          priority=rule_pr)
         #Add routing rule in fip namespace
-        fip_ns_name = self.fip_ns.get_name()
-        if self.rtr_fip_subnet is None:
-            self.rtr_fip_subnet = self.fip_ns.local_subnets.allocate(
-                self.router_id)
-        rtr_2_fip, _ = self.rtr_fip_subnet.get_pair()
+        fip_ns_name, fip_2_rtr_name, via = self._get_fip_route()
         device = ip_lib.IPDevice(fip_2_rtr_name, namespace=fip_ns_name)
-        device.route.add_route(fip_cidr, str(rtr_2_fip.ip))
+        device.route.add_route(fip_cidr, via)
+
+    def _send_floating_ip_adv_notif(self, fip):
         interface_name = (
             self.fip_ns.get_ext_device_name(
                 self.fip_ns.agent_gateway_port['id']))
-        ip_lib.send_ip_addr_adv_notif(fip_ns_name,
+        ip_lib.send_ip_addr_adv_notif(self.fip_ns.get_name(),
                                       interface_name,
-                                      floating_ip,
+                                      fip['floating_ip_address'],
                                       self.agent_conf)
-        # update internal structures
-        self.dist_fip_count = self.dist_fip_count + 1
 
     def floating_ip_removed_dist(self, fip_cidr):
         """Remove floating IP from FIP namespace."""
@@ -139,11 +233,14 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
             # initiated from the server through an RPC call.
 
     def add_floating_ip(self, fip, interface_name, device):
-        if not self._add_fip_addr_to_device(fip, device):
+        ip_cidr = common_utils.ip_to_cidr(fip['floating_ip_address'])
+        if self._fip_batches is not None:
+            self._get_fip_batch(self.ns_name).add_address(device.name,
+                                                          ip_cidr)
+        elif not self._add_fip_addr_to_device(fip, device):
             return l3_constants.FLOATINGIP_STATUS_ERROR
 
         # Special Handling for DVR - update FIP namespace
-        ip_cidr = common_utils.ip_to_cidr(fip['floating_ip_address'])
         self.floating_ip_added_dist(fip, ip_cidr)
         return l3_constants.FLOATINGIP_STATUS_ACTIVE
 
@@ -225,6 +322,8 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
 
     def _set_subnet_arp_info(self, subnet_id):
         """Set ARP info retrieved from Plugin for existing ports."""
+        if self.agent_conf.dvr_ip_batch:
+            return self._set_subnet_arp_info_batch(subnet_id)
         # TODO(Carl) Can we eliminate the need to make this RPC while
         # processing a router.
         subnet_ports = self.agent.get_ports_by_subnet(subnet_id)
@@ -238,6 +337,47 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
                                            'add')
         self._process_arp_cache_for_internal_port(subnet_id)
 
+    def _set_subnet_arp_info_batch(self, subnet_id):
+        """Set the ARP table of a subnet with a single ip -batch call.
+
+        Only the entries missing from the router interface, pointing to a
+        different MAC address or not permanent (learnt by the kernel, which
+        would age out), are programmed.
+        """
+        arp_entries = self.agent.get_arp_entries_by_subnet(subnet_id)
+        port = self._get_internal_port(subnet_id)
+        if arp_entries and port:
+            interface_name = self.get_internal_device_name(port['id'])
+            device = ip_lib.IPDevice(interface_name, namespace=self.ns_name)
+            if not device.exists():
+                LOG.warning(_LW("Device %s does not exist so ARP entries "
+                                "cannot be updated, will cache information "
+                                "to be applied later when the device "
+                                "exists"), device)
+                for entry in arp_entries:
+                    self._cache_arp_entry(entry['ip_address'],
+                                          entry['mac_address'],
+                                          subnet_id, 'add')
+                return
+            ip_version = netaddr.IPAddress(
+                arp_entries[0]['ip_address']).version
+            current = dict((entry['ip_address'],
+                            (entry['mac_address'], entry['state']))
+                           for entry in device.neigh.dump(ip_version))
+            batch = ip_lib.IPBatch(self.ns_name)
+            for entry in arp_entries:
+                mac = entry['mac_address'].lower()
+                if current.get(entry['ip_address']) != (mac, 'PERMANENT'):
+                    batch.add_neigh(interface_name, entry['ip_address'], mac)
+            if batch:
+                try:
+                    batch.execute()
+                except Exception:
+                    with excutils.save_and_reraise_exception():
+                        LOG.exception(_LE("DVR: Failed updating arp entries "
+                                          "for subnet %s"), subnet_id)
+        self._process_arp_cache_for_internal_port(subnet_id)
+
     @staticmethod
     def _get_snat_idx(ip_cidr):
         """Generate index for DVR snat rules and route tables.
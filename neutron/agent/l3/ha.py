@@ -16,11 +16,12 @@
 import os
 
 import eventlet
+from eventlet import greenio
 from oslo_config import cfg
 from oslo_log import log as logging
 import webob
 
-from neutron._i18n import _, _LI
+from neutron._i18n import _, _LI, _LW
 from neutron.agent.linux import keepalived
 from neutron.agent.linux import utils as agent_utils
 from neutron.common import utils as common_utils
@@ -30,6 +31,17 @@ LOG = logging.getLogger(__name__)
 
 KEEPALIVED_STATE_CHANGE_SERVER_BACKLOG = 4096
 
+# NOTE: keepalived runs the notify script as root inside the router
+# namespace. Writes of a single short line to a pipe are atomic, and opening
+# the pipe read-write never blocks, even when the agent is not running.
+KEEPALIVED_NOTIFY_SCRIPT = """#!/bin/sh
+# Generated by the neutron L3 agent.
+# Usage: %(script)s <router_id> <state_file> <state>
+printf '%%s' "$3" > "$2"
+exec 3<>"%(pipe)s"
+echo "$1 $3" >&3
+"""
+
 OPTS = [
     cfg.StrOpt('ha_confs_path',
                default='$state_path/ha_confs',
@@ -45,6 +57,13 @@ OPTS = [
     cfg.IntOpt('ha_vrrp_advert_int',
                default=2,
                help=_('The advertisement interval in seconds')),
+    cfg.BoolOpt('ha_keepalived_notify_scripts',
+                default=False,
+                help=_('Report HA router state changes using keepalived '
+                       'notify scripts which write to a single pipe read '
+                       'by the L3 agent, instead of running one '
+                       'neutron-keepalived-state-change monitor process per '
+                       'HA router.')),
 ]
 
 
@@ -87,19 +106,88 @@ class L3AgentKeepalivedStateChangeServer(object):
         server.wait()
 
 
+class L3AgentKeepalivedStateChangePipe(object):
+    """Receive HA router state changes from keepalived notify scripts.
+
+    Every keepalived process managed by the agent is configured to run the
+    same notify script, which writes "<router_id> <state>" lines to a pipe
+    shared by all the HA routers hosted by the agent.
+    """
+
+    def __init__(self, agent, conf):
+        self.agent = agent
+        self.conf = conf
+
+    @classmethod
+    def get_pipe_path(cls, conf):
+        return os.path.join(conf.state_path, 'keepalived-state-change-pipe')
+
+    @classmethod
+    def get_notify_script_path(cls, conf):
+        return os.path.join(conf.state_path,
+                            'keepalived-state-change-notify.sh')
+
+    @classmethod
+    def get_notify_script_cmd(cls, conf, router_id, state_file):
+        return '%s %s %s' % (cls.get_notify_script_path(conf), router_id,
+                             state_file)
+
+    def _setup(self):
+        pipe_path = self.get_pipe_path(self.conf)
+        agent_utils.ensure_directory_exists_without_file(pipe_path)
+        os.mkfifo(pipe_path, 0o600)
+
+        script_path = self.get_notify_script_path(self.conf)
+        common_utils.replace_file(
+            script_path,
+            KEEPALIVED_NOTIFY_SCRIPT % {'script': script_path,
+                                        'pipe': pipe_path},
+            file_mode=0o755)
+        return pipe_path
+
+    def handle_line(self, line):
+        try:
+            router_id, state = line.split()
+        except ValueError:
+            LOG.warning(_LW('Ignoring malformed keepalived state change '
+                            'notification "%s"'), line.strip())
+            return
+        if state not in keepalived.NOTIFY_STATES:
+            LOG.warning(_LW('Ignoring unknown state %(state)s notified for '
+                            'router %(router_id)s'),
+                        {'state': state, 'router_id': router_id})
+            return
+        self.agent.enqueue_state_change(router_id, state)
+
+    def run(self):
+        pipe_path = self._setup()
+        # Opening the pipe read-write keeps a writer attached to it, so
+        # reading does not hit EOF when no notify script is running.
+        pipe = greenio.GreenPipe(os.open(pipe_path, os.O_RDWR), 'r')
+        for line in pipe:
+            self.handle_line(line)
+
+
 class AgentMixin(object):
     def __init__(self, host):
         self._init_ha_conf_path()
         super(AgentMixin, self).__init__(host)
         self.state_change_notifier = batch_notifier.BatchNotifier(
             self._calculate_batch_duration(), self.notify_server)
+        self.keepalived_reload_batcher = keepalived.KeepalivedReloadBatcher()
         eventlet.spawn(self._start_keepalived_notifications_server)
+        if self.conf.ha_keepalived_notify_scripts:
+            eventlet.spawn(self._start_keepalived_notifications_pipe)
 
     def _start_keepalived_notifications_server(self):
         state_change_server = (
             L3AgentKeepalivedStateChangeServer(self, self.conf))
         state_change_server.run()
 
+    def _start_keepalived_notifications_pipe(self):
+        state_change_pipe = L3AgentKeepalivedStateChangePipe(self, self.conf)
+        state_change_pipe.run()
+
     def _calculate_batch_duration(self):
         # Slave becomes the master after not hearing from it 3 times
         detection_time = self.conf.ha_vrrp_advert_int * 3
@@ -19,6 +19,7 @@ import netaddr
 from oslo_log import log as logging
 
 from neutron._i18n import _LE
+from neutron.agent.l3 import ha
 from neutron.agent.l3 import router_info as router
 from neutron.agent.linux import external_process
 from neutron.agent.linux import ip_lib
@@ -34,10 +35,13 @@ IP_MONITOR_PROCESS_SERVICE = 'ip_monitor'
 
 class HaRouter(router.RouterInfo):
     def __init__(self, state_change_callback, *args, **kwargs):
+        keepalived_reload_batcher = kwargs.pop('keepalived_reload_batcher',
+                                               None)
         super(HaRouter, self).__init__(*args, **kwargs)
 
         self.ha_port = None
         self.keepalived_manager = None
+        self.keepalived_reload_batcher = keepalived_reload_batcher
         self.state_change_callback = state_change_callback
 
     @property
@@ -94,7 +98,8 @@ class HaRouter(router.RouterInfo):
             keepalived.KeepalivedConf(),
             process_monitor,
             conf_path=self.agent_conf.ha_confs_path,
-            namespace=self.ha_namespace)
+            namespace=self.ha_namespace,
+            reload_batcher=self.keepalived_reload_batcher)
 
         config = self.keepalived_manager.config
 
@@ -117,6 +122,13 @@ class HaRouter(router.RouterInfo):
             instance.set_authentication(self.agent_conf.ha_vrrp_auth_type,
                                         self.agent_conf.ha_vrrp_auth_password)
 
+        if self.agent_conf.ha_keepalived_notify_scripts:
+            instance.notify_script = (
+                ha.L3AgentKeepalivedStateChangePipe.get_notify_script_cmd(
+                    self.agent_conf, self.router_id,
+                    self.keepalived_manager.get_full_config_file_path(
+                        'state')))
+
         config.add_instance(instance)
 
     def enable_keepalived(self):
@@ -316,6 +328,11 @@ class HaRouter(router.RouterInfo):
         return callback
 
     def spawn_state_change_monitor(self, process_monitor):
+        if self.agent_conf.ha_keepalived_notify_scripts:
+            # State changes are reported by keepalived notify scripts, stop
+            # any monitor left over from before the option was enabled.
+            self.destroy_state_change_monitor(process_monitor)
+            return
         pm = self._get_state_change_monitor_process_manager()
         pm.enable()
         process_monitor.register(
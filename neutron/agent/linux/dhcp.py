@@ -58,6 +58,9 @@ DNSMASQ_SERVICE_NAME = 'dnsmasq'
 class DictModel(dict):
     """Convert dict into an object that provides attribute access to values."""
 
+    # Attributes are stored as dict items, instances need no __dict__
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         """Convert dict values to DictModel values."""
         super(DictModel, self).__init__(*args, **kwargs)
@@ -101,12 +104,84 @@ class DictModel(dict):
         return ', '.join(sorted(pairs))
 
 
+class PortList(object):
+    """Ports of a network, indexed by port id.
+
+    Iterating yields the ports in insertion order, as with the list this
+    replaces, while ports are looked up, replaced and removed by id without
+    scanning the whole network.
+    """
+
+    __slots__ = ('_ports',)
+
+    def __init__(self, ports=()):
+        self._ports = collections.OrderedDict(
+            (port.id, port) for port in ports)
+
+    def __iter__(self):
+        return iter(self._ports.values())
+
+    def __len__(self):
+        return len(self._ports)
+
+    def __contains__(self, port):
+        return self._ports.get(port.id) == port
+
+    def __getitem__(self, index):
+        return list(self._ports.values())[index]
+
+    def __setitem__(self, index, port):
+        ports = list(self._ports.values())
+        ports[index] = port
+        self._ports = collections.OrderedDict((p.id, p) for p in ports)
+
+    def __eq__(self, other):
+        if isinstance(other, (PortList, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def get(self, port_id):
+        return self._ports.get(port_id)
+
+    def put(self, port):
+        """Add a port, or replace the port with the same id."""
+        self._ports[port.id] = port
+
+    append = put
+
+    def pop(self, port_id, default=None):
+        return self._ports.pop(port_id, default)
+
+    def remove(self, port):
+        if port not in self:
+            raise ValueError(port)
+        del self._ports[port.id]
+
+
 class NetModel(DictModel):
 
+    __slots__ = ()
+
     def __init__(self, d):
         super(NetModel, self).__init__(d)
 
         self._ns_name = "%s%s" % (NS_PREFIX, self.id)
+        if 'ports' in self:
+            self.ports = self.ports
+
+    def __setattr__(self, name, value):
+        if name == 'ports' and not isinstance(value, PortList):
+            value = PortList(value)
+        super(NetModel, self).__setattr__(name, value)
 
     @property
     def namespace(self):
@@ -1172,6 +1247,9 @@ class DeviceManager(object):
         return dhcp_port
 
     def _update_dhcp_port(self, network, port):
+        if isinstance(network.ports, PortList):
+            network.ports.put(port)
+            return
         for index in range(len(network.ports)):
             if network.ports[index].id == port.id:
                 network.ports[index] = port
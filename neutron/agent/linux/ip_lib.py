@@ -421,14 +421,24 @@ class IpRuleCommand(IpCommandBase):
             args += kwargs_item
         return tuple(args)
 
-    def add(self, ip, **kwargs):
-        ip_version = get_ip_version(ip)
+    def get_canonical_rule(self, ip, **kwargs):
+        """Return the canonical settings of a rule matching traffic from ip.
 
+        The result can be compared with the rules returned by list_rules.
+        """
         kwargs.update({'from': ip})
-        canonical_kwargs = self._make_canonical(ip_version, kwargs)
+        return self._make_canonical(get_ip_version(ip), kwargs)
+
+    def get_rule_args(self, command, canonical_rule):
+        """Return the arguments of an ip rule command on a canonical rule."""
+        return self._make__flat_args_tuple(command, **canonical_rule)
+
+    def add(self, ip, **kwargs):
+        ip_version = get_ip_version(ip)
+        canonical_kwargs = self.get_canonical_rule(ip, **kwargs)
 
         if not self._exists(ip_version, **canonical_kwargs):
-            args_tuple = self._make__flat_args_tuple('add', **canonical_kwargs)
+            args_tuple = self.get_rule_args('add', canonical_kwargs)
             self._as_root([ip_version], args_tuple)
 
     def delete(self, ip, **kwargs):
@@ -816,6 +826,90 @@ class IPRoute(SubProcessBase):
         self.route = IpRouteCommand(self, table=table)
 
 
+class IPBatch(SubProcessBase):
+    """Accumulate ip commands and run them with a single 'ip -batch'.
+
+    Setting up many addresses, rules, routes or neighbour entries in a
+    namespace otherwise costs one ip process (and one root helper call) per
+    entry. Commands are queued by the add_* and delete_* methods and executed
+    at once by execute(). ip keeps going on errors (-force) and fails at the
+    end if any of the commands failed.
+    """
+
+    def __init__(self, namespace=None):
+        super(IPBatch, self).__init__(namespace=namespace)
+        self._commands = []
+        self._ip_rule = IPRule(namespace=namespace)
+        self._rules = {}
+
+    def __len__(self):
+        return len(self._commands)
+
+    def _queue(self, options, command, args):
+        opt_list = ['-%s' % o for o in options]
+        self._commands.append(
+            ' '.join(str(a) for a in opt_list + [command] + list(args)))
+
+    def add_address(self, device_name, cidr, scope='global'):
+        net = netaddr.IPNetwork(cidr)
+        args = ['add', cidr, 'scope', scope, 'dev', device_name]
+        if net.version == 4:
+            args += ['brd', str(net[-1])]
+        self._queue([net.version], 'addr', args)
+
+    def _get_rules(self, ip_version):
+        if ip_version not in self._rules:
+            self._rules[ip_version] = self._ip_rule.rule.list_rules(
+                ip_version)
+        return self._rules[ip_version]
+
+    def add_rule(self, ip, **kwargs):
+        """Queue the addition of a rule, unless it already exists.
+
+        Existing rules of the namespace are listed only once per batch.
+        """
+        ip_version = get_ip_version(ip)
+        canonical_rule = self._ip_rule.rule.get_canonical_rule(ip, **kwargs)
+        rules = self._get_rules(ip_version)
+        if canonical_rule not in rules:
+            rules.append(canonical_rule)
+            self._queue([ip_version], 'rule',
+                        self._ip_rule.rule.get_rule_args('add',
+                                                         canonical_rule))
+
+    def add_route(self, cidr, via=None, device_name=None, table=None):
+        args = ['replace', cidr]
+        if via:
+            args += ['via', via]
+        if device_name:
+            args += ['dev', device_name]
+        if table:
+            args += ['table', table]
+        self._queue([get_ip_version(cidr)], 'route', args)
+
+    def add_neigh(self, device_name, ip_address, mac_address):
+        self._queue([get_ip_version(ip_address)], 'neigh',
+                    ['replace', ip_address, 'lladdr', mac_address,
+                     'nud', 'permanent', 'dev', device_name])
+
+    def delete_neigh(self, device_name, ip_address, mac_address):
+        self._queue([get_ip_version(ip_address)], 'neigh',
+                    ['del', ip_address, 'lladdr', mac_address,
+                     'dev', device_name])
+
+    def execute(self):
+        """Run the queued commands, returns the ip output if any."""
+        if not self._commands:
+            return
+        commands, self._commands = self._commands, []
+        self._rules = {}
+        cmd = add_namespace_to_cmd(['ip'], self.namespace)
+        cmd += ['-force', '-batch', '-']
+        return utils.execute(cmd, process_input='\n'.join(commands) + '\n',
+                             run_as_root=True,
+                             log_fail_as_error=self.log_fail_as_error)
+
+
 class IpNeighCommand(IpDeviceCommandBase):
     COMMAND = 'neigh'
 
@@ -840,6 +934,25 @@ class IpNeighCommand(IpDeviceCommandBase):
                              ('show',
                               'dev', self.name))
 
+    def dump(self, ip_version):
+        """Return the neighbour entries of the device.
+
+        :param ip_version: Either 4 or 6 for IPv4 or IPv6 respectively
+        :returns: a list of dicts with the ip_address, mac_address and state
+                  of every entry which has a link layer address.
+        """
+        entries = []
+        for line in self.show(ip_version).splitlines():
+            # 10.0.0.5 lladdr fa:16:3e:8a:4b:01 PERMANENT
+            parts = line.split()
+            if 'lladdr' not in parts[:-1]:
+                continue
+            entries.append(
+                {'ip_address': parts[0],
+                 'mac_address': parts[parts.index('lladdr') + 1].lower(),
+                 'state': parts[-1]})
+        return entries
+
     def flush(self, ip_version, ip_address):
         """Flush neighbour entries
 
@@ -20,12 +20,15 @@ import netaddr
 from oslo_config import cfg
 from oslo_log import log as logging
 
-from neutron._i18n import _
+from neutron._i18n import _, _LE
 from neutron.agent.linux import external_process
+from neutron.agent.linux import utils
 from neutron.common import exceptions
 from neutron.common import utils as common_utils
+from neutron.notifiers import batch_notifier
 
 VALID_STATES = ['MASTER', 'BACKUP']
+NOTIFY_STATES = ('master', 'backup', 'fault')
 VALID_AUTH_TYPES = ['AH', 'PASS']
 HA_DEFAULT_PRIORITY = 50
 PRIMARY_VIP_RANGE_SIZE = 24
@@ -34,6 +37,9 @@ FIP_LL_SUBNET = '169.254.30.0/23'
 KEEPALIVED_SERVICE_NAME = 'keepalived'
 GARP_MASTER_REPEAT = 5
 GARP_MASTER_REFRESH = 10
+# Seconds during which keepalived reloads requested by different routers are
+# accumulated before the keepalived processes are signaled.
+RELOAD_BATCH_INTERVAL = 0.5
 
 LOG = logging.getLogger(__name__)
 
@@ -160,7 +166,8 @@ class KeepalivedInstance(object):
                  priority=HA_DEFAULT_PRIORITY, advert_int=None,
                  mcast_src_ip=None, nopreempt=False,
                  garp_master_repeat=GARP_MASTER_REPEAT,
-                 garp_master_refresh=GARP_MASTER_REFRESH):
+                 garp_master_refresh=GARP_MASTER_REFRESH,
+                 notify_script=None):
         self.name = 'VR_%s' % vrouter_id
 
         if state not in VALID_STATES:
@@ -175,6 +182,7 @@ class KeepalivedInstance(object):
         self.mcast_src_ip = mcast_src_ip
         self.garp_master_repeat = garp_master_repeat
         self.garp_master_refresh = garp_master_refresh
+        self.notify_script = notify_script
         self.track_interfaces = []
         self.vips = []
         self.virtual_routes = KeepalivedInstanceRoutes()
@@ -267,6 +275,11 @@ class KeepalivedInstance(object):
                                 for route in self.virtual_routes),
                                ['    }'])
 
+    def _build_notify_scripts_config(self):
+        # The new state is given to the notify script as its last argument
+        return ['    notify_%s "%s %s"' % (state, self.notify_script, state)
+                for state in NOTIFY_STATES]
+
     def build_config(self):
         config = ['vrrp_instance %s {' % self.name,
                   '    state %s' % self.state,
@@ -301,6 +314,9 @@ class KeepalivedInstance(object):
         if len(self.virtual_routes):
             config.extend(self.virtual_routes.build_config())
 
+        if self.notify_script:
+            config.extend(self._build_notify_scripts_config())
+
         config.append('}')
 
         return config
@@ -337,6 +353,41 @@ class KeepalivedConf(object):
         return '\n'.join(self.build_config())
 
 
+class KeepalivedReloadBatcher(object):
+    """Coalesce keepalived configuration reloads.
+
+    When many HA routers change at once (e.g. on HA network failover) every
+    router asks its keepalived process to reload its configuration. Instead
+    of signaling each process as soon as its configuration is written, the
+    reloads requested during a short interval are queued and delivered
+    together, each keepalived process being signaled only once per batch.
+    """
+
+    def __init__(self, batch_interval=RELOAD_BATCH_INTERVAL):
+        self._notifier = batch_notifier.BatchNotifier(batch_interval,
+                                                      self._reload)
+
+    def queue_reload(self, process_manager):
+        self._notifier.queue_event(process_manager)
+
+    def _reload(self, process_managers):
+        pids = set()
+        for pm in process_managers:
+            # The process may have been respawned or stopped since the
+            # reload was queued, so look the pid up only now.
+            pid = pm.pid
+            if pid and pm.active and pid not in pids:
+                pids.add(pid)
+                try:
+                    # NOTE: rootwrap KillFilter accepts a single pid per
+                    # command, so issue one signal per keepalived process.
+                    utils.execute(['kill', '-HUP', pid], run_as_root=True)
+                except Exception:
+                    LOG.exception(_LE('Failed to reload keepalived process '
+                                      '%(pid)s for %(uuid)s'),
+                                  {'pid': pid, 'uuid': pm.uuid})
+
+
 class KeepalivedManager(object):
     """Wrapper for keepalived.
 
@@ -346,12 +397,13 @@ class KeepalivedManager(object):
     """
 
     def __init__(self, resource_id, config, process_monitor, conf_path='/tmp',
-                 namespace=None):
+                 namespace=None, reload_batcher=None):
         self.resource_id = resource_id
         self.config = config
         self.namespace = namespace
         self.process_monitor = process_monitor
         self.conf_path = conf_path
+        self.reload_batcher = reload_batcher
 
     def get_conf_dir(self):
         confs_dir = os.path.abspath(os.path.normpath(self.conf_path))
@@ -365,11 +417,18 @@ class KeepalivedManager(object):
         return os.path.join(conf_dir, filename)
 
     def _output_config_file(self):
+        """Write the keepalived configuration if it changed.
+
+        :returns: a tuple of the configuration file path and a boolean which
+                  tells if the file content was modified.
+        """
         config_str = self.config.get_config_str()
         config_path = self.get_full_config_file_path('keepalived.conf')
+        if config_str == self.get_conf_on_disk():
+            return config_path, False
         common_utils.replace_file(config_path, config_str)
 
-        return config_path
+        return config_path, True
 
     def get_conf_on_disk(self):
         config_path = self.get_full_config_file_path('keepalived.conf')
@@ -381,7 +440,7 @@ class KeepalivedManager(object):
                 raise
 
     def spawn(self):
-        config_path = self._output_config_file()
+        config_path, config_changed = self._output_config_file()
 
         keepalived_pm = self.get_process()
         vrrp_pm = self._get_vrrp_process(
@@ -390,7 +449,15 @@ class KeepalivedManager(object):
         keepalived_pm.default_cmd_callback = (
             self._get_keepalived_process_callback(vrrp_pm, config_path))
 
-        keepalived_pm.enable(reload_cfg=True)
+        if not keepalived_pm.active:
+            keepalived_pm.enable()
+        elif not config_changed:
+            LOG.debug('Keepalived config %s is unchanged, skipping reload',
+                      config_path)
+        elif self.reload_batcher:
+            self.reload_batcher.queue_reload(keepalived_pm)
+        else:
+            keepalived_pm.reload_cfg()
 
         self.process_monitor.register(uuid=self.resource_id,
                                       service_name=KEEPALIVED_SERVICE_NAME,
@@ -24,6 +24,7 @@ from webob import exc
 from neutron._i18n import _, _LW
 from neutron.common import constants
 from neutron.common import exceptions
+from neutron.db import sqlalchemyutils
 
 
 LOG = logging.getLogger(__name__)
@@ -54,21 +55,21 @@ def get_filters(request, attr_info, skips=None):
     return res
 
 
-def get_previous_link(request, items, id_key):
+def get_previous_link(request, items, id_key, marker_func=None):
     params = request.GET.copy()
     params.pop('marker', None)
     if items:
-        marker = items[0][id_key]
+        marker = (marker_func and marker_func(items[0])) or items[0][id_key]
         params['marker'] = marker
     params['page_reverse'] = True
     return "%s?%s" % (request.path_url, parse.urlencode(params))
 
 
-def get_next_link(request, items, id_key):
+def get_next_link(request, items, id_key, marker_func=None):
     params = request.GET.copy()
     params.pop('marker', None)
     if items:
-        marker = items[-1][id_key]
+        marker = (marker_func and marker_func(items[-1])) or items[-1][id_key]
         params['marker'] = marker
     params.pop('page_reverse', None)
     return "%s?%s" % (request.path_url, parse.urlencode(params))
@@ -158,7 +159,7 @@ def get_page_reverse(request):
 
 
 def get_pagination_links(request, items, limit,
-                         marker, page_reverse, key="id"):
+                         marker, page_reverse, key="id", marker_func=None):
     key = key if key else 'id'
     links = []
     if not limit:
@@ -166,11 +167,11 @@ def get_pagination_links(request, items, limit,
     if not (len(items) < limit and not page_reverse):
         links.append({"rel": "next",
                       "href": get_next_link(request, items,
-                                            key)})
+                                            key, marker_func)})
     if not (len(items) < limit and page_reverse):
         links.append({"rel": "previous",
                       "href": get_previous_link(request, items,
-                                                key)})
+                                                key, marker_func)})
     return links
 
 
@@ -228,15 +229,39 @@ class PaginationEmulatedHelper(PaginationHelper):
 
 class PaginationNativeHelper(PaginationEmulatedHelper):
 
+    def __init__(self, request, primary_key='id'):
+        super(PaginationNativeHelper, self).__init__(request, primary_key)
+        self.sort_keys = [primary_key]
+
     def update_args(self, args):
         if self.primary_key not in dict(args.get('sorts', [])).keys():
             args.setdefault('sorts', []).append((self.primary_key, True))
+        self.sort_keys = [key for key, direction in args['sorts']]
         args.update({'limit': self.limit, 'marker': self.marker,
                      'page_reverse': self.page_reverse})
 
+    def update_fields(self, original_fields, fields_to_add):
+        if not (original_fields and cfg.CONF.pagination_keyset_markers):
+            return super(PaginationNativeHelper, self).update_fields(
+                original_fields, fields_to_add)
+        # Sort key values are needed for building the links markers
+        for key in self.sort_keys:
+            if key not in original_fields:
+                original_fields.append(key)
+                fields_to_add.append(key)
+
     def paginate(self, items):
         return items
 
+    def get_links(self, items):
+        marker_func = None
+        if cfg.CONF.pagination_keyset_markers:
+            marker_func = functools.partial(sqlalchemyutils.encode_marker,
+                                            sort_keys=self.sort_keys)
+        return get_pagination_links(
+            self.request, items, self.limit, self.marker,
+            self.page_reverse, self.primary_key, marker_func)
+
 
 class NoPaginationHelper(PaginationHelper):
     pass
@@ -29,6 +29,7 @@ from neutron.common import constants
 from neutron.common import exceptions as n_exc
 from neutron.common import utils
 from neutron.db import api as db_api
+from neutron.db import models_v2
 from neutron.extensions import portbindings
 from neutron import manager
 from neutron.plugins.common import utils as p_utils
@@ -60,9 +61,10 @@ class DhcpRpcCallback(object):
     #     1.3 - Removed release_port_fixed_ip. It's not used by reference DHCP
     #           agent since Juno, so similar rationale for not bumping the
     #           major version as above applies here too.
+    #     1.4 - Added get_changed_networks_info.
     target = oslo_messaging.Target(
         namespace=constants.RPC_NAMESPACE_DHCP_PLUGIN,
-        version='1.3')
+        version='1.4')
 
     def _get_active_networks(self, context, **kwargs):
         """Retrieve and return a list of the active networks."""
@@ -145,6 +147,71 @@ class DhcpRpcCallback(object):
 
         return networks
 
+    @staticmethod
+    def _get_dhcp_ports(context, network_ids):
+        """Return the DHCP related attributes of the ports of networks.
+
+        The ports are read from the database without building their full
+        dicts, which is enough to digest the networks.
+        """
+        query = context.session.query(models_v2.Port).filter(
+            models_v2.Port.network_id.in_(network_ids))
+        ports = []
+        for port in query:
+            ports.append({
+                'id': port.id,
+                'network_id': port.network_id,
+                'mac_address': port.mac_address,
+                'device_owner': port.device_owner,
+                'device_id': port.device_id,
+                'fixed_ips': [{'subnet_id': fixed_ip.subnet_id,
+                               'ip_address': fixed_ip.ip_address}
+                              for fixed_ip in port.fixed_ips],
+                'extra_dhcp_opts': [{'opt_name': opt.opt_name,
+                                     'opt_value': opt.opt_value,
+                                     'ip_version': opt.ip_version}
+                                    for opt in getattr(port, 'dhcp_opts',
+                                                       None) or []]})
+        return ports
+
+    def get_changed_networks_info(self, context, **kwargs):
+        """Returns the networks whose content differ from the agent's.
+
+        The agent passes the digests of the networks it knows about in
+        network_digests. The digests of all the active networks are
+        returned, together with the info of the networks whose digest
+        does not match the one of the agent. The full info is only built
+        for these networks.
+        """
+        host = kwargs.get('host')
+        known_digests = kwargs.get('network_digests') or {}
+        LOG.debug('get_changed_networks_info from %s', host)
+        networks = self._get_active_networks(context, **kwargs)
+        plugin = manager.NeutronManager.get_plugin()
+        filters = {'network_id': [network['id'] for network in networks],
+                   'enable_dhcp': [True]}
+        grouped_subnets = self._group_by_network_id(
+            plugin.get_subnets(context, filters=filters))
+        grouped_ports = self._group_by_network_id(
+            self._get_dhcp_ports(context, filters['network_id']))
+        digests = {}
+        changed_networks = []
+        for network in networks:
+            network['subnets'] = grouped_subnets.get(network['id'], [])
+            digest = utils.get_dhcp_network_digest(
+                dict(network, ports=grouped_ports.get(network['id'], [])))
+            digests[network['id']] = digest
+            if known_digests.get(network['id']) != digest:
+                changed_networks.append(network)
+        if changed_networks:
+            filters = {'network_id': [network['id']
+                                      for network in changed_networks]}
+            grouped_ports = self._group_by_network_id(
+                plugin.get_ports(context, filters=filters))
+            for network in changed_networks:
+                network['ports'] = grouped_ports.get(network['id'], [])
+        return {'digests': digests, 'networks': changed_networks}
+
     def get_network_info(self, context, **kwargs):
         """Retrieve and return extended information about a network."""
         network_id = kwargs.get('network_id')
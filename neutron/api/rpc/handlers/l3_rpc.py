@@ -47,7 +47,8 @@ class L3RpcCallback(object):
     # 1.7 Added method delete_agent_gateway_port for DVR Routers
     # 1.8 Added address scope information
     # 1.9 Added get_router_ids
-    target = oslo_messaging.Target(version='1.9')
+    # 1.10 Added get_arp_entries_by_subnet for DVR
+    target = oslo_messaging.Target(version='1.10')
 
     @property
     def plugin(self):
@@ -243,6 +244,28 @@ class L3RpcCallback(object):
         filters = {'fixed_ips': {'subnet_id': [subnet_id]}}
         return self.plugin.get_ports(context, filters=filters)
 
+    @db_api.retry_db_errors
+    def get_arp_entries_by_subnet(self, context, **kwargs):
+        """DVR: RPC called by dvr-agent to get the ARP table of a subnet.
+
+        Only the addresses the agent needs to program are returned, rather
+        than the full port dicts, which keeps the reply small on subnets
+        with many ports.
+        """
+        subnet_id = kwargs.get('subnet_id')
+        LOG.debug("DVR: subnet_id: %s", subnet_id)
+        filters = {'fixed_ips': {'subnet_id': [subnet_id]}}
+        ports = self.plugin.get_ports(
+            context, filters=filters,
+            fields=['mac_address', 'fixed_ips', 'device_owner'])
+        return [{'ip_address': fixed_ip['ip_address'],
+                 'mac_address': port['mac_address']}
+                for port in ports
+                if port['device_owner'] not in
+                constants.ROUTER_INTERFACE_OWNERS
+                for fixed_ip in port['fixed_ips']
+                if fixed_ip['subnet_id'] == subnet_id]
+
     @db_api.retry_db_errors
     def get_agent_gateway_port(self, context, **kwargs):
         """Get Agent Gateway port for FIP.
@@ -15,6 +15,7 @@
 
 import collections
 import copy
+import itertools
 
 import netaddr
 from oslo_config import cfg
@@ -36,6 +37,7 @@ from neutron.db import api as db_api
 from neutron import policy
 from neutron import quota
 from neutron.quota import resource_registry
+from neutron import wsgi
 
 
 LOG = logging.getLogger(__name__)
@@ -73,6 +75,7 @@ class Controller(object):
         self._native_bulk = self._is_native_bulk_supported()
         self._native_pagination = self._is_native_pagination_supported()
         self._native_sorting = self._is_native_sorting_supported()
+        self._native_streaming = self._is_native_streaming_supported()
         self._policy_attrs = [name for (name, info) in self._attr_info.items()
                               if info.get('required_by_policy')]
         self._notifier = n_rpc.get_notifier('network')
@@ -133,6 +136,11 @@ class Controller(object):
                                     % self._plugin.__class__.__name__)
         return getattr(self._plugin, native_sorting_attr_name, False)
 
+    def _is_native_streaming_supported(self):
+        native_streaming_attr_name = ("_%s__native_streaming_support"
+                                      % self._plugin.__class__.__name__)
+        return getattr(self._plugin, native_streaming_attr_name, False)
+
     def _exclude_attributes_by_policy(self, context, data):
         """Identifies attributes to exclude according to authZ policies.
 
@@ -272,12 +280,9 @@ class Controller(object):
             # FIXME(salvatore-orlando): obj_getter might return references to
             # other resources. Must check authZ on them too.
             # Omit items from list that should not be visible
-            obj_list = [obj for obj in obj_list
-                        if policy.check(request.context,
-                                        self._plugin_handlers[self.SHOW],
-                                        obj,
-                                        plugin=self._plugin,
-                                        pluralized=self._collection)]
+            obj_list = policy.check_collection(
+                request.context, self._plugin_handlers[self.SHOW],
+                obj_list, pluralized=self._collection)
         # Use the first element in the list for discriminating which attributes
         # should be filtered out because of authZ policies
         # fields_to_add contains a list of attributes added for request policy
@@ -300,6 +305,74 @@ class Controller(object):
             request.context, self._resource, request.context.tenant_id)
         return collection
 
+    def _is_streaming_allowed(self, request, parent_id=None):
+        """Whether a list request can be served as a stream.
+
+        Streaming requires the plugin to provide a get_<collection>_iter
+        handler, and is not used when items must be paginated or sorted
+        in memory by the API layer.
+        """
+        if (cfg.CONF.collection_stream_chunk_size <= 0 or
+                not self._native_streaming or parent_id):
+            return False
+        if not hasattr(self._plugin,
+                       '%s_iter' % self._plugin_handlers[self.LIST]):
+            return False
+        if getattr(self._get_pagination_helper(request), 'limit', None):
+            return False
+        return not isinstance(self._get_sorting_helper(request),
+                              api_common.SortingEmulatedHelper)
+
+    def _stream_items(self, request, do_authz=False):
+        """Retrieves the requested entity as a stream of formatted items."""
+        original_fields, fields_to_add = self._do_field_list(
+            api_common.list_args(request, 'fields'))
+        filters = api_common.get_filters(request, self._attr_info,
+                                         ['fields', 'sort_key', 'sort_dir',
+                                          'limit', 'marker', 'page_reverse'])
+        chunk_size = cfg.CONF.collection_stream_chunk_size
+        kwargs = {'filters': filters,
+                  'fields': original_fields,
+                  'chunk_size': chunk_size}
+        sorting_helper = self._get_sorting_helper(request)
+        sorting_helper.update_args(kwargs)
+        sorting_helper.update_fields(original_fields, fields_to_add)
+        obj_getter = getattr(self._plugin,
+                             '%s_iter' % self._plugin_handlers[self.LIST])
+        obj_iter = obj_getter(request.context, **kwargs)
+        # NOTE: the first chunk is fetched before the response is started so
+        # that errors in the query are still reported with a proper status
+        # code. The resource also formats and serializes it beforehand.
+        first_chunk = list(itertools.islice(obj_iter, chunk_size))
+        chunks = itertools.chain(
+            [first_chunk],
+            iter(lambda: list(itertools.islice(obj_iter, chunk_size)), []))
+        # Synchronize usage trackers, if needed
+        resource_registry.resync_resource(
+            request.context, self._resource, request.context.tenant_id)
+        return wsgi.CollectionStream(
+            self._collection,
+            self._format_stream(request.context, chunks, do_authz,
+                                fields_to_add),
+            chunk_size)
+
+    def _format_stream(self, context, chunks, do_authz, fields_to_add):
+        fields_to_strip = None
+        for chunk in chunks:
+            if do_authz:
+                chunk = policy.check_collection(
+                    context, self._plugin_handlers[self.SHOW], chunk,
+                    pluralized=self._collection)
+            for obj in chunk:
+                # As for _items, the first element discriminates which
+                # attributes should be filtered out because of policies
+                if fields_to_strip is None:
+                    fields_to_strip = (
+                        (fields_to_add or []) +
+                        self._exclude_attributes_by_policy(context, obj))
+                yield self._filter_attributes(
+                    context, obj, fields_to_strip=fields_to_strip)
+
     def _item(self, request, id, do_authz=False, field_list=None,
               parent_id=None):
         """Retrieves and formats a single element of the requested entity."""
@@ -337,6 +410,8 @@ class Controller(object):
         parent_id = kwargs.get(self._parent_id_name)
         # Ensure policy engine is initialized
         policy.init()
+        if self._is_streaming_allowed(request, parent_id):
+            return self._stream_items(request, True)
         return self._items(request, True, parent_id)
 
     def show(self, request, id, **kwargs):
@@ -17,12 +17,14 @@
 Utility methods for working with WSGI servers redux
 """
 
+import itertools
 import sys
 
 import netaddr
 import oslo_i18n
 from oslo_log import log as logging
 from oslo_policy import policy as oslo_policy
+from oslo_utils import excutils
 import six
 import webob.dec
 import webob.exc
@@ -73,6 +75,7 @@ def Resource(controller, faults=None, deserializers=None, serializers=None):
         language = request.best_match_language()
         deserializer = deserializers.get(content_type)
         serializer = serializers.get(content_type)
+        app_iter = None
 
         try:
             if request.body:
@@ -81,6 +84,10 @@ def Resource(controller, faults=None, deserializers=None, serializers=None):
             method = getattr(controller, action)
 
             result = method(request=request, **args)
+            if (isinstance(result, wsgi.CollectionStream) and
+                    hasattr(serializer, 'serialize_stream')):
+                app_iter = _start_stream(action,
+                                         serializer.serialize_stream(result))
         except (exceptions.NeutronException,
                 netaddr.AddrFormatError,
                 oslo_policy.PolicyNotAuthorized) as e:
@@ -138,6 +145,12 @@ def Resource(controller, faults=None, deserializers=None, serializers=None):
             raise webob.exc.HTTPInternalServerError(**kwargs)
 
         status = action_status.get(action, 200)
+        if app_iter is not None:
+            return webob.Response(request=request, status=status,
+                                  content_type=content_type,
+                                  app_iter=app_iter)
+        if isinstance(result, wsgi.CollectionStream):
+            result = {result.collection: list(result.items)}
         body = serializer.serialize(result)
         # NOTE(jkoelker) Comply with RFC2616 section 9.7
         if status == 204:
@@ -150,6 +163,30 @@ def Resource(controller, faults=None, deserializers=None, serializers=None):
     return resource
 
 
+def _start_stream(action, body_iter):
+    """Serialize the first chunk of a streamed response body.
+
+    Errors raised while retrieving, formatting or serializing the first
+    chunk are still reported as faults by the caller. The status of the
+    response is sent once it is started, so later errors are logged and
+    re-raised to make the WSGI server abort the connection, leaving the
+    client with a truncated body rather than a seemingly complete one.
+    """
+    first_chunks = list(itertools.islice(body_iter, 2))
+
+    def app_iter():
+        for chunk in first_chunks:
+            yield chunk
+        try:
+            for chunk in body_iter:
+                yield chunk
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                LOG.exception(_LE('%s failed while streaming the response'),
+                              action)
+    return app_iter()
+
+
 def get_exception_data(e):
     """Extract the information about an exception.
 
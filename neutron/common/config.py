@@ -71,6 +71,19 @@ core_opts = [
                help=_("The maximum number of items returned in a single "
                       "response, value was 'infinite' or negative integer "
                       "means no limit")),
+    cfg.BoolOpt('pagination_keyset_markers', default=False,
+                help=_("With native pagination, use opaque markers carrying "
+                       "the sort key values of the last item of a page in "
+                       "the pagination links. The following page is then "
+                       "retrieved without loading the marker item from the "
+                       "database. Markers containing a resource id are "
+                       "still accepted.")),
+    cfg.IntOpt('collection_stream_chunk_size', default=0,
+               help=_("When greater than zero, unpaginated GET requests on "
+                      "collections supported by the plugin are streamed to "
+                      "the client. Resources are fetched from the database "
+                      "and serialized in chunks of this size instead of "
+                      "building the whole response in memory.")),
     cfg.ListOpt('default_availability_zones', default=[],
                 help=_("Default value of availability zone hints. The "
                        "availability zone aware schedulers use this when "
@@ -153,6 +166,17 @@ core_opts = [
     cfg.IntOpt('send_events_interval', default=2,
                help=_('Number of seconds between sending events to nova if '
                       'there are any events to send.')),
+    cfg.IntOpt('send_events_chunk_size', default=0,
+               help=_('Maximum number of events sent to nova in a single '
+                      'request. Larger batches of events are split into '
+                      'requests of this size which are sent concurrently. '
+                      'The events about a server are always sent in the '
+                      'same request. 0 sends each batch in a single '
+                      'request.')),
+    cfg.IntOpt('send_events_retries', default=0,
+               help=_('Number of times sending events to nova is retried, '
+                      'send_events_interval seconds apart, when the '
+                      'request fails.')),
     cfg.BoolOpt('advertise_mtu', default=False,
                 help=_('If True, effort is made to advertise MTU settings '
                        'to VMs via network methods (DHCP and RA MTU options) '
@@ -163,6 +187,13 @@ core_opts = [
                       "driver is used. In order to use the reference "
                       "implementation of Neutron IPAM driver, "
                       "use 'internal'.")),
+    cfg.IntOpt('ipam_allocation_window', default=1, min=1,
+               help=_("Number of addresses of an allocation pool which the "
+                      "reference IPAM driver randomly picks and looks up at "
+                      "once when allocating an address. One of the free "
+                      "ones is then allocated, so that ports created "
+                      "concurrently on the same subnet rarely conflict. "
+                      "With 1, the lowest free address is allocated.")),
     cfg.BoolOpt('vlan_transparent', default=False,
                 help=_('If True, then allow plugins that support it to '
                        'create VLAN transparent networks.')),
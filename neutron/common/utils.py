@@ -39,6 +39,7 @@ from eventlet.green import subprocess
 from oslo_concurrency import lockutils
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
 from oslo_utils import excutils
 from oslo_utils import importutils
 from oslo_utils import reflection
@@ -339,6 +340,49 @@ def get_dhcp_agent_device_id(network_id, host):
     return 'dhcp%s-%s' % (host_uuid, network_id)
 
 
+def get_dhcp_network_digest(network):
+    """Return a digest of the content of a network served by DHCP.
+
+    Only the attributes of the network, of its DHCP enabled subnets and of
+    its ports which DHCP agents use to configure the DHCP servers are
+    digested, regardless of the order of the ports, subnets, fixed IPs,
+    host routes and extra DHCP options.
+    """
+    subnets = [
+        {'id': subnet['id'],
+         'ip_version': subnet.get('ip_version'),
+         'cidr': subnet.get('cidr'),
+         'gateway_ip': subnet.get('gateway_ip'),
+         'dns_nameservers': subnet.get('dns_nameservers') or [],
+         'host_routes': sorted(
+             (route['destination'], route['nexthop'])
+             for route in subnet.get('host_routes') or []),
+         'ipv6_address_mode': subnet.get('ipv6_address_mode'),
+         'ipv6_ra_mode': subnet.get('ipv6_ra_mode')}
+        for subnet in network['subnets'] if subnet.get('enable_dhcp')]
+    ports = [
+        {'id': port['id'],
+         'mac_address': port.get('mac_address'),
+         'device_owner': port.get('device_owner'),
+         'device_id': port.get('device_id'),
+         'fixed_ips': sorted(
+             (fixed_ip['subnet_id'], fixed_ip['ip_address'])
+             for fixed_ip in port.get('fixed_ips') or []),
+         'extra_dhcp_opts': sorted(
+             (opt['opt_name'], opt['opt_value'],
+              opt.get('ip_version', n_const.IP_VERSION_4))
+             for opt in port.get('extra_dhcp_opts') or [])}
+        for port in network['ports']]
+    content = {'id': network['id'],
+               'tenant_id': network.get('tenant_id'),
+               'admin_state_up': network.get('admin_state_up'),
+               'mtu': network.get('mtu'),
+               'subnets': sorted(subnets, key=lambda subnet: subnet['id']),
+               'ports': sorted(ports, key=lambda port: port['id'])}
+    data = jsonutils.dumps(content, sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
 def cpu_count():
     try:
         return multiprocessing.cpu_count()
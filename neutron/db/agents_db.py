@@ -14,6 +14,7 @@
 #    under the License.
 
 import datetime
+import hashlib
 
 from eventlet import greenthread
 from oslo_config import cfg
@@ -21,6 +22,7 @@ from oslo_db import exception as db_exc
 from oslo_log import log as logging
 import oslo_messaging
 from oslo_serialization import jsonutils
+from oslo_service import loopingcall
 from oslo_utils import timeutils
 import six
 import sqlalchemy as sa
@@ -65,6 +67,25 @@ AGENT_OPTS = [
                        "enable_new_agents=False. In the case, user's "
                        "resources will not be scheduled automatically to the "
                        "agent until admin changes admin_state_up to True.")),
+    cfg.IntOpt('agent_heartbeat_batch_interval', default=0,
+               help=_("Seconds between the batched updates of the heartbeat "
+                      "timestamps of agents. When greater than 0, agents "
+                      "are only fully updated in the database when their "
+                      "reported state changes, and other heartbeats only "
+                      "update their heartbeat timestamp in periodic bulk "
+                      "updates. Heartbeat timestamps may then lag by up to "
+                      "twice this interval, which should be small compared "
+                      "to agent_down_time. 0 disables batching.")),
+    cfg.IntOpt('agent_registry_ttl', default=0,
+               help=_("Seconds the in-memory registry of agents kept by "
+                      "each server process may be used before being "
+                      "reloaded from the database. When greater than 0, "
+                      "the schedulers look up agents by host and check "
+                      "their liveness in this registry, which also records "
+                      "the heartbeats received by the process. Changes made "
+                      "to agents through other processes may then be seen "
+                      "up to this many seconds late. 0 disables the "
+                      "registry.")),
 ]
 cfg.CONF.register_opts(AGENT_OPTS)
 
@@ -103,7 +124,198 @@ class Agent(model_base.BASEV2, model_base.HasId):
 
     @property
     def is_active(self):
-        return not AgentDbMixin.is_agent_down(self.heartbeat_timestamp)
+        return not AgentDbMixin.is_agent_down(
+            AgentDbMixin.get_agent_heartbeat(self))
+
+
+class AgentHeartbeatBatcher(object):
+    """Batches the heartbeats of agents whose state did not change.
+
+    Heartbeats of agents whose reported state was last written by this
+    process are queued, and the heartbeat timestamps of all the queued
+    agents are updated with a single statement every interval seconds.
+    Agents whose stored state no longer matches the one recorded, as
+    another process wrote it meanwhile, are forgotten when flushing.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        # (agent_type, host) -> (agent id, state digest, last heartbeat)
+        self._agents = {}
+        # agent id -> time of its last queued heartbeat
+        self._pending = {}
+        self._loop = None
+
+    def start(self):
+        self._loop = loopingcall.FixedIntervalLoopingCall(self.flush)
+        self._loop.start(interval=self.interval, initial_delay=self.interval)
+
+    @staticmethod
+    def get_state_digest(agent_state, load):
+        state = dict((key, agent_state.get(key)) for key in
+                     ('binary', 'topic', 'availability_zone'))
+        # Configurations are written as an empty dict when not reported
+        state['configurations'] = agent_state.get('configurations', {})
+        state['load'] = load
+        data = jsonutils.dumps(state, sort_keys=True)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def record(self, agent_id, agent_state, digest):
+        """Record the state of an agent which was written to the database."""
+        key = (agent_state['agent_type'], agent_state['host'])
+        self._agents[key] = (agent_id, digest, timeutils.utcnow())
+
+    def queue(self, agent_state, digest):
+        """Queue the heartbeat of an agent.
+
+        :returns: False if the agent state needs to be written to the
+                  database, because it is unknown or changed, or because
+                  the agent might have been considered down.
+        """
+        key = (agent_state['agent_type'], agent_state['host'])
+        known = self._agents.get(key)
+        if not known:
+            return False
+        agent_id, known_digest, last_heartbeat = known
+        now = timeutils.utcnow()
+        # The heartbeat timestamp in the database lags behind the last
+        # heartbeat by up to one interval
+        elapsed = timeutils.delta_seconds(last_heartbeat, now) + self.interval
+        if known_digest != digest or elapsed >= cfg.CONF.agent_down_time:
+            return False
+        self._agents[key] = (agent_id, digest, now)
+        self._pending[agent_id] = now
+        return True
+
+    def _get_stored_digests(self, session, agent_ids):
+        """Return the digests of the agent states stored in the database."""
+        query = session.query(Agent.id, Agent.binary, Agent.topic,
+                              Agent.availability_zone, Agent.configurations,
+                              Agent.load).filter(Agent.id.in_(agent_ids))
+        digests = {}
+        for row in query:
+            agent_state = {'binary': row.binary,
+                           'topic': row.topic,
+                           'availability_zone': row.availability_zone,
+                           'configurations': jsonutils.loads(
+                               row.configurations)}
+            digests[row.id] = self.get_state_digest(agent_state, row.load)
+        return digests
+
+    def flush(self):
+        """Update the heartbeat timestamps of the queued agents."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        # Agents are only guaranteed to be alive since the oldest heartbeat
+        heartbeat = min(pending.values())
+        admin_context = context.get_admin_context()
+        stale = set(pending)
+        try:
+            with admin_context.session.begin(subtransactions=True):
+                stored_digests = self._get_stored_digests(
+                    admin_context.session, list(pending))
+                query = admin_context.session.query(Agent).filter(
+                    Agent.id.in_(list(pending)))
+                query.update(
+                    {'heartbeat_timestamp': sa.case(
+                        [(Agent.heartbeat_timestamp < heartbeat, heartbeat)],
+                        else_=Agent.heartbeat_timestamp)},
+                    synchronize_session=False)
+            # The state of an agent might have been written by another
+            # process since this one recorded it
+            recorded_digests = dict(
+                (agent_id, digest) for agent_id, digest, _heartbeat in
+                six.itervalues(self._agents))
+            stale = set(agent_id for agent_id in pending
+                        if stored_digests.get(agent_id) !=
+                        recorded_digests.get(agent_id))
+        except Exception:
+            LOG.exception(_LE("Failed to update the heartbeat of %d agents"),
+                          len(pending))
+        if stale:
+            # Agents might have been deleted or updated elsewhere, or
+            # heartbeats lost. Their next report will write their whole
+            # state again.
+            self._agents = dict(
+                (key, value) for key, value in six.iteritems(self._agents)
+                if value[0] not in stale)
+
+
+class AgentRegistry(object):
+    """In-memory registry of the agents known to a server process.
+
+    Serves the host and liveness lookups of the schedulers without querying
+    the agents table each time. The registry is reloaded from the database
+    once it is older than agent_registry_ttl seconds, and the heartbeats
+    received by the process are recorded as they arrive, so that liveness
+    never lags behind the database.
+    """
+
+    _instance = None
+
+    def __init__(self):
+        # (agent_type, host) -> {'id': agent id, 'admin_state_up': bool}
+        self._agents = {}
+        # (agent_type, host) -> latest heartbeat known to this process
+        self._heartbeats = {}
+        self._loaded_at = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def enabled():
+        return cfg.CONF.agent_registry_ttl > 0
+
+    def invalidate(self):
+        """Reload the registry from the database on its next lookup."""
+        self._loaded_at = None
+
+    def _load(self, context):
+        query = context.session.query(Agent.id, Agent.agent_type, Agent.host,
+                                      Agent.admin_state_up,
+                                      Agent.heartbeat_timestamp)
+        agents = {}
+        heartbeats = {}
+        for agent in query:
+            key = (agent.agent_type, agent.host)
+            agents[key] = {'id': agent.id,
+                           'admin_state_up': agent.admin_state_up}
+            heartbeat = self._heartbeats.get(key)
+            if heartbeat is None or heartbeat < agent.heartbeat_timestamp:
+                heartbeat = agent.heartbeat_timestamp
+            heartbeats[key] = heartbeat
+        self._agents = agents
+        self._heartbeats = heartbeats
+        self._loaded_at = timeutils.utcnow()
+
+    def _ensure_loaded(self, context):
+        if (self._loaded_at is None or
+                timeutils.is_older_than(self._loaded_at,
+                                        cfg.CONF.agent_registry_ttl)):
+            self._load(context)
+
+    def get_agent(self, context, agent_type, host):
+        """Return the id and admin state of the agent_type agent on host."""
+        self._ensure_loaded(context)
+        return self._agents.get((agent_type, host))
+
+    def get_heartbeat(self, agent_type, host):
+        return self._heartbeats.get((agent_type, host))
+
+    def heartbeat(self, agent_type, host, timestamp):
+        """Record a heartbeat received by this process."""
+        key = (agent_type, host)
+        if key not in self._agents:
+            # A new agent, load it on the next lookup
+            self.invalidate()
+        heartbeat = self._heartbeats.get(key)
+        if heartbeat is None or heartbeat < timestamp:
+            self._heartbeats[key] = timestamp
 
 
 class AgentAvailabilityZoneMixin(az_ext.AvailabilityZonePluginBase):
@@ -169,19 +381,37 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
             raise ext_agent.AgentNotFound(id=id)
         return agent
 
+    def _get_enabled_agent_from_registry(self, context, agent_type, host):
+        info = AgentRegistry.get_instance().get_agent(
+            context, agent_type, host)
+        if not info or not info['admin_state_up']:
+            return
+        # Served from the session identity map when already loaded
+        agent = context.session.query(Agent).get(info['id'])
+        # The registry may not have seen a concurrent update of the agent
+        if agent is None or not agent.admin_state_up:
+            return
+        return agent
+
     def get_enabled_agent_on_host(self, context, agent_type, host):
         """Return agent of agent_type for the specified host."""
-        query = context.session.query(Agent)
-        query = query.filter(Agent.agent_type == agent_type,
-                             Agent.host == host,
-                             Agent.admin_state_up == sql.true())
-        try:
-            agent = query.one()
-        except exc.NoResultFound:
+        if AgentRegistry.enabled():
+            agent = self._get_enabled_agent_from_registry(
+                context, agent_type, host)
+        else:
+            query = context.session.query(Agent)
+            query = query.filter(Agent.agent_type == agent_type,
+                                 Agent.host == host,
+                                 Agent.admin_state_up == sql.true())
+            try:
+                agent = query.one()
+            except exc.NoResultFound:
+                agent = None
+        if agent is None:
             LOG.debug('No enabled %(agent_type)s agent on host '
                       '%(host)s', {'agent_type': agent_type, 'host': host})
             return
-        if self.is_agent_down(agent.heartbeat_timestamp):
+        if self.is_agent_down(self.get_agent_heartbeat(agent)):
             LOG.warn(_LW('%(agent_type)s agent %(agent_id)s is not active'),
                      {'agent_type': agent_type, 'agent_id': agent.id})
         return agent
@@ -191,6 +421,21 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
         return timeutils.is_older_than(heart_beat_time,
                                        cfg.CONF.agent_down_time)
 
+    @staticmethod
+    def get_agent_heartbeat(agent):
+        """Return the latest known heartbeat timestamp of an agent.
+
+        With the agent registry enabled, this also accounts for heartbeats
+        received by this process which are not in the database yet.
+        """
+        heartbeat = agent['heartbeat_timestamp']
+        if AgentRegistry.enabled():
+            known = AgentRegistry.get_instance().get_heartbeat(
+                agent['agent_type'], agent['host'])
+            if known is not None and known > heartbeat:
+                return known
+        return heartbeat
+
     def get_configuration_dict(self, agent_db):
         try:
             conf = jsonutils.loads(agent_db.configurations)
@@ -227,12 +472,14 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
         with context.session.begin(subtransactions=True):
             agent = self._get_agent(context, id)
             context.session.delete(agent)
+        AgentRegistry.get_instance().invalidate()
 
     def update_agent(self, context, id, agent):
         agent_data = agent['agent']
         with context.session.begin(subtransactions=True):
             agent = self._get_agent(context, id)
             agent.update(agent_data)
+        AgentRegistry.get_instance().invalidate()
         return self._make_agent_dict(agent)
 
     def get_agents_db(self, context, filters=None):
@@ -338,9 +585,41 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
             greenthread.sleep(0)
         return status
 
+    def _get_heartbeat_batcher(self):
+        batcher = getattr(self, '_heartbeat_batcher', None)
+        if batcher is None:
+            batcher = AgentHeartbeatBatcher(
+                cfg.CONF.agent_heartbeat_batch_interval)
+            batcher.start()
+            self._heartbeat_batcher = batcher
+        return batcher
+
     def create_or_update_agent(self, context, agent):
         """Create or update agent according to report."""
+        status = self._create_or_update_agent_or_queue(context, agent)
+        if AgentRegistry.enabled():
+            AgentRegistry.get_instance().heartbeat(
+                agent['agent_type'], agent['host'], timeutils.utcnow())
+        return status
+
+    def _create_or_update_agent_or_queue(self, context, agent):
+        if cfg.CONF.agent_heartbeat_batch_interval <= 0:
+            return self._create_or_update_agent_with_retry(context, agent)
+
+        batcher = self._get_heartbeat_batcher()
+        digest = batcher.get_state_digest(agent, self._get_agent_load(agent))
+        if (not agent.get('start_flag') and
+                not agent.get('configurations', {}).get(
+                    'log_agent_heartbeats') and
+                batcher.queue(agent, digest)):
+            return constants.AGENT_ALIVE
+        status = self._create_or_update_agent_with_retry(context, agent)
+        agent_db = self._get_agent_by_type_and_host(
+            context, agent['agent_type'], agent['host'])
+        batcher.record(agent_db.id, agent, digest)
+        return status
 
+    def _create_or_update_agent_with_retry(self, context, agent):
         try:
             return self._create_or_update_agent(context, agent)
         except db_exc.DBDuplicateEntry:
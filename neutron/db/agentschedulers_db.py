@@ -63,6 +63,11 @@ AGENTS_SCHEDULER_OPTS = [
                        'selected for automatic scheduling regardless of this '
                        'option. But manual scheduling to such agents is '
                        'available if this option is True.')),
+    cfg.IntOpt('dhcp_load_refresh_interval', default=60,
+               help=_('Seconds between the reloads from the database of '
+                      'the number of networks hosted by each DHCP agent, '
+                      'kept in memory by the LeastNetworksScheduler '
+                      'network scheduler driver.')),
 ]
 
 cfg.CONF.register_opts(AGENTS_SCHEDULER_OPTS)
@@ -103,7 +108,7 @@ class AgentSchedulerDbMixin(agents_db.AgentDbMixin):
             #                   (i.e. have a recent heartbeat timestamp)
             #                   are eligible, even if active is False
             return not agents_db.AgentDbMixin.is_agent_down(
-                agent['heartbeat_timestamp'])
+                agents_db.AgentDbMixin.get_agent_heartbeat(agent))
 
     def update_agent(self, context, id, agent):
         original_agent = self.get_agent(context, id)
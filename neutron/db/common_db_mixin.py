@@ -19,6 +19,7 @@ from debtcollector import removals
 import six
 from sqlalchemy import and_
 from sqlalchemy import or_
+from sqlalchemy import orm
 from sqlalchemy import sql
 
 from neutron._i18n import _
@@ -59,6 +60,15 @@ class CommonDbMixin(object):
     # TODO(salvatore-orlando): Avoid using class-level variables
     _dict_extend_functions = {}
 
+    # Loading profiles tell which strategy collection queries should use
+    # for loading the relationships of a model. Each profile is tied to
+    # the dict extend function reading these relationships, and applies
+    # only if the plugin implements it.
+    _model_loading_profiles = {}
+
+    _RELATIONSHIP_LOADERS = {'joined': orm.joinedload,
+                             'subquery': orm.subqueryload}
+
     @classmethod
     def register_model_query_hook(cls, model, name, query_hook, filter_hook,
                                   result_filters=None):
@@ -84,6 +94,42 @@ class CommonDbMixin(object):
     def register_dict_extend_funcs(cls, resource, funcs):
         cls._dict_extend_functions.setdefault(resource, []).extend(funcs)
 
+    @classmethod
+    def register_loading_profile(cls, model, func_name, loaders):
+        """Register how relationships of a model are loaded in collections.
+
+        :param model: the model class queried by _get_collection_query
+        :param func_name: name of the dict extend function reading the
+            relationships, None if they are always needed
+        :param loaders: dict mapping relationship names to a strategy,
+            either 'joined' or 'subquery'. Collections should be loaded with
+            'subquery' so that they do not multiply the rows returned for
+            every object.
+
+        When the plugin does not implement func_name the relationships are
+        not loaded unless they are accessed.
+        """
+        cls._model_loading_profiles.setdefault(model, []).append(
+            (func_name, loaders))
+
+    def _get_loading_options(self, model):
+        strategies = {}
+        for func_name, loaders in self._model_loading_profiles.get(model, []):
+            enabled = func_name is None or getattr(self, func_name, None)
+            for attr, strategy in six.iteritems(loaders):
+                if enabled:
+                    strategies[attr] = self._RELATIONSHIP_LOADERS[strategy]
+                else:
+                    strategies.setdefault(attr, orm.lazyload)
+        return [loader(getattr(model, attr))
+                for attr, loader in sorted(strategies.items())]
+
+    def _apply_loading_profiles(self, query, model):
+        options = self._get_loading_options(model)
+        if options:
+            query = query.options(*options)
+        return query
+
     @property
     def safe_reference(self):
         """Return a weakref to the instance.
@@ -267,6 +313,7 @@ class CommonDbMixin(object):
         collection = self._model_query(context, model)
         collection = self._apply_filters_to_query(collection, model, filters,
                                                   context)
+        collection = self._apply_loading_profiles(collection, model)
         if limit and page_reverse and sorts:
             sorts = [(s[0], not s[1]) for s in sorts]
         collection = sqlalchemyutils.paginate_query(collection, model, limit,
@@ -287,11 +334,55 @@ class CommonDbMixin(object):
             items.reverse()
         return items
 
+    def _iter_collection_query(self, query, model, sorts, chunk_size):
+        """Yields the rows of a query, fetching chunk_size rows at a time.
+
+        Query.yield_per() cannot be combined with the joined eager loading
+        most models use for their collections, therefore every chunk is
+        fetched with its own query. The primary key is added to the sort
+        keys and each chunk starts after the last row of the previous one,
+        so rows created or deleted meanwhile do not shift the chunks, and
+        every chunk costs the same to fetch.
+
+        :param query: the query, without sorting
+        :param sorts: the sort keys and directions of the rows
+        """
+        sorts = list(sorts or [])
+        sort_keys = set(key for key, direction in sorts)
+        sorts.extend((column.name, True)
+                     for column in model.__table__.primary_key.columns
+                     if column.name not in sort_keys)
+        marker = None
+        while True:
+            rows = sqlalchemyutils.paginate_query(
+                query, model, chunk_size, sorts, marker_obj=marker).all()
+            if rows:
+                # Read the marker before the rows are handed out, they may
+                # be deleted by the time the next chunk is fetched
+                marker = sqlalchemyutils.KeysetMarker(
+                    dict((key, getattr(rows[-1], key)) for key, _ in sorts))
+            for row in rows:
+                yield row
+            if len(rows) < chunk_size:
+                return
+
+    def _get_collection_iter(self, context, model, dict_func, filters=None,
+                             fields=None, sorts=None, chunk_size=1000):
+        query = self._get_collection_query(context, model, filters=filters)
+        for c in self._iter_collection_query(query, model, sorts,
+                                             chunk_size):
+            yield dict_func(c, fields)
+
     def _get_collection_count(self, context, model, filters=None):
         return self._get_collection_query(context, model, filters).count()
 
     def _get_marker_obj(self, context, resource, limit, marker):
         if limit and marker:
+            # Opaque markers carry the sort key values of the last row of
+            # the previous page, there is no need to fetch it
+            marker_obj = sqlalchemyutils.decode_marker(marker)
+            if marker_obj is not None:
+                return marker_obj
             return getattr(self, '_get_%s' % resource)(context, marker)
         return None
 
@@ -154,6 +154,12 @@ class DbBasePluginCommon(common_db_mixin.CommonDbMixin):
                'address_scope_id': subnetpool['address_scope_id']}
         return self._fields(res, fields)
 
+    # Collections read when building every port and network dict
+    common_db_mixin.CommonDbMixin.register_loading_profile(
+        models_v2.Port, None, {'fixed_ips': 'subquery'})
+    common_db_mixin.CommonDbMixin.register_loading_profile(
+        models_v2.Network, None, {'subnets': 'subquery'})
+
     def _make_port_dict(self, port, fields=None,
                         process_extensions=True):
         res = {"id": port["id"],
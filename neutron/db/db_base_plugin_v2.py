@@ -94,6 +94,7 @@ class NeutronDbPluginV2(db_base_plugin_common.DbBasePluginCommon,
     __native_bulk_support = True
     __native_pagination_support = True
     __native_sorting_support = True
+    __native_streaming_support = True
 
     def __init__(self):
         self.set_ipam_backend()
@@ -1317,6 +1318,7 @@ class NeutronDbPluginV2(db_base_plugin_common.DbBasePluginCommon,
                 query = query.filter(IPAllocation.subnet_id.in_(subnet_ids))
 
         query = self._apply_filters_to_query(query, Port, filters, context)
+        query = self._apply_loading_profiles(query, Port)
         if limit and page_reverse and sorts:
             sorts = [(s[0], not s[1]) for s in sorts]
         query = sqlalchemyutils.paginate_query(query, Port, limit,
@@ -1331,17 +1333,26 @@ class NeutronDbPluginV2(db_base_plugin_common.DbBasePluginCommon,
                                       sorts=sorts, limit=limit,
                                       marker_obj=marker_obj,
                                       page_reverse=page_reverse)
-        items = []
-        for c in query:
-            if (('dns-integration' in self.supported_extension_aliases and
-                 'dns_name' in c)):
-                c['dns_assignment'] = self._get_dns_name_for_port_get(context,
-                                                                      c)
-            items.append(self._make_port_dict(c, fields))
+        items = [self._make_port_list_dict(context, c, fields)
+                 for c in query]
         if limit and page_reverse:
             items.reverse()
         return items
 
+    def get_ports_iter(self, context, filters=None, fields=None,
+                       sorts=None, chunk_size=1000):
+        query = self._get_ports_query(context, filters=filters)
+        for c in self._iter_collection_query(query, models_v2.Port, sorts,
+                                             chunk_size):
+            yield self._make_port_list_dict(context, c, fields)
+
+    def _make_port_list_dict(self, context, port, fields):
+        if (('dns-integration' in self.supported_extension_aliases and
+             'dns_name' in port)):
+            port['dns_assignment'] = self._get_dns_name_for_port_get(context,
+                                                                     port)
+        return self._make_port_dict(port, fields)
+
     def get_ports_count(self, context, filters=None):
         return self._get_ports_query(context, filters).count()
 
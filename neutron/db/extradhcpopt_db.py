@@ -151,3 +151,6 @@ class ExtraDhcpOptMixin(object):
 
     db_base_plugin_v2.NeutronDbPluginV2.register_dict_extend_funcs(
         attributes.PORTS, ['_extend_port_dict_extra_dhcp_opt'])
+    db_base_plugin_v2.NeutronDbPluginV2.register_loading_profile(
+        models_v2.Port, '_extend_port_dict_extra_dhcp_opt',
+        {'dhcp_opts': 'subquery'})
@@ -29,6 +29,7 @@ from neutron.db import ipam_backend_mixin
 from neutron.db import models_v2
 from neutron.ipam import requests as ipam_req
 from neutron.ipam import subnet_alloc
+from neutron.ipam import utils as ipam_utils
 
 LOG = logging.getLogger(__name__)
 
@@ -92,8 +93,10 @@ class IpamNonPluggableBackend(ipam_backend_mixin.IpamBackendMixin):
         the IPAllocationPools associated with the subnet that is updating,
         which will result in deleting the IPAvailabilityRange too.
         """
+        # Only the addresses are needed, loading full IPAllocation objects
+        # dominates the rebuild time on large subnets.
         ip_qry = context.session.query(
-            models_v2.IPAllocation).with_lockmode('update')
+            models_v2.IPAllocation.ip_address).with_lockmode('update')
         # PostgreSQL does not support select...for update with an outer join.
         # No join is needed here.
         pool_qry = context.session.query(
@@ -103,36 +106,26 @@ class IpamNonPluggableBackend(ipam_backend_mixin.IpamBackendMixin):
             LOG.debug("Rebuilding availability ranges for subnet %s",
                       subnet)
 
-            # Create a set of all currently allocated addresses
-            ip_qry_results = ip_qry.filter_by(subnet_id=subnet['id'])
-            allocations = netaddr.IPSet([netaddr.IPAddress(i['ip_address'])
-                                        for i in ip_qry_results])
+            # Build a sorted index of all currently allocated addresses,
+            # the free ranges of each pool are the gaps between them
+            allocations = sorted(set(
+                int(netaddr.IPAddress(ip_address))
+                for ip_address, in ip_qry.filter_by(subnet_id=subnet['id'])))
 
             for pool in pool_qry.filter_by(subnet_id=subnet['id']):
-                # Create a set of all addresses in the pool
-                poolset = netaddr.IPSet(netaddr.IPRange(pool['first_ip'],
-                                                        pool['last_ip']))
-
-                # Use set difference to find free addresses in the pool
-                available = poolset - allocations
-
-                # Generator compacts an ip set into contiguous ranges
-                def ipset_to_ranges(ipset):
-                    first, last = None, None
-                    for cidr in ipset.iter_cidrs():
-                        if last and last + 1 != cidr.first:
-                            yield netaddr.IPRange(first, last)
-                            first = None
-                        first, last = first if first else cidr.first, cidr.last
-                    if first:
-                        yield netaddr.IPRange(first, last)
+                first_ip = netaddr.IPAddress(pool['first_ip'])
+                last_ip = netaddr.IPAddress(pool['last_ip'])
+                free_ranges = ipam_utils.get_free_ranges(
+                    int(first_ip), int(last_ip), allocations)
 
                 # Write the ranges to the db
-                for ip_range in ipset_to_ranges(available):
+                for first, last in free_ranges:
                     available_range = models_v2.IPAvailabilityRange(
                         allocation_pool_id=pool['id'],
-                        first_ip=str(netaddr.IPAddress(ip_range.first)),
-                        last_ip=str(netaddr.IPAddress(ip_range.last)))
+                        first_ip=str(netaddr.IPAddress(first,
+                                                       first_ip.version)),
+                        last_ip=str(netaddr.IPAddress(last,
+                                                      first_ip.version)))
                     context.session.add(available_range)
 
     @staticmethod
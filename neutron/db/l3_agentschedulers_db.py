@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
 from oslo_config import cfg
 from oslo_db import exception as db_exc
 from oslo_log import log as logging
@@ -54,6 +56,14 @@ L3_AGENTS_SCHEDULER_OPTS = [
     cfg.BoolOpt('allow_automatic_l3agent_failover', default=False,
                 help=_('Automatically reschedule routers from offline L3 '
                        'agents to online L3 agents.')),
+    cfg.IntOpt('router_reschedule_batch_size', default=0,
+               help=_('When greater than 0, the routers of offline L3 '
+                      'agents are rescheduled together: their new agents '
+                      'are chosen in a single pass over the active agents '
+                      'and their load, the new bindings are committed in '
+                      'batches of this many routers, and each new agent '
+                      'is notified once about all of its added routers. '
+                      '0 reschedules the routers one at a time.')),
 ]
 
 cfg.CONF.register_opts(L3_AGENTS_SCHEDULER_OPTS)
@@ -109,8 +119,11 @@ class L3AgentSchedulerDbMixin(l3agentscheduler.L3AgentSchedulerPluginBase,
                       RouterL3AgentBinding.router_id).
             filter(sa.or_(l3_attrs_db.RouterExtraAttributes.ha == sql.false(),
                           l3_attrs_db.RouterExtraAttributes.ha == sql.null())))
+        bulk = cfg.CONF.router_reschedule_batch_size > 0
         try:
             agents_back_online = set()
+            # router id -> host of the down agent hosting it
+            down_routers = {}
             for binding in down_bindings:
                 if binding.l3_agent_id in agents_back_online:
                     continue
@@ -136,20 +149,105 @@ class L3AgentSchedulerDbMixin(l3agentscheduler.L3AgentSchedulerPluginBase,
                     {'router': binding.router_id,
                      'agent': binding.l3_agent_id,
                      'dead_time': agent_dead_limit})
-                try:
-                    self.reschedule_router(context, binding.router_id)
-                except (l3agentscheduler.RouterReschedulingFailed,
-                        oslo_messaging.RemoteError):
-                    # Catch individual router rescheduling errors here
-                    # so one broken one doesn't stop the iteration.
-                    LOG.exception(_LE("Failed to reschedule router %s"),
-                                  binding.router_id)
+                if bulk:
+                    down_routers[binding.router_id] = binding.l3_agent.host
+                    continue
+                self._reschedule_router_from_down_agent(context,
+                                                        binding.router_id)
+            if down_routers:
+                self._reschedule_routers_in_bulk(context, down_routers)
         except Exception:
             # we want to be thorough and catch whatever is raised
             # to avoid loop abortion
             LOG.exception(_LE("Exception encountered during router "
                               "rescheduling."))
 
+    def _reschedule_router_from_down_agent(self, context, router_id):
+        try:
+            self.reschedule_router(context, router_id)
+        except (l3agentscheduler.RouterReschedulingFailed,
+                oslo_messaging.RemoteError):
+            # Catch individual router rescheduling errors here
+            # so one broken one doesn't stop the iteration.
+            LOG.exception(_LE("Failed to reschedule router %s"), router_id)
+
+    def _reschedule_routers_in_bulk(self, context, down_routers):
+        """Reschedule the routers of down agents together.
+
+        :param down_routers: a dict mapping the ids of the routers to
+                             reschedule to the host of their down agent
+        """
+        routers = self.get_routers(context,
+                                   filters={'id': list(down_routers)})
+        planned = {}
+        if self.router_scheduler:
+            planned = self.router_scheduler.plan_routers(self, context,
+                                                         routers)
+        # Routers which could not be planned, such as distributed ones, go
+        # through the regular rescheduling
+        for router in routers:
+            if router['id'] not in planned:
+                self._reschedule_router_from_down_agent(context,
+                                                        router['id'])
+
+        batch_size = cfg.CONF.router_reschedule_batch_size
+        router_ids = list(planned)
+        # new agent id -> routers bound to it
+        added = collections.defaultdict(list)
+        for index in range(0, len(router_ids), batch_size):
+            batch = router_ids[index:index + batch_size]
+            try:
+                self._rebind_routers(context, batch, planned)
+            except db_exc.DBError:
+                LOG.exception(_LE("Failed to reschedule routers %s"), batch)
+                continue
+            for router_id in batch:
+                added[planned[router_id]['id']].append(router_id)
+
+        l3_notifier = self.agent_notifiers.get(constants.AGENT_TYPE_L3)
+        if not l3_notifier:
+            return
+        for agent_id, agent_router_ids in six.iteritems(added):
+            for router_id in agent_router_ids:
+                l3_notifier.router_removed_from_agent(
+                    context, router_id, down_routers[router_id])
+            self._notify_agent_routers_added(
+                context, planned[agent_router_ids[0]], agent_router_ids)
+
+    def _rebind_routers(self, context, router_ids, planned):
+        """Move routers from their current agents to the planned ones."""
+        with context.session.begin(subtransactions=True):
+            query = context.session.query(RouterL3AgentBinding)
+            query = query.filter(
+                RouterL3AgentBinding.router_id.in_(router_ids))
+            query.delete(synchronize_session=False)
+            for router_id in router_ids:
+                context.session.add(RouterL3AgentBinding(
+                    router_id=router_id,
+                    l3_agent_id=planned[router_id]['id']))
+
+    def _notify_agent_routers_added(self, context, agent, router_ids):
+        l3_notifier = self.agent_notifiers.get(constants.AGENT_TYPE_L3)
+        # Need to make sure the agent is notified or unschedule otherwise
+        for attempt in range(AGENT_NOTIFY_MAX_ATTEMPTS):
+            try:
+                l3_notifier.router_added_to_agent(
+                    context, router_ids, agent['host'])
+                return
+            except oslo_messaging.MessagingException:
+                LOG.warning(_LW('Failed to notify L3 agent on host '
+                                '%(host)s about added routers. Attempt '
+                                '%(attempt)d out of %(max_attempts)d'),
+                            {'host': agent['host'], 'attempt': attempt + 1,
+                             'max_attempts': AGENT_NOTIFY_MAX_ATTEMPTS})
+        with context.session.begin(subtransactions=True):
+            query = context.session.query(RouterL3AgentBinding)
+            query = query.filter(
+                RouterL3AgentBinding.router_id.in_(router_ids),
+                RouterL3AgentBinding.l3_agent_id == agent['id'])
+            query.delete(synchronize_session=False)
+        LOG.error(_LE("Failed to reschedule routers %s"), router_ids)
+
     def _get_agent_mode(self, agent_db):
         agent_conf = self.get_configuration_dict(agent_db)
         return agent_conf.get(constants.L3_AGENT_MODE,
@@ -405,7 +503,8 @@ class L3AgentSchedulerDbMixin(l3agentscheduler.L3AgentSchedulerPluginBase,
             l3_agents = [l3_agent for l3_agent in
                          l3_agents if not
                          agents_db.AgentDbMixin.is_agent_down(
-                             l3_agent['heartbeat_timestamp'])]
+                             agents_db.AgentDbMixin.get_agent_heartbeat(
+                                 l3_agent))]
         return l3_agents
 
     def _get_l3_bindings_hosting_routers(self, context, router_ids):
@@ -552,6 +651,21 @@ class L3AgentSchedulerDbMixin(l3agentscheduler.L3AgentSchedulerPluginBase,
         res = query.filter(agents_db.Agent.id.in_(agent_ids)).first()
         return res[0]
 
+    def get_l3_agents_router_counts(self, context, agent_ids):
+        """Return a dict mapping l3 agent ids to their number of routers.
+
+        Agents hosting no router are not in the returned dict.
+        """
+        if not agent_ids:
+            return {}
+        query = context.session.query(
+            RouterL3AgentBinding.l3_agent_id,
+            func.count(RouterL3AgentBinding.router_id))
+        query = query.filter(
+            RouterL3AgentBinding.l3_agent_id.in_(agent_ids)).group_by(
+                RouterL3AgentBinding.l3_agent_id)
+        return dict(query)
+
     def get_hosts_to_notify(self, context, router_id):
         """Returns all hosts to send notification about router update"""
         state = agentschedulers_db.get_admin_state_up_filter()
@@ -13,6 +13,8 @@
 # under the License.
 #
 
+import random
+
 import netaddr
 from oslo_config import cfg
 from oslo_db import exception as db_exc
@@ -189,6 +191,10 @@ class L3_HA_NAT_db_mixin(l3_dvr_db.L3_NAT_with_dvr_db_mixin,
         return allocated_vr_ids
 
     def _allocate_vr_id(self, context, network_id, router_id):
+        # NOTE: Concurrent router creations for a single tenant all read the
+        # same set of allocated VRIDs. Picking the lowest free one makes every
+        # worker race for the very same row, so pick a random free VRID to
+        # spread the candidates and keep conflicts (and retries) rare.
         for count in range(MAX_ALLOCATION_TRIES):
             try:
                 # NOTE(kevinbenton): we disallow subtransactions because the
@@ -203,7 +209,7 @@ class L3_HA_NAT_db_mixin(l3_dvr_db.L3_NAT_with_dvr_db_mixin,
 
                     allocation = L3HARouterVRIdAllocation()
                     allocation.network_id = network_id
-                    allocation.vr_id = available_vr_ids.pop()
+                    allocation.vr_id = random.choice(sorted(available_vr_ids))
 
                     context.session.add(allocation)
 
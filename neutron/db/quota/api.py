@@ -121,6 +121,41 @@ def set_quota_usage(context, resource, tenant_id,
                           usage_data.dirty)
 
 
+def update_quota_usage_in_use(context, resource, tenant_id, delta):
+    """Atomically add a delta to the quota usage of a resource.
+
+    :param resource: a resource for which quota usage if tracked
+    :param tenant_id: tenant identifier
+    :param delta: the number of resources created, negative if resources
+                  were removed
+    :returns: 1 if the quota usage data were updated, 0 otherwise.
+    """
+    query = common_db_api.model_query(context, quota_models.QuotaUsage)
+    query = query.filter_by(resource=resource).filter_by(tenant_id=tenant_id)
+    return query.update(
+        {'in_use': quota_models.QuotaUsage.in_use + delta},
+        synchronize_session=False)
+
+
+def set_quota_usage_if_unchanged(context, resource, tenant_id, in_use,
+                                 expected_in_use):
+    """Set the quota usage of a resource unless it changed meanwhile.
+
+    The usage is only set if it is not dirty and still amounts to the
+    expected value, so that concurrent updates are not overwritten.
+
+    :param resource: a resource for which quota usage if tracked
+    :param tenant_id: tenant identifier
+    :param in_use: the new quantity of used resources
+    :param expected_in_use: the quantity of used resources read previously
+    :returns: 1 if the quota usage data were updated, 0 otherwise.
+    """
+    query = common_db_api.model_query(context, quota_models.QuotaUsage)
+    query = query.filter_by(resource=resource, tenant_id=tenant_id,
+                            in_use=expected_in_use, dirty=False)
+    return query.update({'in_use': in_use}, synchronize_session=False)
+
+
 def set_quota_usage_dirty(context, resource, tenant_id, dirty=True):
     """Set quota usage dirty bit for a given resource and tenant.
 
@@ -651,6 +651,9 @@ class SecurityGroupDbMixin(ext_sg.SecurityGroupPluginBase):
     # Register dict extend functions for ports
     db_base_plugin_v2.NeutronDbPluginV2.register_dict_extend_funcs(
         attributes.PORTS, ['_extend_port_dict_security_group'])
+    db_base_plugin_v2.NeutronDbPluginV2.register_loading_profile(
+        models_v2.Port, '_extend_port_dict_security_group',
+        {'security_groups': 'subquery'})
 
     def _process_port_create_security_group(self, context, port,
                                             security_group_ids):
@@ -13,6 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import base64
+
+from oslo_serialization import jsonutils
+import six
 from six import moves
 import sqlalchemy
 from sqlalchemy.orm import properties
@@ -21,6 +25,50 @@ from neutron._i18n import _
 from neutron.common import exceptions as n_exc
 
 
+class KeysetMarker(object):
+    """Pagination marker carrying the sort key values of the last row.
+
+    It can be passed to paginate_query in place of the marker object, which
+    then does not need to be loaded from the database.
+    """
+
+    def __init__(self, values):
+        self.__dict__.update(values)
+
+
+def _is_cursor_value(value):
+    return value is None or isinstance(
+        value, (bool, float) + six.integer_types + six.string_types)
+
+
+def encode_marker(item, sort_keys):
+    """Return an opaque marker for the sort key values of an item.
+
+    None is returned when the values cannot be safely round-tripped, in
+    which case the item id should be used as marker.
+    """
+    try:
+        values = dict((key, item[key]) for key in sort_keys)
+    except KeyError:
+        return None
+    if not all(_is_cursor_value(v) for v in values.values()):
+        return None
+    return base64.urlsafe_b64encode(
+        jsonutils.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_marker(marker):
+    """Return a KeysetMarker for an opaque marker, None for other markers."""
+    try:
+        values = jsonutils.loads(
+            base64.urlsafe_b64decode(str(marker)).decode('utf-8'))
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(values, dict):
+        return None
+    return KeysetMarker(values)
+
+
 def paginate_query(query, model, limit, sorts, marker_obj=None):
     """Returns a query with sorting / pagination criteria added.
 
@@ -79,7 +127,12 @@ def paginate_query(query, model, limit, sorts, marker_obj=None):
 
     # Add pagination
     if marker_obj:
-        marker_values = [getattr(marker_obj, sort[0]) for sort in sorts]
+        try:
+            marker_values = [getattr(marker_obj, sort[0]) for sort in sorts]
+        except AttributeError:
+            # Only possible with a KeysetMarker built for different sorts
+            msg = _("The marker does not match the requested sort keys")
+            raise n_exc.BadRequest(resource=model.__tablename__, msg=msg)
 
         # Build up an array of sort criteria as in the docstring
         criteria_list = []
@@ -97,6 +150,16 @@ def paginate_query(query, model, limit, sorts, marker_obj=None):
 
         f = sqlalchemy.sql.or_(*criteria_list)
         query = query.filter(f)
+        # NOTE: the OR of the criteria above does not let the database use
+        # an index on the sort keys; bounding the first sort key as well
+        # turns the lookup into a range scan which costs the same for any
+        # page.
+        if len(sorts) > 1 and marker_values[0] is not None:
+            first_attr = getattr(model, sorts[0][0])
+            if sorts[0][1]:
+                query = query.filter(first_attr >= marker_values[0])
+            else:
+                query = query.filter(first_attr <= marker_values[0])
 
     if limit:
         query = query.limit(limit)
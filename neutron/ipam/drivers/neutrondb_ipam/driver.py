@@ -13,14 +13,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import itertools
+import random
+
 import netaddr
+from oslo_config import cfg
 from oslo_db import exception as db_exc
 from oslo_log import log
 from oslo_utils import uuidutils
+import six
 
 from neutron._i18n import _LE
 from neutron.common import exceptions as n_exc
-from neutron.common import ipv6_utils
 from neutron.db import api as db_api
 from neutron.ipam import driver as ipam_base
 from neutron.ipam.drivers.neutrondb_ipam import db_api as ipam_db_api
@@ -33,15 +37,18 @@ from neutron import manager
 
 LOG = log.getLogger(__name__)
 
+MAX_ALLOCATION_TRIES = 10
+
 
 class NeutronDbSubnet(ipam_base.Subnet):
     """Manage IP addresses for Neutron DB IPAM driver.
 
     This class implements the strategy for IP address allocation and
     deallocation for the Neutron DB IPAM driver.
-    Allocation for IP addresses is based on the concept of availability
-    ranges, which were already used in Neutron's DB base class for handling
-    IPAM operations.
+    IP addresses are generated from the allocation pools minus the
+    addresses which are already allocated, and the uniqueness of the
+    allocations is enforced by the database rather than by locking the
+    subnet.
     """
 
     @classmethod
@@ -72,7 +79,7 @@ class NeutronDbSubnet(ipam_base.Subnet):
                                               subnet_request.gateway_ip)
         else:
             pools = subnet_request.allocation_pools
-        # Create IPAM allocation pools and availability ranges
+        # Create IPAM allocation pools
         cls.create_allocation_pools(subnet_manager, session, pools,
                                     subnet_request.subnet_cidr)
 
@@ -154,175 +161,114 @@ class NeutronDbSubnet(ipam_base.Subnet):
                 subnet_id=self.subnet_manager.neutron_id,
                 ip=ip_address)
 
-    def _allocate_specific_ip(self, session, ip_address,
-                              allocation_pool_id=None,
-                              auto_generated=False):
-        """Remove an IP address from subnet's availability ranges.
+    @staticmethod
+    def _sample_pool(first, last, count):
+        """Return up to count distinct random addresses of a pool.
 
-        This method is supposed to be called from within a database
-        transaction, otherwise atomicity and integrity might not be
-        enforced and the operation might result in incosistent availability
-        ranges for the subnet.
+        A count of 1 always returns the first address of the pool, so that
+        the lowest free address is allocated.
 
-        :param session: database session
-        :param ip_address: ip address to mark as allocated
-        :param allocation_pool_id: identifier of the allocation pool from
-             which the ip address has been extracted. If not specified this
-             routine will scan all allocation pools.
-        :param auto_generated: indicates whether ip was auto generated
-        :returns: list of IP ranges as instances of IPAvailabilityRange
+        :param first: first address of the pool, as an integer
+        :param last: last address of the pool, as an integer
+        :returns: a set of integers, all the addresses of the pool if it
+            does not have more than count of them
         """
-        # Return immediately for EUI-64 addresses. For this
-        # class of subnets availability ranges do not apply
-        if ipv6_utils.is_eui64_address(ip_address):
-            return
-
-        LOG.debug("Removing %(ip_address)s from availability ranges for "
-                  "subnet id:%(subnet_id)s",
-                  {'ip_address': ip_address,
-                   'subnet_id': self.subnet_manager.neutron_id})
-        # Netaddr's IPRange and IPSet objects work very well even with very
-        # large subnets, including IPv6 ones.
-        final_ranges = []
-        ip_in_pools = False
-        if allocation_pool_id:
-            av_ranges = self.subnet_manager.list_ranges_by_allocation_pool(
-                session, allocation_pool_id)
-        else:
-            av_ranges = self.subnet_manager.list_ranges_by_subnet_id(session)
-        for db_range in av_ranges:
-            initial_ip_set = netaddr.IPSet(netaddr.IPRange(
-                db_range['first_ip'], db_range['last_ip']))
-            final_ip_set = initial_ip_set - netaddr.IPSet([ip_address])
-            if not final_ip_set:
-                ip_in_pools = True
-                # Range exhausted - bye bye
-                if not self.subnet_manager.delete_range(session, db_range):
-                    raise db_exc.RetryRequest(ipam_exc.IPAllocationFailed)
-                continue
-            if initial_ip_set == final_ip_set:
-                # IP address does not fall within the current range, move
-                # to the next one
-                final_ranges.append(db_range)
-                continue
-            ip_in_pools = True
-            for new_range in final_ip_set.iter_ipranges():
-                # store new range in database
-                # use netaddr.IPAddress format() method which is equivalent
-                # to str(...) but also enables us to use different
-                # representation formats (if needed) for IPv6.
-                first_ip = netaddr.IPAddress(new_range.first)
-                last_ip = netaddr.IPAddress(new_range.last)
-                if (db_range['first_ip'] == first_ip.format() or
-                        db_range['last_ip'] == last_ip.format()):
-                    rows = self.subnet_manager.update_range(
-                        session, db_range, first_ip=first_ip, last_ip=last_ip)
-                    if not rows:
-                        raise db_exc.RetryRequest(ipam_exc.IPAllocationFailed)
-                    LOG.debug("Adjusted availability range for pool %s",
-                              db_range['allocation_pool_id'])
-                    final_ranges.append(db_range)
-                else:
-                    new_ip_range = self.subnet_manager.create_range(
-                        session,
-                        db_range['allocation_pool_id'],
-                        first_ip.format(),
-                        last_ip.format())
-                    LOG.debug("Created availability range for pool %s",
-                              new_ip_range['allocation_pool_id'])
-                    final_ranges.append(new_ip_range)
-
-        # If ip is autogenerated it should be present in allocation pools,
-        # so retry if it is not there
-        if auto_generated and not ip_in_pools:
-            raise db_exc.RetryRequest(ipam_exc.IPAllocationFailed)
-        # Most callers might ignore this return value, which is however
-        # useful for testing purposes
-        LOG.debug("Availability ranges for subnet id %(subnet_id)s "
-                  "modified: %(new_ranges)s",
-                  {'subnet_id': self.subnet_manager.neutron_id,
-                   'new_ranges': ", ".join(["[%s; %s]" %
-                                            (r['first_ip'], r['last_ip']) for
-                                            r in final_ranges])})
-        return final_ranges
-
-    def _rebuild_availability_ranges(self, session):
-        """Rebuild availability ranges.
-
-        This method should be called only when the availability ranges are
-        exhausted or when the subnet's allocation pools are updated,
-        which may trigger a deletion of the availability ranges.
-
-        For this operation to complete successfully, this method uses a
-        locking query to ensure that no IP is allocated while the regeneration
-        of availability ranges is in progress.
-
-        :param session: database session
+        if count == 1:
+            return set([first])
+        if last - first < count:
+            return set(six.moves.range(first, last + 1))
+        sample = set()
+        while len(sample) < count:
+            sample.add(random.randint(first, last))
+        return sample
+
+    def _get_free_ips(self, session, pool, skip_ips, count):
+        """Return up to count free addresses of an allocation pool.
+
+        Only a random sample of count addresses of the pool is looked up in
+        the allocations, so the cost does not grow with the number of
+        allocated addresses. The allocations of the subnet are only loaded
+        when none of the sampled addresses is free, which only happens
+        frequently once the pool is nearly exhausted.
         """
-        # List all currently allocated addresses, and prevent further
-        # allocations with a write-intent lock.
-        # NOTE: because of this driver's logic the write intent lock is
-        # probably unnecessary as this routine is called when the availability
-        # ranges for a subnet are exhausted and no further address can be
-        # allocated.
-        # TODO(salv-orlando): devise, if possible, a more efficient solution
-        # for building the IPSet to ensure decent performances even with very
-        # large subnets.
+        first_ip = netaddr.IPAddress(pool['first_ip'])
+        last_ip = netaddr.IPAddress(pool['last_ip'])
+        sample = self._sample_pool(int(first_ip), int(last_ip), count)
+        candidates = set(netaddr.IPAddress(ip, first_ip.version).format()
+                         for ip in sample) - skip_ips
+        if candidates:
+            candidates -= self.subnet_manager.list_allocated_ips(session,
+                                                                 candidates)
+        if candidates or len(sample) > int(last_ip) - int(first_ip):
+            # Either free addresses were found or the whole pool was checked
+            return candidates
+
         allocations = netaddr.IPSet(
             [netaddr.IPAddress(allocation['ip_address']) for
-             allocation in self.subnet_manager.list_allocations(
-                 session)])
-
-        # MEH MEH
-        # There should be no need to set a write intent lock on the allocation
-        # pool table. Indeed it is not important for the correctness of this
-        # operation if the allocation pools are updated by another operation,
-        # which will result in the generation of new availability ranges.
-        # NOTE: it might be argued that an allocation pool update should in
-        # theory preempt rebuilding the availability range. This is an option
-        # to consider for future developments.
-        LOG.debug("Rebuilding availability ranges for subnet %s",
-                  self.subnet_manager.neutron_id)
+             allocation in self.subnet_manager.list_allocations(session)])
+        allocations.update(
+            [netaddr.IPAddress(ip_address) for ip_address in skip_ips])
+        available = netaddr.IPSet(netaddr.IPRange(first_ip,
+                                                  last_ip)) - allocations
+        return set(ip.format() for ip in itertools.islice(available, count))
+
+    def _generate_ip(self, session, skip_ips=None):
+        """Pick a free IP address from the subnet's allocation pools.
+
+        Up to ipam_allocation_window free addresses of the first pool which
+        is not exhausted are randomly picked, and one of them is chosen.
+        Spreading concurrent requests over the pool makes them unlikely to
+        collide on the same address. With a window of 1, the lowest free
+        address of the pool is returned.
 
+        :param session: database session
+        :param skip_ips: addresses known to be taken even if they are not
+            visible yet to the current transaction
+        :returns: a tuple with the IP address and its allocation pool id
+        :raises: IpAddressGenerationFailure if all pools are exhausted
+        """
+        skip_ips = set(skip_ips or [])
+        window = cfg.CONF.ipam_allocation_window
         for pool in self.subnet_manager.list_pools(session):
-            # Create a set of all addresses in the pool
-            poolset = netaddr.IPSet(netaddr.IPRange(pool['first_ip'],
-                                                    pool['last_ip']))
-            # Use set difference to find free addresses in the pool
-            available = poolset - allocations
-            # Write the ranges to the db
-            for ip_range in available.iter_ipranges():
-                av_range = self.subnet_manager.create_range(
-                    session,
-                    pool['id'],
-                    netaddr.IPAddress(ip_range.first).format(),
-                    netaddr.IPAddress(ip_range.last).format())
-                session.add(av_range)
-
-    def _generate_ip(self, session):
-        try:
-            return self._try_generate_ip(session)
-        except ipam_exc.IpAddressGenerationFailure:
-            self._rebuild_availability_ranges(session)
-
-        return self._try_generate_ip(session)
-
-    def _try_generate_ip(self, session):
-        """Generate an IP address from availability ranges."""
-        ip_range = self.subnet_manager.get_first_range(session)
-        if not ip_range:
-            LOG.debug("All IPs from subnet %(subnet_id)s allocated",
-                      {'subnet_id': self.subnet_manager.neutron_id})
-            raise ipam_exc.IpAddressGenerationFailure(
-                subnet_id=self.subnet_manager.neutron_id)
-        # A suitable range was found. Return IP address.
-        ip_address = ip_range['first_ip']
-        LOG.debug("Allocated IP - %(ip_address)s from range "
-                  "[%(first_ip)s; %(last_ip)s]",
-                  {'ip_address': ip_address,
-                   'first_ip': ip_address,
-                   'last_ip': ip_range['last_ip']})
-        return ip_address, ip_range['allocation_pool_id']
+            candidates = self._get_free_ips(session, pool, skip_ips, window)
+            if not candidates:
+                continue
+            candidates = sorted(candidates, key=netaddr.IPAddress)
+            ip_address = (candidates[0] if window == 1 else
+                          random.choice(candidates))
+            LOG.debug("Generated IP %(ip_address)s from pool "
+                      "[%(first_ip)s; %(last_ip)s]",
+                      {'ip_address': ip_address,
+                       'first_ip': pool['first_ip'],
+                       'last_ip': pool['last_ip']})
+            return ip_address, pool['id']
+        LOG.debug("All IPs from subnet %(subnet_id)s allocated",
+                  {'subnet_id': self.subnet_manager.neutron_id})
+        raise ipam_exc.IpAddressGenerationFailure(
+            subnet_id=self.subnet_manager.neutron_id)
+
+    def _allocate_any_ip(self, session):
+        """Generate and allocate an IP address without locking the subnet.
+
+        The allocation entry is inserted in a nested transaction, so that the
+        primary key of the allocations table acts as a compare and swap: if a
+        concurrent request already took the generated address, only the
+        insert is rolled back and another address is tried.
+        """
+        conflicts = set()
+        for attempt in range(MAX_ALLOCATION_TRIES):
+            ip_address = self._generate_ip(session, conflicts)[0]
+            try:
+                with session.begin_nested():
+                    self.subnet_manager.create_allocation(session, ip_address)
+                return ip_address
+            except db_exc.DBDuplicateEntry:
+                LOG.debug("IP %(ip_address)s on subnet %(subnet_id)s was "
+                          "allocated concurrently, trying another address",
+                          {'ip_address': ip_address,
+                           'subnet_id': self.subnet_manager.neutron_id})
+                conflicts.add(ip_address)
+        raise db_exc.RetryRequest(ipam_exc.IPAllocationFailed)
 
     def allocate(self, address_request):
         # NOTE(salv-orlando): Creating a new db session might be a rather
@@ -332,22 +278,16 @@ class NeutronDbSubnet(ipam_base.Subnet):
         # practice since in the general case these drivers may interact
         # with remote backends
         session = self._context.session
-        all_pool_id = None
-        auto_generated = False
         with db_api.autonested_transaction(session):
             # NOTE(salv-orlando): It would probably better to have a simpler
             # model for address requests and just check whether there is a
             # specific IP address specified in address_request
-            if isinstance(address_request, ipam_req.SpecificAddressRequest):
-                # This handles both specific and automatic address requests
-                # Check availability of requested IP
-                ip_address = str(address_request.address)
-                self._verify_ip(session, ip_address)
-            else:
-                ip_address, all_pool_id = self._generate_ip(session)
-                auto_generated = True
-            self._allocate_specific_ip(session, ip_address, all_pool_id,
-                                       auto_generated)
+            if not isinstance(address_request,
+                              ipam_req.SpecificAddressRequest):
+                return self._allocate_any_ip(session)
+            # Check availability of requested IP
+            ip_address = str(address_request.address)
+            self._verify_ip(session, ip_address)
             # Create IP allocation request object
             # The only defined status at this stage is 'ALLOCATED'.
             # More states will be available in the future - e.g.: RECYCLABLE
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import bisect
 import math
 import operator
 
@@ -41,20 +42,27 @@ class SubnetAllocator(driver.Pool):
         super(SubnetAllocator, self).__init__(subnetpool, context)
         self._sp_helper = SubnetPoolHelper()
 
-    def _lock_subnetpool(self):
-        """Lock subnetpool associated row.
-
-        This method disallows to allocate concurrently 2 subnets in the same
-        subnetpool, it's required to ensure non-overlapping cidrs in the same
-        subnetpool.
-        """
-
+    def _get_subnetpool_hash(self):
+        """Return the current hash of the subnetpool row."""
         current_hash = (self._context.session.query(models_v2.SubnetPool.hash)
                         .filter_by(id=self._subnetpool['id']).scalar())
         if current_hash is None:
             # NOTE(cbrandily): subnetpool has been deleted
             raise n_exc.SubnetPoolNotFound(
                 subnetpool_id=self._subnetpool['id'])
+        return current_hash
+
+    def _lock_subnetpool(self, current_hash):
+        """Lock subnetpool associated row.
+
+        This method disallows to allocate concurrently 2 subnets in the same
+        subnetpool, it's required to ensure non-overlapping cidrs in the same
+        subnetpool.
+
+        The allocation is computed before calling this method: the update
+        only succeeds if the subnetpool has not changed since current_hash
+        was read, so the row lock is held from this point on only.
+        """
         new_hash = uuidutils.generate_uuid()
 
         # NOTE(cbrandily): the update disallows 2 concurrent subnet allocation
@@ -68,21 +76,46 @@ class SubnetAllocator(driver.Pool):
                                       subnet_pool_id=self._subnetpool['id']))
 
     def _get_allocated_cidrs(self):
-        query = self._context.session.query(models_v2.Subnet)
+        query = self._context.session.query(models_v2.Subnet.cidr)
         subnets = query.filter_by(subnetpool_id=self._subnetpool['id'])
         return (x.cidr for x in subnets)
 
     def _get_available_prefix_list(self):
-        prefixes = (x.cidr for x in self._subnetpool.prefixes)
-        allocations = self._get_allocated_cidrs()
-        prefix_set = netaddr.IPSet(iterable=prefixes)
-        allocation_set = netaddr.IPSet(iterable=allocations)
-        available_set = prefix_set.difference(allocation_set)
-        available_set.compact()
-        return sorted(available_set.iter_cidrs(),
+        """Return the free prefixes of the pool, most specific first.
+
+        The allocated cidrs are sorted by their first address, and the gaps
+        between the allocations falling in each prefix of the pool are
+        decomposed into cidrs. This is much cheaper than IPSet arithmetic
+        on pools holding a large number of subnets.
+        """
+        prefixes = netaddr.cidr_merge(
+            [x.cidr for x in self._subnetpool.prefixes])
+        allocations = sorted(
+            (net.first, net.last) for net in
+            (netaddr.IPNetwork(cidr) for cidr in self._get_allocated_cidrs()))
+        firsts = [first for first, last in allocations]
+        available = []
+        for prefix in prefixes:
+            start = prefix.first
+            lo = bisect.bisect_left(firsts, prefix.first)
+            hi = bisect.bisect_right(firsts, prefix.last)
+            for first, last in allocations[lo:hi]:
+                if first > start:
+                    available.extend(self._range_to_cidrs(
+                        start, first - 1, prefix.version))
+                start = max(start, last + 1)
+            if start <= prefix.last:
+                available.extend(self._range_to_cidrs(
+                    start, prefix.last, prefix.version))
+        return sorted(available,
                       key=operator.attrgetter('prefixlen'),
                       reverse=True)
 
+    @staticmethod
+    def _range_to_cidrs(first, last, ip_version):
+        return netaddr.iprange_to_cidrs(netaddr.IPAddress(first, ip_version),
+                                        netaddr.IPAddress(last, ip_version))
+
     def _num_quota_units_in_prefixlen(self, prefixlen, quota_unit):
         return math.pow(2, quota_unit - prefixlen)
 
@@ -90,7 +123,7 @@ class SubnetAllocator(driver.Pool):
         subnetpool_id = self._subnetpool['id']
         tenant_id = self._subnetpool['tenant_id']
         with self._context.session.begin(subtransactions=True):
-            qry = self._context.session.query(models_v2.Subnet)
+            qry = self._context.session.query(models_v2.Subnet.cidr)
             allocations = qry.filter_by(subnetpool_id=subnetpool_id,
                                         tenant_id=tenant_id)
             value = 0
@@ -115,12 +148,13 @@ class SubnetAllocator(driver.Pool):
 
     def _allocate_any_subnet(self, request):
         with self._context.session.begin(subtransactions=True):
-            self._lock_subnetpool()
+            current_hash = self._get_subnetpool_hash()
             self._check_subnetpool_tenant_quota(request.tenant_id,
                                                 request.prefixlen)
             prefix_pool = self._get_available_prefix_list()
             for prefix in prefix_pool:
                 if request.prefixlen >= prefix.prefixlen:
+                    self._lock_subnetpool(current_hash)
                     subnet = next(prefix.subnet(request.prefixlen))
                     gateway_ip = request.gateway_ip
                     if not gateway_ip:
@@ -139,13 +173,14 @@ class SubnetAllocator(driver.Pool):
 
     def _allocate_specific_subnet(self, request):
         with self._context.session.begin(subtransactions=True):
-            self._lock_subnetpool()
+            current_hash = self._get_subnetpool_hash()
             self._check_subnetpool_tenant_quota(request.tenant_id,
                                                 request.prefixlen)
             cidr = request.subnet_cidr
             available = self._get_available_prefix_list()
             matched = netaddr.all_matching_cidrs(cidr, available)
             if len(matched) is 1 and matched[0].prefixlen <= cidr.prefixlen:
+                self._lock_subnetpool(current_hash)
                 return IpamSubnet(request.tenant_id,
                                   request.subnet_id,
                                   cidr,
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import bisect
+
 import netaddr
 
 
@@ -59,3 +61,30 @@ def generate_pools(cidr, gateway_ip):
     if gateway_ip:
         ipset.remove(netaddr.IPAddress(gateway_ip, ip_version))
     return list(ipset.iter_ipranges())
+
+
+def get_free_ranges(first, last, allocations):
+    """Compute the free ranges of a pool of addresses.
+
+    Rather than expanding the pool into a set of addresses, the sorted
+    allocations falling within the pool are walked and the gaps between them
+    are returned, so the cost only depends on the number of allocations and
+    not on the size of the pool.
+
+    :param first: integer value of the first address of the pool
+    :param last: integer value of the last address of the pool
+    :param allocations: sorted list of the integer values of the allocated
+        addresses, without duplicates
+    :returns: list of (first, last) tuples with the integer values of the
+        free ranges, in ascending order
+    """
+    ranges = []
+    start = bisect.bisect_left(allocations, first)
+    end = bisect.bisect_right(allocations, last)
+    for ip in allocations[start:end]:
+        if ip > first:
+            ranges.append((first, ip - 1))
+        first = ip + 1
+    if first <= last:
+        ranges.append((first, last))
+    return ranges
@@ -13,6 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
+import eventlet
 from keystoneauth1 import loading as ks_loading
 from novaclient import client as nova_client
 from novaclient import exceptions as nova_exceptions
@@ -37,6 +40,8 @@ NEUTRON_NOVA_EVENT_STATUS_MAP = {constants.PORT_STATUS_ACTIVE: 'completed',
                                  constants.PORT_STATUS_ERROR: 'failed',
                                  constants.PORT_STATUS_DOWN: 'completed'}
 NOVA_API_VERSION = "2"
+# maximum number of requests concurrently sending chunks of events
+MAX_CONCURRENT_EVENT_SENDS = 4
 
 
 class Notifier(object):
@@ -202,34 +207,97 @@ class Notifier(object):
         self.batch_notifier.queue_event(event)
         port._notify_event = None
 
+    @staticmethod
+    def _coalesce_events(events):
+        """Collapse the events about the same server, port and event name.
+
+        Only the last of these events, which carries the final status of the
+        port, is kept, at the position of its last occurrence.
+        """
+        coalesced = collections.OrderedDict()
+        for event in events:
+            key = (event['server_uuid'], event.get('tag'), event['name'])
+            coalesced.pop(key, None)
+            coalesced[key] = event
+        return list(coalesced.values())
+
+    @staticmethod
+    def _chunk_events(events, chunk_size):
+        """Split events into chunks of about chunk_size events.
+
+        All the events about a server are kept in the same chunk, in their
+        original order, so that concurrent chunks never race on a server.
+        A chunk only exceeds chunk_size if a single server has more events.
+        """
+        events_by_server = collections.OrderedDict()
+        for event in events:
+            events_by_server.setdefault(event['server_uuid'], []).append(event)
+        chunks = []
+        chunk = []
+        for server_events in events_by_server.values():
+            if chunk and len(chunk) + len(server_events) > chunk_size:
+                chunks.append(chunk)
+                chunk = []
+            chunk.extend(server_events)
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
     def send_events(self, batched_events):
+        events = self._coalesce_events(batched_events)
+        if len(events) < len(batched_events):
+            LOG.debug("Coalesced %(total)d events into %(count)d",
+                      {'total': len(batched_events), 'count': len(events)})
+        chunk_size = cfg.CONF.send_events_chunk_size
+        if chunk_size <= 0 or len(events) <= chunk_size:
+            self._send_events(events)
+            return
+        pool = eventlet.GreenPool(MAX_CONCURRENT_EVENT_SENDS)
+        for chunk in self._chunk_events(events, chunk_size):
+            pool.spawn_n(self._send_events, chunk)
+        pool.waitall()
+
+    def _send_events(self, batched_events):
         LOG.debug("Sending events: %s", batched_events)
-        try:
-            response = self.nclient.server_external_events.create(
-                batched_events)
-        except nova_exceptions.NotFound:
-            LOG.warning(_LW("Nova returned NotFound for event: %s"),
-                        batched_events)
-        except Exception:
-            LOG.exception(_LE("Failed to notify nova on events: %s"),
-                          batched_events)
-        else:
-            if not isinstance(response, list):
-                LOG.error(_LE("Error response returned from nova: %s"),
-                          response)
+        retries = cfg.CONF.send_events_retries
+        for attempt in range(retries + 1):
+            try:
+                response = self.nclient.server_external_events.create(
+                    batched_events)
+                break
+            except nova_exceptions.NotFound:
+                LOG.warning(_LW("Nova returned NotFound for event: %s"),
+                            batched_events)
                 return
-            response_error = False
-            for event in response:
-                try:
-                    code = event['code']
-                except KeyError:
-                    response_error = True
+            except Exception:
+                if attempt < retries:
+                    LOG.warning(_LW("Failed to notify nova on events, "
+                                    "attempt %(attempt)d out of "
+                                    "%(max_attempts)d"),
+                                {'attempt': attempt + 1,
+                                 'max_attempts': retries + 1})
+                    eventlet.sleep(cfg.CONF.send_events_interval)
                     continue
-                if code != 200:
-                    LOG.warning(_LW("Nova event: %s returned with failed "
-                                    "status"), event)
-                else:
-                    LOG.info(_LI("Nova event response: %s"), event)
-            if response_error:
-                LOG.error(_LE("Error response returned from nova: %s"),
-                          response)
+                LOG.exception(_LE("Failed to notify nova on events: %s"),
+                              batched_events)
+                return
+
+        if not isinstance(response, list):
+            LOG.error(_LE("Error response returned from nova: %s"),
+                      response)
+            return
+        response_error = False
+        for event in response:
+            try:
+                code = event['code']
+            except KeyError:
+                response_error = True
+                continue
+            if code != 200:
+                LOG.warning(_LW("Nova event: %s returned with failed "
+                                "status"), event)
+            else:
+                LOG.info(_LI("Nova event response: %s"), event)
+        if response_error:
+            LOG.error(_LE("Error response returned from nova: %s"),
+                      response)
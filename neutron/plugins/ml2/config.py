@@ -68,7 +68,31 @@ ml2_opts = [
                       "will have the same type as tenant networks. Allowed "
                       "values for external_network_type config option depend "
                       "on the network type values configured in type_drivers "
-                      "config option."))
+                      "config option.")),
+    cfg.BoolOpt('async_postcommit', default=False,
+                help=_("Deliver the update and delete postcommit calls of "
+                       "mechanism drivers in the background rather than "
+                       "within the API request. Calls about the same "
+                       "resource are delivered in order, and their failures "
+                       "are only logged. Mechanism drivers requiring "
+                       "synchronous postcommit calls are still called "
+                       "within the API request.")),
+    cfg.IntOpt('async_postcommit_workers', default=4, min=1,
+               help=_("Number of green threads delivering the asynchronous "
+                      "postcommit calls of mechanism drivers in each "
+                      "server process.")),
+    cfg.BoolOpt('driver_profiling', default=False,
+                help=_("Time the calls made to type, mechanism and "
+                       "extension drivers, and count the database queries "
+                       "they issue, per driver and method.")),
+    cfg.FloatOpt('driver_profiling_slow_threshold', default=1.0,
+                 help=_("Log a warning for each profiled driver call taking "
+                        "longer than this number of seconds. 0 disables "
+                        "these warnings.")),
+    cfg.IntOpt('driver_profiling_log_interval', default=300,
+               help=_("Interval, in seconds, at which the statistics of the "
+                      "profiled driver calls are logged. 0 disables this "
+                      "logging.")),
 ]
 
 
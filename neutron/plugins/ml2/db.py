@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
 from oslo_db import exception as db_exc
 from oslo_log import log
 from oslo_utils import uuidutils
@@ -158,6 +160,28 @@ def get_locked_port_and_binding(session, port_id):
         return None, None
 
 
+def get_locked_ports_and_bindings(session, port_ids):
+    """Get port and port binding records of several ports for update.
+
+    :returns: a list of (port, binding) tuples. Ports which do not exist
+              anymore are left out.
+    """
+    if not port_ids:
+        return []
+    ports = (session.query(models_v2.Port).
+             enable_eagerloads(False).
+             filter(models_v2.Port.id.in_(port_ids)).
+             with_lockmode('update').
+             all())
+    bindings = dict(
+        (binding.port_id, binding) for binding in
+        session.query(models.PortBinding).
+        enable_eagerloads(False).
+        filter(models.PortBinding.port_id.in_(port_ids)).
+        with_lockmode('update'))
+    return [(port, bindings.get(port.id)) for port in ports]
+
+
 def set_binding_levels(session, levels):
     if levels:
         for level in levels:
@@ -185,6 +209,19 @@ def get_binding_levels(session, port_id, host):
         return result
 
 
+def get_binding_levels_for_ports(session, port_ids):
+    """Get the binding levels of several ports, keyed by port and host."""
+    result = collections.defaultdict(list)
+    if not port_ids:
+        return result
+    query = (session.query(models.PortBindingLevel).
+             filter(models.PortBindingLevel.port_id.in_(port_ids)).
+             order_by(models.PortBindingLevel.level))
+    for level in query:
+        result[(level.port_id, level.host)].append(level)
+    return result
+
+
 def clear_binding_levels(session, port_id, host):
     if host:
         (session.query(models.PortBindingLevel).
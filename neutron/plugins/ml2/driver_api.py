@@ -780,6 +780,22 @@ class MechanismDriver(object):
         """
         pass
 
+    def create_port_bulk_postcommit(self, contexts):
+        """Create a batch of ports.
+
+        :param contexts: list of PortContext instances describing the
+        ports of a bulk create request.
+
+        Called after the transaction creating all the ports completes.
+        The default implementation calls create_port_postcommit for
+        each port. Drivers able to handle the whole batch at once, for
+        instance with a single request to their backend, can override
+        it. Raising an exception will result in the deletion of all the
+        ports of the batch.
+        """
+        for context in contexts:
+            self.create_port_postcommit(context)
+
     def update_port_precommit(self, context):
         """Update resources of a port.
 
@@ -841,6 +857,21 @@ class MechanismDriver(object):
         """
         pass
 
+    def delete_port_bulk_postcommit(self, contexts):
+        """Delete a batch of ports.
+
+        :param contexts: list of PortContext instances describing the
+        ports deleted together with their network.
+
+        Called after the transaction deleting all the ports completes.
+        The default implementation calls delete_port_postcommit for
+        each port. Drivers able to handle the whole batch at once can
+        override it. Runtime errors are not expected, and will not
+        prevent the resources from being deleted.
+        """
+        for context in contexts:
+            self.delete_port_postcommit(context)
+
     def bind_port(self, context):
         """Attempt to bind a port.
 
@@ -888,6 +919,17 @@ class MechanismDriver(object):
     def _supports_port_binding(self):
         return self.__class__.bind_port != MechanismDriver.bind_port
 
+    @property
+    def requires_synchronous_postcommit(self):
+        """Whether the postcommit calls must be made within API requests.
+
+        When the async_postcommit option is enabled, the update and delete
+        postcommit calls are delivered to the mechanism driver in the
+        background, after the API request may have completed. Drivers
+        relying on being called within the API request should return True.
+        """
+        return False
+
     def check_vlan_transparency(self, context):
         """Check if the network supports vlan transparency.
 
@@ -0,0 +1,163 @@
+# Copyright (c) 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Timing of the calls made by the ML2 managers to their drivers.
+
+When the ml2 driver_profiling option is enabled, every call made to a
+type, mechanism or extension driver through call_driver is timed, and the
+database queries it issues are counted. Calls slower than
+driver_profiling_slow_threshold seconds are logged as they complete, and
+the statistics of each driver method are logged every
+driver_profiling_log_interval seconds.
+"""
+
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log
+from oslo_service import loopingcall
+from sqlalchemy import engine
+from sqlalchemy import event
+
+from neutron._i18n import _LI, _LW
+from neutron.plugins.ml2 import config  # noqa
+
+LOG = log.getLogger(__name__)
+
+# upper bounds, in seconds, of the buckets of the latency histograms
+LATENCY_BUCKETS = (0.001, 0.01, 0.1, 1, 10, float('inf'))
+
+# Greenthread local, as the threading module is monkey patched by eventlet
+_query_counter = threading.local()
+
+
+def _count_query(*args, **kwargs):
+    _query_counter.count = getattr(_query_counter, 'count', 0) + 1
+
+
+def _get_query_count():
+    return getattr(_query_counter, 'count', 0)
+
+
+class DriverCallStats(object):
+    """Statistics of the calls made to a driver method."""
+
+    __slots__ = ('count', 'total_time', 'max_time', 'queries', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.queries = 0
+        # number of calls per bucket of LATENCY_BUCKETS
+        self.histogram = [0] * len(LATENCY_BUCKETS)
+
+    def record(self, duration, queries):
+        self.count += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self.queries += queries
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                self.histogram[index] += 1
+                break
+
+    def to_dict(self):
+        return {'count': self.count,
+                'total_time': self.total_time,
+                'max_time': self.max_time,
+                'queries': self.queries,
+                'histogram': list(self.histogram)}
+
+
+class DriverProfiler(object):
+    """Collects the statistics of the calls made to the ML2 drivers."""
+
+    def __init__(self):
+        # (driver kind, driver name, method name) -> DriverCallStats
+        self._stats = {}
+        self._started = False
+
+    def _start(self):
+        self._started = True
+        event.listen(engine.Engine, 'before_cursor_execute', _count_query)
+        interval = cfg.CONF.ml2.driver_profiling_log_interval
+        if interval > 0:
+            loop = loopingcall.FixedIntervalLoopingCall(self.log_stats)
+            loop.start(interval=interval, initial_delay=interval)
+
+    def call(self, kind, driver_name, method_name, method, args):
+        if not self._started:
+            self._start()
+        queries = _get_query_count()
+        start = time.time()
+        try:
+            return method(*args)
+        finally:
+            duration = time.time() - start
+            queries = _get_query_count() - queries
+            key = (kind, driver_name, method_name)
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = DriverCallStats()
+            stats.record(duration, queries)
+            threshold = cfg.CONF.ml2.driver_profiling_slow_threshold
+            if threshold > 0 and duration > threshold:
+                LOG.warning(_LW("Slow call to %(method)s of %(kind)s driver "
+                                "'%(name)s': %(duration).3f seconds, "
+                                "%(queries)d database queries"),
+                            {'method': method_name, 'kind': kind,
+                             'name': driver_name, 'duration': duration,
+                             'queries': queries})
+
+    def get_stats(self):
+        """Return the statistics of each driver method.
+
+        :returns: a dict mapping (driver kind, driver name, method name)
+                  tuples to dicts of the number of calls, total and maximum
+                  time in seconds, number of database queries, and number
+                  of calls per bucket of LATENCY_BUCKETS
+        """
+        return dict((key, stats.to_dict())
+                    for key, stats in self._stats.items())
+
+    def log_stats(self):
+        for key, stats in sorted(self._stats.items()):
+            LOG.info(_LI("%(kind)s driver '%(name)s' %(method)s: %(count)d "
+                         "calls, %(avg).1f ms average, %(max).1f ms max, "
+                         "%(queries).1f queries average, "
+                         "latency histogram %(histogram)s"),
+                     {'kind': key[0], 'name': key[1], 'method': key[2],
+                      'count': stats.count,
+                      'avg': stats.total_time * 1000 / stats.count,
+                      'max': stats.max_time * 1000,
+                      'queries': float(stats.queries) / stats.count,
+                      'histogram': stats.histogram})
+
+
+PROFILER = DriverProfiler()
+
+
+def call_driver(kind, driver, method_name, *args):
+    """Call method_name of a driver, profiling the call if enabled.
+
+    :param kind: the kind of driver, 'type', 'mechanism' or 'extension'
+    :param driver: the stevedore extension of the driver
+    """
+    method = getattr(driver.obj, method_name)
+    if not cfg.CONF.ml2.driver_profiling:
+        return method(*args)
+    return PROFILER.call(kind, driver.name, method_name, method, args)
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import itertools
+
 from oslo_config import cfg
 from oslo_log import log
 from oslo_utils import excutils
@@ -30,7 +32,9 @@ from neutron.extensions import vlantransparent
 from neutron.plugins.ml2.common import exceptions as ml2_exc
 from neutron.plugins.ml2 import db
 from neutron.plugins.ml2 import driver_api as api
+from neutron.plugins.ml2 import driver_profiler
 from neutron.plugins.ml2 import models
+from neutron.plugins.ml2 import postcommit
 from neutron.services.qos import qos_consts
 
 LOG = log.getLogger(__name__)
@@ -213,7 +217,8 @@ class TypeManager(stevedore.named.NamedExtensionManager):
         network_type = segment[api.NETWORK_TYPE]
         driver = self.drivers.get(network_type)
         if driver:
-            return driver.obj.is_partial_segment(segment)
+            return driver_profiler.call_driver(
+                'type', driver, 'is_partial_segment', segment)
         else:
             msg = _("network_type value '%s' not supported") % network_type
             raise exc.InvalidInput(error_message=msg)
@@ -222,7 +227,8 @@ class TypeManager(stevedore.named.NamedExtensionManager):
         network_type = segment[api.NETWORK_TYPE]
         driver = self.drivers.get(network_type)
         if driver:
-            driver.obj.validate_provider_segment(segment)
+            driver_profiler.call_driver(
+                'type', driver, 'validate_provider_segment', segment)
         else:
             msg = _("network_type value '%s' not supported") % network_type
             raise exc.InvalidInput(error_message=msg)
@@ -230,11 +236,13 @@ class TypeManager(stevedore.named.NamedExtensionManager):
     def reserve_provider_segment(self, session, segment):
         network_type = segment.get(api.NETWORK_TYPE)
         driver = self.drivers.get(network_type)
-        return driver.obj.reserve_provider_segment(session, segment)
+        return driver_profiler.call_driver(
+            'type', driver, 'reserve_provider_segment', session, segment)
 
     def _allocate_segment(self, session, network_type):
         driver = self.drivers.get(network_type)
-        return driver.obj.allocate_tenant_segment(session)
+        return driver_profiler.call_driver(
+            'type', driver, 'allocate_tenant_segment', session)
 
     def _allocate_tenant_net_segment(self, session):
         for network_type in self.tenant_network_types:
@@ -258,7 +266,8 @@ class TypeManager(stevedore.named.NamedExtensionManager):
             network_type = segment.get(api.NETWORK_TYPE)
             driver = self.drivers.get(network_type)
             if driver:
-                driver.obj.release_segment(session, segment)
+                driver_profiler.call_driver(
+                    'type', driver, 'release_segment', session, segment)
             else:
                 LOG.error(_LE("Failed to release segment '%s' because "
                               "network type is not supported."), segment)
@@ -273,7 +282,8 @@ class TypeManager(stevedore.named.NamedExtensionManager):
             return dynamic_segment
 
         driver = self.drivers.get(segment.get(api.NETWORK_TYPE))
-        dynamic_segment = driver.obj.reserve_provider_segment(session, segment)
+        dynamic_segment = driver_profiler.call_driver(
+            'type', driver, 'reserve_provider_segment', session, segment)
         db.add_network_segment(session, network_id, dynamic_segment,
                                is_dynamic=True)
         return dynamic_segment
@@ -284,7 +294,8 @@ class TypeManager(stevedore.named.NamedExtensionManager):
         if segment:
             driver = self.drivers.get(segment.get(api.NETWORK_TYPE))
             if driver:
-                driver.obj.release_segment(session, segment)
+                driver_profiler.call_driver(
+                    'type', driver, 'release_segment', session, segment)
                 db.delete_network_segment(session, segment_id)
             else:
                 LOG.error(_LE("Failed to release segment '%s' because "
@@ -302,6 +313,9 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
         # Ordered list of mechanism drivers, defining
         # the order in which the drivers are called.
         self.ordered_mech_drivers = []
+        # Bus delivering asynchronous postcommit calls, created on first use
+        # so that its threads belong to the process serving the requests.
+        self.postcommit_bus = None
 
         LOG.info(_LI("Configured mechanism driver names: %s"),
                  cfg.CONF.ml2.mechanism_drivers)
@@ -385,20 +399,24 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
                     raise vlantransparent.VlanTransparencyDriverError()
 
     def _call_on_drivers(self, method_name, context,
-                         continue_on_failure=False):
+                         continue_on_failure=False, drivers=None):
         """Helper method for calling a method across all mechanism drivers.
 
         :param method_name: name of the method to call
         :param context: context parameter to pass to each method call
         :param continue_on_failure: whether or not to continue to call
         all mechanism drivers once one has raised an exception
+        :param drivers: the mechanism drivers to call, all of them by default
         :raises: neutron.plugins.ml2.common.MechanismDriverError
         if any mechanism driver call fails.
         """
         error = False
-        for driver in self.ordered_mech_drivers:
+        if drivers is None:
+            drivers = self.ordered_mech_drivers
+        for driver in drivers:
             try:
-                getattr(driver.obj, method_name)(context)
+                driver_profiler.call_driver(
+                    'mechanism', driver, method_name, context)
             except Exception:
                 LOG.exception(
                     _LE("Mechanism driver '%(name)s' failed in %(method)s"),
@@ -412,6 +430,45 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
                 method=method_name
             )
 
+    def _get_postcommit_bus(self):
+        if self.postcommit_bus is None:
+            self.postcommit_bus = postcommit.PostcommitEventBus(
+                cfg.CONF.ml2.async_postcommit_workers)
+        return self.postcommit_bus
+
+    def _call_postcommit_on_drivers(self, method_name, context):
+        """Call a postcommit method whose failures are only reported.
+
+        With the async_postcommit option enabled, the call is published
+        to the postcommit bus for the mechanism drivers which do not
+        require synchronous postcommit calls, and only the other drivers
+        are called right away. Drivers are called, or published, in the
+        order they are configured.
+        """
+        if not cfg.CONF.ml2.async_postcommit:
+            self._call_on_drivers(method_name, context,
+                                  continue_on_failure=True)
+            return
+        error = False
+        for synchronous, drivers in itertools.groupby(
+                self.ordered_mech_drivers,
+                lambda driver: driver.obj.requires_synchronous_postcommit):
+            drivers = list(drivers)
+            if not synchronous:
+                self._get_postcommit_bus().publish(drivers, method_name,
+                                                   context)
+                continue
+            try:
+                self._call_on_drivers(method_name, context,
+                                      continue_on_failure=True,
+                                      drivers=drivers)
+            except ml2_exc.MechanismDriverError:
+                error = True
+        if error:
+            raise ml2_exc.MechanismDriverError(
+                method=method_name
+            )
+
     def create_network_precommit(self, context):
         """Notify all mechanism drivers during network creation.
 
@@ -464,8 +521,7 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
         call every other mechanism driver. A MechanismDriverError is
         then reraised at the end to notify the caller of a failure.
         """
-        self._call_on_drivers("update_network_postcommit", context,
-                              continue_on_failure=True)
+        self._call_postcommit_on_drivers("update_network_postcommit", context)
 
     def delete_network_precommit(self, context):
         """Notify all mechanism drivers during network deletion.
@@ -495,8 +551,7 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
         and it doesn't make sense to undo the action by recreating the
         network.
         """
-        self._call_on_drivers("delete_network_postcommit", context,
-                              continue_on_failure=True)
+        self._call_postcommit_on_drivers("delete_network_postcommit", context)
 
     def create_subnet_precommit(self, context):
         """Notify all mechanism drivers during subnet creation.
@@ -549,8 +604,7 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
         call every other mechanism driver. A MechanismDriverError is
         then reraised at the end to notify the caller of a failure.
         """
-        self._call_on_drivers("update_subnet_postcommit", context,
-                              continue_on_failure=True)
+        self._call_postcommit_on_drivers("update_subnet_postcommit", context)
 
     def delete_subnet_precommit(self, context):
         """Notify all mechanism drivers during subnet deletion.
@@ -580,8 +634,7 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
         and it doesn't make sense to undo the action by recreating the
         subnet.
         """
-        self._call_on_drivers("delete_subnet_postcommit", context,
-                              continue_on_failure=True)
+        self._call_postcommit_on_drivers("delete_subnet_postcommit", context)
 
     def create_port_precommit(self, context):
         """Notify all mechanism drivers during port creation.
@@ -610,6 +663,21 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
         """
         self._call_on_drivers("create_port_postcommit", context)
 
+    def create_port_bulk_postcommit(self, contexts):
+        """Notify all mechanism drivers of the creation of a batch of ports.
+
+        :raises: neutron.plugins.ml2.common.MechanismDriverError
+        if any mechanism driver create_port_bulk_postcommit call fails.
+
+        Called after the database transaction creating all the ports.
+        Each mechanism driver is called once with the contexts of all
+        the ports. Errors raised by mechanism drivers are left to
+        propagate to the caller, where all the ports will be deleted,
+        triggering any required cleanup. There is no guarantee that all
+        mechanism drivers are called in this case.
+        """
+        self._call_on_drivers("create_port_bulk_postcommit", contexts)
+
     def update_port_precommit(self, context):
         """Notify all mechanism drivers during port update.
 
@@ -634,8 +702,7 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
         call every other mechanism driver. A MechanismDriverError is
         then reraised at the end to notify the caller of a failure.
         """
-        self._call_on_drivers("update_port_postcommit", context,
-                              continue_on_failure=True)
+        self._call_postcommit_on_drivers("update_port_postcommit", context)
 
     def delete_port_precommit(self, context):
         """Notify all mechanism drivers during port deletion.
@@ -665,7 +732,21 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
         and it doesn't make sense to undo the action by recreating the
         port.
         """
-        self._call_on_drivers("delete_port_postcommit", context,
+        self._call_postcommit_on_drivers("delete_port_postcommit", context)
+
+    def delete_port_bulk_postcommit(self, contexts):
+        """Notify all mechanism drivers of the deletion of a batch of ports.
+
+        :raises: neutron.plugins.ml2.common.MechanismDriverError
+        if any mechanism driver delete_port_bulk_postcommit call fails.
+
+        Called after the database transaction deleting all the ports.
+        Each mechanism driver is called once with the contexts of all
+        the ports. As with delete_port_postcommit, every mechanism
+        driver is called even if one of them fails, and the caller is
+        expected to ignore the error.
+        """
+        self._call_on_drivers("delete_port_bulk_postcommit", contexts,
                               continue_on_failure=True)
 
     def bind_port(self, context):
@@ -714,7 +795,8 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
                 continue
             try:
                 context._prepare_to_bind(segments_to_bind)
-                driver.obj.bind_port(context)
+                driver_profiler.call_driver(
+                    'mechanism', driver, 'bind_port', context)
                 segment = context._new_bound_segment
                 if segment:
                     context._push_binding_level(
@@ -819,7 +901,8 @@ class ExtensionManager(stevedore.named.NamedExtensionManager):
         """Helper method for calling a method across all extension drivers."""
         for driver in self.ordered_ext_drivers:
             try:
-                getattr(driver.obj, method_name)(plugin_context, data, result)
+                driver_profiler.call_driver('extension', driver, method_name,
+                                            plugin_context, data, result)
             except Exception:
                 with excutils.save_and_reraise_exception():
                     LOG.info(_LI("Extension driver '%(name)s' failed in "
@@ -859,7 +942,8 @@ class ExtensionManager(stevedore.named.NamedExtensionManager):
     def _call_on_dict_driver(self, method_name, session, base_model, result):
         for driver in self.ordered_ext_drivers:
             try:
-                getattr(driver.obj, method_name)(session, base_model, result)
+                driver_profiler.call_driver('extension', driver, method_name,
+                                            session, base_model, result)
             except Exception:
                 LOG.error(_LE("Extension driver '%(name)s' failed in "
                           "%(method)s"),
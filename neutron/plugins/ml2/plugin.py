@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
+
 from eventlet import greenthread
 from oslo_config import cfg
 from oslo_db import api as oslo_db_api
@@ -117,6 +119,7 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
     __native_bulk_support = True
     __native_pagination_support = True
     __native_sorting_support = True
+    __native_streaming_support = True
 
     # List of supported extensions
     _supported_extension_aliases = ["provider", "external-net", "binding",
@@ -595,12 +598,26 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                                'id': obj['result']['id']})
 
     def _create_bulk_ml2(self, resource, context, request_items):
+        """Create a batch of resources in a single transaction.
+
+        Each resource is still written to the database on its own, through
+        the same path as a single create request, so that IPAM, MAC
+        generation and the extension drivers process every resource. Only
+        the lookups of the networks of the ports are shared across the
+        batch, and mechanism drivers implementing the bulk postcommit
+        method of the resource get the whole batch at once.
+        """
         objects = []
         collection = "%ss" % resource
         items = request_items[collection]
         try:
             with context.session.begin(subtransactions=True):
                 obj_creator = getattr(self, '_create_%s_db' % resource)
+                if resource == attributes.PORT:
+                    # The ports of a bulk request usually share their
+                    # network, only look each of them up once.
+                    obj_creator = functools.partial(obj_creator,
+                                                    networks={})
                 for item in items:
                     attrs = item[resource]
                     result, mech_context = obj_creator(context, item)
@@ -614,6 +631,23 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                                   "the %(resource)s:%(item)s"),
                               {'resource': resource, 'item': item})
 
+        bulk_postcommit_op = getattr(self.mechanism_manager,
+                                     'create_%s_bulk_postcommit' % resource,
+                                     None)
+        if bulk_postcommit_op:
+            try:
+                bulk_postcommit_op([obj['mech_context'] for obj in objects])
+                return objects
+            except ml2_exc.MechanismDriverError:
+                with excutils.save_and_reraise_exception():
+                    resource_ids = [res['result']['id'] for res in objects]
+                    LOG.exception(_LE("mechanism_manager.create_%(res)s"
+                                      "_bulk_postcommit failed. Deleting "
+                                      "%(res)ss %(resource_ids)s"),
+                                  {'res': resource,
+                                   'resource_ids': ', '.join(resource_ids)})
+                    self._delete_objects(context, resource, objects)
+
         try:
             postcommit_op = getattr(self.mechanism_manager,
                                     'create_%s_postcommit' % resource)
@@ -759,6 +793,58 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                     LOG.exception(_LE("Exception auto-deleting port %s"),
                                   port_id)
 
+    def _delete_network_ports(self, context, network_id, port_ids):
+        """Delete the auto-delete ports of a network being deleted.
+
+        Unlike _delete_ports, all the ports are deleted within a single
+        transaction, and each mechanism driver is notified once for the
+        whole batch after it is committed.
+        """
+        for port_id in port_ids:
+            self._pre_delete_port(context, port_id, True)
+        l3plugin = manager.NeutronManager.get_service_plugins().get(
+            service_constants.L3_ROUTER_NAT)
+
+        session = context.session
+        deleted_ports = []
+        with session.begin(subtransactions=True):
+            ports_and_bindings = db.get_locked_ports_and_bindings(
+                session, port_ids)
+            if not ports_and_bindings:
+                return
+            levels = db.get_binding_levels_for_ports(session, port_ids)
+            network = self.get_network(context, network_id)
+            for port_db, binding in ports_and_bindings:
+                port = self._make_port_dict(port_db)
+                mech_context = driver_context.PortContext(
+                    self, context, port, network, binding,
+                    levels.get((port['id'], binding.host)))
+                self.mechanism_manager.delete_port_precommit(mech_context)
+                router_ids = []
+                if l3plugin:
+                    router_ids = l3plugin.disassociate_floatingips(
+                        context, port['id'], do_notify=False)
+                LOG.debug("Auto-deleting port %(port_id)s owned by "
+                          "%(owner)s", {"port_id": port['id'],
+                                        "owner": port['device_owner']})
+                super(Ml2Plugin, self).delete_port(context, port['id'])
+                deleted_ports.append((port, router_ids, mech_context))
+
+        for port, router_ids, mech_context in deleted_ports:
+            registry.notify(resources.PORT, events.AFTER_DELETE, self,
+                            context=context, port=port,
+                            router_ids=router_ids, removed_routers=[])
+        try:
+            self.mechanism_manager.delete_port_bulk_postcommit(
+                [mech_context for _p, _r, mech_context in deleted_ports])
+        except ml2_exc.MechanismDriverError:
+            LOG.error(_LE("mechanism_manager.delete_port_bulk_postcommit "
+                          "failed for ports of network %s"), network_id)
+        for port, _r, _c in deleted_ports:
+            self.notifier.port_delete(context, port['id'])
+        self.notify_security_groups_member_updated_bulk(
+            context, [port for port, _r, _c in deleted_ports])
+
     def _delete_subnets(self, context, subnet_ids):
         for subnet_id in subnet_ids:
             try:
@@ -843,7 +929,7 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                         LOG.warning(_LW("A concurrent port creation has "
                                         "occurred"))
                         continue
-            self._delete_ports(context, port_ids)
+            self._delete_network_ports(context, id, port_ids)
             self._delete_subnets(context, subnet_ids)
 
         try:
@@ -1033,7 +1119,7 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
         elif self._check_update_has_security_groups(port):
             raise psec.PortSecurityAndIPRequiredForSecurityGroups()
 
-    def _create_port_db(self, context, port):
+    def _create_port_db(self, context, port, networks=None):
         attrs = port[attributes.PORT]
         if not attrs.get('status'):
             attrs['status'] = const.PORT_STATUS_DOWN
@@ -1049,7 +1135,13 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
             # sgids must be got after portsec checked with security group
             sgids = self._get_security_groups_on_port(context, port)
             self._process_port_create_security_group(context, result, sgids)
-            network = self.get_network(context, result['network_id'])
+            network_id = result['network_id']
+            if networks is not None and network_id in networks:
+                network = networks[network_id]
+            else:
+                network = self.get_network(context, network_id)
+                if networks is not None:
+                    networks[network_id] = network
             binding = db.add_port_binding(session, result['id'])
             mech_context = driver_context.PortContext(self, context, result,
                                                       network, binding, None)
@@ -0,0 +1,160 @@
+# Copyright (c) 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+import time
+
+import eventlet
+from eventlet import queue
+from oslo_log import log
+
+from neutron._i18n import _LE
+from neutron.plugins.ml2 import driver_profiler
+
+LOG = log.getLogger(__name__)
+
+
+# Attributes of the driver contexts holding resource dicts
+_CONTEXT_DICT_ATTRIBUTES = ('_port', '_original_port', '_subnet',
+                            '_original_subnet', '_network',
+                            '_original_network', '_segments',
+                            '_original_vif_details')
+
+
+def _copy_db_object(db_object):
+    """Return a copy of a database object which belongs to no session."""
+    values = dict((column.name, getattr(db_object, column.name))
+                  for column in db_object.__table__.columns)
+    return type(db_object)(**values)
+
+
+def _snapshot_driver_context(context, plugin_context):
+    context = copy.copy(context)
+    context._plugin_context = plugin_context
+    for name in _CONTEXT_DICT_ATTRIBUTES:
+        value = getattr(context, name, None)
+        if value is not None:
+            setattr(context, name, copy.deepcopy(value))
+    binding = getattr(context, '_binding', None)
+    if binding is not None:
+        context._binding = _copy_db_object(binding)
+    for name in ('_binding_levels', '_original_binding_levels'):
+        levels = getattr(context, name, None)
+        if levels is not None:
+            setattr(context, name,
+                    [_copy_db_object(level) for level in levels])
+    return context
+
+
+def copy_driver_context(context):
+    """Copy a driver context so that it can be used by another thread.
+
+    The copy gets its own database session. The resources, port binding
+    and binding levels it holds are copied as well, so that it is
+    isolated from the changes later made by the API request to the
+    driver context, and from the session the request loaded them in.
+    """
+    plugin_context = copy.copy(context._plugin_context)
+    plugin_context._session = None
+    context = _snapshot_driver_context(context, plugin_context)
+    network_context = getattr(context, '_network_context', None)
+    if network_context is not None:
+        context._network_context = _snapshot_driver_context(
+            network_context, plugin_context)
+    return context
+
+
+class DeliveryStats(object):
+    """Latency of the postcommit calls delivered to a driver method."""
+
+    __slots__ = ('count', 'failures', 'total_time', 'max_time',
+                 'total_delay')
+
+    def __init__(self):
+        self.count = 0
+        self.failures = 0
+        # seconds spent in the driver method
+        self.total_time = 0.0
+        self.max_time = 0.0
+        # seconds spent by the calls waiting to be delivered
+        self.total_delay = 0.0
+
+    def record(self, duration, delay, failed):
+        self.count += 1
+        self.failures += int(failed)
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self.total_delay += delay
+
+    def to_dict(self):
+        return dict((key, getattr(self, key)) for key in self.__slots__)
+
+
+class PostcommitEventBus(object):
+    """Delivers mechanism driver postcommit calls in the background.
+
+    Published calls are queued to one of a fixed number of worker green
+    threads, chosen by the id of the resource the call is about. The calls
+    about a resource are therefore delivered one at a time, in the order
+    they were published. Failures are logged, as they would be by the
+    synchronous postcommit calls which may be published.
+    """
+
+    def __init__(self, workers):
+        self._queues = [queue.LightQueue() for i in range(workers)]
+        # (driver name, method name) -> DeliveryStats
+        self._stats = {}
+        for worker_queue in self._queues:
+            eventlet.spawn_n(self._work, worker_queue)
+
+    def publish(self, drivers, method_name, context):
+        """Queue calling method_name with context on the drivers."""
+        resource_id = context.current['id']
+        worker_queue = self._queues[hash(resource_id) % len(self._queues)]
+        worker_queue.put((drivers, method_name,
+                          copy_driver_context(context), time.time()))
+
+    def _work(self, worker_queue):
+        while True:
+            drivers, method_name, context, published_at = worker_queue.get()
+            self._deliver(drivers, method_name, context, published_at)
+
+    def _deliver(self, drivers, method_name, context, published_at):
+        for driver in drivers:
+            start = time.time()
+            failed = False
+            try:
+                driver_profiler.call_driver(
+                    'mechanism', driver, method_name, context)
+            except Exception:
+                failed = True
+                LOG.exception(
+                    _LE("Mechanism driver '%(name)s' failed in %(method)s"),
+                    {'name': driver.name, 'method': method_name})
+            end = time.time()
+            stats = self._stats.setdefault((driver.name, method_name),
+                                           DeliveryStats())
+            stats.record(end - start, start - published_at, failed)
+
+    def get_stats(self):
+        """Return the delivery statistics of each driver method.
+
+        :returns: a dict mapping (driver name, method name) tuples to dicts
+                  of the number of calls, failed calls, total and maximum
+                  time spent in the driver, and total time spent waiting
+                  to be delivered, in seconds
+        """
+        return dict((key, stats.to_dict())
+                    for key, stats in self._stats.items())
@@ -357,6 +357,123 @@ def check(context, action, target, plugin=None, might_not_exist=False,
     return result
 
 
+def _get_target_keys(match_rule, seen=None):
+    """Return the target attributes a policy rule depends on.
+
+    The result is a set of keys whose values, together with the request
+    credentials, fully determine the outcome of the rule. None is returned
+    when the rule contains checks whose outcome cannot be derived from the
+    target attributes alone (e.g.: remote HTTP checks).
+    """
+    if seen is None:
+        seen = set()
+    if isinstance(match_rule, (policy.AndCheck, policy.OrCheck)):
+        keys = set()
+        for rule in match_rule.rules:
+            rule_keys = _get_target_keys(rule, seen)
+            if rule_keys is None:
+                return None
+            keys |= rule_keys
+        return keys
+    if isinstance(match_rule, policy.NotCheck):
+        return _get_target_keys(match_rule.rule, seen)
+    if isinstance(match_rule, policy.RuleCheck):
+        if match_rule.match in seen:
+            return set()
+        seen.add(match_rule.match)
+        rule = _ENFORCER.rules.get(match_rule.match)
+        # A missing rule is always evaluated as a failure
+        return _get_target_keys(rule, seen) if rule else set()
+    if isinstance(match_rule, (policy.TrueCheck, policy.FalseCheck,
+                               policy.RoleCheck)):
+        return set()
+    if isinstance(match_rule, OwnerCheck):
+        keys = {match_rule.target_field}
+        for separator in (':', '_'):
+            if separator in match_rule.target_field:
+                parent_res = match_rule.target_field.split(separator, 1)[0]
+                parent_foreign_key = attributes.RESOURCE_FOREIGN_KEYS.get(
+                    "%ss" % parent_res)
+                if parent_foreign_key:
+                    keys.add(parent_foreign_key)
+                break
+        return keys
+    if isinstance(match_rule, FieldCheck):
+        return {match_rule.field}
+    if isinstance(match_rule, policy.GenericCheck):
+        return set(re.findall(r'%\((.*?)\)s', match_rule.match))
+    return None
+
+
+_MISSING = object()
+
+
+def check_collection(context, action, targets, pluralized=None):
+    """Filters a list of targets, returning those the action is valid on.
+
+    This is equivalent to calling check() on every target, but the policy
+    rule is built once and results are memoized on the values of the target
+    attributes the rule actually depends on. For collections where many
+    objects share the same owner (or parent resource) this avoids walking
+    the rule tree, and calling the plugin for parent resources, once per
+    object.
+
+    :param context: neutron context
+    :param action: string representing the action to be checked
+        this should be colon separated for clarity.
+    :param targets: list of dictionaries representing the objects
+    :param pluralized: pluralized case of resource
+        e.g. firewall_policy -> pluralized = "firewall_policies"
+
+    :return: Returns the list of targets for which access is permitted.
+    """
+    # If we already know the context has admin rights do not perform an
+    # additional check and authorize the operation
+    if context.is_admin:
+        return list(targets)
+    _ENFORCER.load_rules()
+    match_rule = _build_match_rule(action, {}, pluralized)
+    target_keys = None
+    if not get_resource_and_action(action, pluralized)[1]:
+        target_keys = _get_target_keys(match_rule)
+    if target_keys is None:
+        # Attribute-based write checks and unknown checks depend on the
+        # whole target, therefore each target is evaluated on its own
+        return [target for target in targets
+                if check(context, action, target, pluralized=pluralized)]
+    target_keys = sorted(target_keys)
+    credentials = context.to_dict()
+    cache = {}
+    allowed = []
+    for target in targets:
+        key = tuple(target.get(k, _MISSING) for k in target_keys)
+        try:
+            result, derived = cache[key]
+        except TypeError:
+            # Unhashable attribute value, do not memoize
+            result = _ENFORCER.enforce(match_rule, target, credentials,
+                                       pluralized=pluralized)
+            if not result:
+                log_rule_list(match_rule)
+        except KeyError:
+            original_keys = set(target)
+            result = _ENFORCER.enforce(match_rule, target, credentials,
+                                       pluralized=pluralized)
+            # OwnerCheck stores attributes of parent resources in the
+            # target, keep them so that they are available to later checks
+            derived = dict((k, target[k]) for k in target
+                           if k not in original_keys)
+            cache[key] = (result, derived)
+            if not result:
+                log_rule_list(match_rule)
+        else:
+            for k, v in derived.items():
+                target.setdefault(k, v)
+        if result:
+            allowed.append(target)
+    return allowed
+
+
 def enforce(context, action, target, plugin=None, pluralized=None):
     """Verifies that the action is valid on the target in this context.
 
@@ -67,6 +67,26 @@ quota_opts = [
                 help=_('Keep in track in the database of current resource'
                        'quota usage. Plugins which do not leverage the '
                        'neutron database should set this flag to False')),
+    cfg.BoolOpt('track_quota_usage_by_counters',
+                default=False,
+                help=_('Update tracked quota usage by the number of '
+                       'resources created or deleted by each request, rather '
+                       'than counting resources again once usage changed. '
+                       'Usage records are not locked when checking quota, '
+                       'hence concurrent requests might slightly exceed a '
+                       'quota limit.')),
+    cfg.IntOpt('quota_usage_reconcile_interval',
+               default=0,
+               help=_('Interval, in seconds, between reconciliations of '
+                      'quota usage counters with the actual number of '
+                      'resources. Only used when '
+                      'track_quota_usage_by_counters is enabled. 0 disables '
+                      'the reconciliation.')),
+    cfg.BoolOpt('resync_quota_usage_on_list',
+                default=True,
+                help=_('Synchronize out of sync quota usage for the tenant '
+                       'when it lists resources. Usage is synchronized '
+                       'anyway when quota is checked.')),
 ]
 # Register the configuration options
 cfg.CONF.register_opts(quota_opts, 'QUOTAS')
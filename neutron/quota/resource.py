@@ -12,13 +12,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
 from oslo_config import cfg
 from oslo_db import api as oslo_db_api
 from oslo_db import exception as oslo_db_exception
 from oslo_log import log
 from oslo_utils import excutils
+import six
+import sqlalchemy as sa
 from sqlalchemy import event
 from sqlalchemy import exc as sql_exc
+from sqlalchemy import orm
 
 from neutron._i18n import _LE, _LW
 from neutron.db import api as db_api
@@ -26,6 +31,34 @@ from neutron.db.quota import api as quota_api
 
 LOG = log.getLogger(__name__)
 
+# Key of the session info dict storing usage deltas of pending transactions
+_SESSION_USAGE_DELTAS = 'neutron_quota_usage_deltas'
+
+
+def _session_after_commit(session):
+    # Deltas of a released savepoint stay pending until the outer
+    # transaction is committed
+    if session.transaction is not None and session.transaction.nested:
+        return
+    deltas = session.info.pop(_SESSION_USAGE_DELTAS, None) or {}
+    for (res, tenant_id), delta in six.iteritems(deltas):
+        res._committed_deltas[tenant_id] += delta
+
+
+def _session_after_rollback(session):
+    deltas = session.info.pop(_SESSION_USAGE_DELTAS, None) or {}
+    # It is not known which of these changes were rolled back, usage will
+    # therefore be counted again
+    for res, tenant_id in deltas:
+        res._dirty_tenants.add(tenant_id)
+
+
+def _register_session_events():
+    for name, handler in (('after_commit', _session_after_commit),
+                          ('after_rollback', _session_after_rollback)):
+        if not event.contains(orm.Session, name, handler):
+            event.listen(orm.Session, name, handler)
+
 
 def _count_resource(context, plugin, collection_name, tenant_id):
     count_getter_name = "get_%s_count" % collection_name
@@ -172,12 +205,34 @@ class TrackedResource(BaseResource):
         self._model_class = model_class
         self._dirty_tenants = set()
         self._out_of_sync_tenants = set()
+        # Usage changes committed to the database but not yet applied to
+        # the usage counters (only with track_quota_usage_by_counters)
+        self._committed_deltas = collections.Counter()
 
     @property
     def dirty(self):
         return self._dirty_tenants
 
+    @property
+    def pending_deltas(self):
+        return self._committed_deltas
+
+    def _apply_deltas(self, context):
+        deltas_snap = dict(self._committed_deltas)
+        with db_api.autonested_transaction(context.session):
+            for tenant_id, delta in six.iteritems(deltas_snap):
+                # A missing usage record is created by count()
+                if delta:
+                    quota_api.update_quota_usage_in_use(
+                        context, self.name, tenant_id, delta)
+        self._committed_deltas.subtract(deltas_snap)
+        for tenant_id in deltas_snap:
+            if not self._committed_deltas[tenant_id]:
+                del self._committed_deltas[tenant_id]
+
     def mark_dirty(self, context):
+        if self._committed_deltas:
+            self._apply_deltas(context)
         if not self._dirty_tenants:
             return
         with db_api.autonested_transaction(context.session):
@@ -206,6 +261,27 @@ class TrackedResource(BaseResource):
                               "attribute"), target)
         self._dirty_tenants.add(tenant_id)
 
+    def _track_usage_delta(self, target, delta):
+        try:
+            tenant_id = target['tenant_id']
+        except AttributeError:
+            with excutils.save_and_reraise_exception():
+                LOG.error(_LE("Model class %s does not have a tenant_id "
+                              "attribute"), target)
+        session = orm.object_session(target)
+        if session is None:
+            self._dirty_tenants.add(tenant_id)
+            return
+        deltas = session.info.setdefault(_SESSION_USAGE_DELTAS,
+                                         collections.Counter())
+        deltas[(self, tenant_id)] += delta
+
+    def _db_insert_handler(self, mapper, _conn, target):
+        self._track_usage_delta(target, 1)
+
+    def _db_delete_handler(self, mapper, _conn, target):
+        self._track_usage_delta(target, -1)
+
     # Retry the operation if a duplicate entry exception is raised. This
     # can happen is two or more workers are trying to create a resource of a
     # give kind for the same tenant concurrently. Retrying the operation will
@@ -223,6 +299,8 @@ class TrackedResource(BaseResource):
         # Update quota usage
         usage_info = self._set_quota_usage(context, tenant_id, in_use)
 
+        # Pending deltas are already accounted for in the new usage value
+        self._committed_deltas.pop(tenant_id, None)
         self._dirty_tenants.discard(tenant_id)
         self._out_of_sync_tenants.discard(tenant_id)
         LOG.debug(("Unset dirty status for tenant:%(tenant_id)s on "
@@ -255,9 +333,12 @@ class TrackedResource(BaseResource):
         compatibility with the signature of the count method for
         CountableResource instances.
         """
-        # Load current usage data, setting a row-level lock on the DB
+        # Load current usage data, setting a row-level lock on the DB. Usage
+        # counters are updated atomically and do not need the lock.
+        usage_by_counters = cfg.CONF.QUOTAS.track_quota_usage_by_counters
         usage_info = quota_api.get_quota_usage_by_resource_and_tenant(
-            context, self.name, tenant_id, lock_for_update=True)
+            context, self.name, tenant_id,
+            lock_for_update=not usage_by_counters)
         # Always fetch reservations, as they are not tracked by usage counters
         reservations = quota_api.get_reservations_for_resources(
             context, tenant_id, [self.name])
@@ -294,14 +375,63 @@ class TrackedResource(BaseResource):
                        "Used quota:%(used)d."),
                       {'resource': self.name,
                        'used': usage_info.used})
-        return usage_info.used + reserved
+            return usage_info.used + reserved
+        # Add changes not yet applied to the usage counter, if any
+        pending = self._committed_deltas.get(tenant_id, 0)
+        return usage_info.used + pending + reserved
+
+    def reconcile(self, context):
+        """Align usage counters with the actual number of resources.
+
+        Only tenants which already have a usage record are considered.
+        Counters which are dirty are left alone, as they will be
+        recalculated anyway. A counter is only set if it did not change
+        since it was read, so that the deltas applied meanwhile by other
+        workers are not overwritten.
+        """
+        model = self._model_class
+        with db_api.autonested_transaction(context.session):
+            counts = dict(context.session.query(
+                model.tenant_id, sa.func.count()).group_by(model.tenant_id))
+            usages = quota_api.get_quota_usage_by_resource(context, self.name)
+        for usage in usages:
+            in_use = counts.get(usage.tenant_id, 0)
+            if (usage.dirty or usage.used == in_use or
+                    usage.tenant_id in self._committed_deltas):
+                continue
+            LOG.debug(("Reconciling usage counter for tenant:%(tenant_id)s "
+                       "on resource:%(resource)s from %(used)d to "
+                       "%(in_use)d"),
+                      {'tenant_id': usage.tenant_id, 'resource': self.name,
+                       'used': usage.used, 'in_use': in_use})
+            if not quota_api.set_quota_usage_if_unchanged(
+                    context, self.name, usage.tenant_id, in_use, usage.used):
+                LOG.debug(("Usage counter for tenant:%(tenant_id)s on "
+                           "resource:%(resource)s changed concurrently, "
+                           "not reconciling it"),
+                          {'tenant_id': usage.tenant_id,
+                           'resource': self.name})
 
     def register_events(self):
+        if cfg.CONF.QUOTAS.track_quota_usage_by_counters:
+            _register_session_events()
+            event.listen(self._model_class, 'after_insert',
+                         self._db_insert_handler)
+            event.listen(self._model_class, 'after_delete',
+                         self._db_delete_handler)
+            return
         event.listen(self._model_class, 'after_insert', self._db_event_handler)
         event.listen(self._model_class, 'after_delete', self._db_event_handler)
 
     def unregister_events(self):
         try:
+            if event.contains(self._model_class, 'after_insert',
+                              self._db_insert_handler):
+                event.remove(self._model_class, 'after_insert',
+                             self._db_insert_handler)
+                event.remove(self._model_class, 'after_delete',
+                             self._db_delete_handler)
+                return
             event.remove(self._model_class, 'after_insert',
                          self._db_event_handler)
             event.remove(self._model_class, 'after_delete',
@@ -12,9 +12,11 @@
 
 from oslo_config import cfg
 from oslo_log import log
+from oslo_service import loopingcall
 import six
 
-from neutron._i18n import _LI, _LW
+from neutron._i18n import _LE, _LI, _LW
+from neutron import context as n_context
 from neutron.quota import resource
 
 LOG = log.getLogger(__name__)
@@ -66,12 +68,13 @@ def set_resources_dirty(context):
 
     for res in get_all_resources().values():
         with context.session.begin(subtransactions=True):
-            if is_tracked(res.name) and res.dirty:
+            if is_tracked(res.name) and (res.dirty or res.pending_deltas):
                 res.mark_dirty(context)
 
 
 def resync_resource(context, resource_name, tenant_id):
-    if not cfg.CONF.QUOTAS.track_quota_usage:
+    if (not cfg.CONF.QUOTAS.track_quota_usage or
+            not cfg.CONF.QUOTAS.resync_quota_usage_on_list):
         return
 
     if is_tracked(resource_name):
@@ -80,6 +83,19 @@ def resync_resource(context, resource_name, tenant_id):
         res.resync(context, tenant_id)
 
 
+def reconcile_tracked_resources():
+    """Align the usage counters of tracked resources with actual usage."""
+    context = n_context.get_admin_context()
+    for res in get_all_resources().values():
+        if not is_tracked(res.name):
+            continue
+        try:
+            res.reconcile(context)
+        except Exception:
+            LOG.exception(_LE("Failed to reconcile quota usage for "
+                              "resource %s"), res.name)
+
+
 def mark_resources_dirty(f):
     """Decorator for functions which alter resource usage.
 
@@ -118,6 +134,7 @@ class tracked_resources(object):
                     resource_name,
                     self._tracked_resources[resource_name],
                     self._override)
+            registry.start_usage_reconciliation()
             return f(*args, **kwargs)
 
         return wrapper
@@ -148,6 +165,7 @@ class ResourceRegistry(object):
         self._resources = {}
         # Map usage tracked resources to the correspondent db model class
         self._tracked_resource_mappings = {}
+        self._reconcile_loop = None
 
     def __contains__(self, resource):
         return resource in self._resources
@@ -210,6 +228,27 @@ class ResourceRegistry(object):
         """
         return resource_name in self._tracked_resource_mappings
 
+    def start_usage_reconciliation(self):
+        """Periodically reconcile usage counters with actual resource usage.
+
+        This is a no-op unless usage is tracked by counters and a
+        reconciliation interval is configured, or if the periodic task is
+        already running.
+        """
+        interval = cfg.CONF.QUOTAS.quota_usage_reconcile_interval
+        if (self._reconcile_loop or interval <= 0 or
+                not cfg.CONF.QUOTAS.track_quota_usage or
+                not cfg.CONF.QUOTAS.track_quota_usage_by_counters):
+            return
+        self._reconcile_loop = loopingcall.FixedIntervalLoopingCall(
+            reconcile_tracked_resources)
+        self._reconcile_loop.start(interval=interval, initial_delay=interval)
+
+    def stop_usage_reconciliation(self):
+        if self._reconcile_loop:
+            self._reconcile_loop.stop()
+            self._reconcile_loop = None
+
     def register_resource(self, resource):
         if resource.name in self._resources:
             LOG.warn(_LW('%s is already registered'), resource.name)
@@ -233,6 +272,7 @@ class ResourceRegistry(object):
         for (res_name, res) in self._resources.items():
             if res_name in self._tracked_resource_mappings:
                 res.unregister_events()
+        self.stop_usage_reconciliation()
         self._resources.clear()
         self._tracked_resource_mappings.clear()
 
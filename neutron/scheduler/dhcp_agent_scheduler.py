@@ -20,12 +20,17 @@ import heapq
 from oslo_config import cfg
 from oslo_db import exception as db_exc
 from oslo_log import log as logging
+from oslo_utils import timeutils
+import sqlalchemy as sa
+from sqlalchemy import func
+from sqlalchemy import orm
 from sqlalchemy import sql
 
 from neutron._i18n import _LI, _LW
 from neutron.common import constants
 from neutron.db import agents_db
 from neutron.db import agentschedulers_db
+from neutron.db import models_v2
 from neutron.extensions import availability_zone as az_ext
 from neutron.scheduler import base_resource_filter
 from neutron.scheduler import base_scheduler
@@ -58,7 +63,7 @@ class AutoScheduler(object):
             dhcp_agents = query.all()
             for dhcp_agent in dhcp_agents:
                 if agents_db.AgentDbMixin.is_agent_down(
-                    dhcp_agent.heartbeat_timestamp):
+                    agents_db.AgentDbMixin.get_agent_heartbeat(dhcp_agent)):
                     LOG.warn(_LW('DHCP agent %s is not active'), dhcp_agent.id)
                     continue
                 for net_id in net_ids:
@@ -94,6 +99,100 @@ class WeightScheduler(base_scheduler.BaseWeightScheduler, AutoScheduler):
         super(WeightScheduler, self).__init__(DhcpFilter())
 
 
+class LeastNetworksScheduler(WeightScheduler):
+    """Allocate to the DHCP agents with the least number of networks bound.
+
+    The numbers of networks bound to the agents are kept in memory between
+    reloads from the database every dhcp_load_refresh_interval seconds,
+    and networks are found for auto scheduling with a single query per
+    agent.
+    """
+
+    def __init__(self):
+        super(LeastNetworksScheduler, self).__init__()
+        self.loads = DhcpAgentLoads()
+        self.resource_filter = LoadTrackingDhcpFilter(self.loads)
+
+    def select(self, plugin, context, resource_hostable_agents,
+               resource_hosted_agents, num_agents_needed):
+        chosen_agents = sorted(
+            resource_hostable_agents,
+            key=lambda agent: self.loads.get(context, agent.id))
+        return chosen_agents[0:num_agents_needed]
+
+    def auto_schedule_networks(self, plugin, context, host):
+        """Schedule non-hosted networks to the DHCP agent on the specified
+           host.
+        """
+        # a list of (agent, net_ids) tuples
+        bindings_to_add = []
+        with context.session.begin(subtransactions=True):
+            query = context.session.query(models_v2.Subnet.id)
+            query = query.filter(models_v2.Subnet.enable_dhcp == sql.true())
+            if not query.first():
+                LOG.debug('No non-hosted networks')
+                return False
+            query = context.session.query(agents_db.Agent)
+            query = query.filter(agents_db.Agent.agent_type ==
+                                 constants.AGENT_TYPE_DHCP,
+                                 agents_db.Agent.host == host,
+                                 agents_db.Agent.admin_state_up == sql.true())
+            for dhcp_agent in query:
+                if agents_db.AgentDbMixin.is_agent_down(
+                    agents_db.AgentDbMixin.get_agent_heartbeat(dhcp_agent)):
+                    LOG.warn(_LW('DHCP agent %s is not active'), dhcp_agent.id)
+                    continue
+                for net_id, az_hints in self._get_networks_to_schedule(
+                        context, dhcp_agent):
+                    az_hints = (az_ext.convert_az_string_to_list(az_hints) or
+                                cfg.CONF.default_availability_zones)
+                    if (az_hints and
+                        dhcp_agent['availability_zone'] not in az_hints):
+                        continue
+                    bindings_to_add.append((dhcp_agent, net_id))
+        # do it outside transaction so particular scheduling results don't
+        # make other to fail
+        for agent, net_id in bindings_to_add:
+            self.resource_filter.bind(context, [agent], net_id)
+        return True
+
+    def _get_networks_to_schedule(self, context, dhcp_agent):
+        """Return the networks the DHCP agent could be scheduled to host.
+
+        These are the networks with DHCP enabled on a subnet, which are not
+        hosted by the agent and are hosted by less than
+        dhcp_agents_per_network agents. Returns (id, availability zone
+        hints) tuples.
+        """
+        binding = agentschedulers_db.NetworkDhcpAgentBinding
+        dhcp_networks = context.session.query(models_v2.Subnet.network_id)
+        dhcp_networks = dhcp_networks.filter(
+            models_v2.Subnet.enable_dhcp == sql.true())
+        hosting_counts = context.session.query(
+            binding.network_id,
+            func.count(binding.dhcp_agent_id).label('count'))
+        hosting_counts = hosting_counts.group_by(
+            binding.network_id).subquery()
+        agent_binding = orm.aliased(binding)
+
+        network = models_v2.Network
+        query = context.session.query(network.id,
+                                      network.availability_zone_hints)
+        query = query.filter(network.id.in_(dhcp_networks))
+        query = query.outerjoin(
+            agent_binding,
+            sa.and_(agent_binding.network_id == network.id,
+                    agent_binding.dhcp_agent_id == dhcp_agent.id))
+        query = query.filter(agent_binding.network_id == sql.null())
+        query = query.outerjoin(
+            hosting_counts, hosting_counts.c.network_id == network.id)
+        query = query.filter(
+            sa.or_(hosting_counts.c.count == sql.null(),
+                   hosting_counts.c.count <
+                   cfg.CONF.dhcp_agents_per_network))
+        return query.all()
+
+
 class AZAwareWeightScheduler(WeightScheduler):
 
     def select(self, plugin, context, resource_hostable_agents,
@@ -163,6 +262,7 @@ class DhcpFilter(base_resource_filter.BaseResourceFilter):
                       {'network_id': network_id,
                        'agent_id': agent_id})
         super(DhcpFilter, self).bind(context, bound_agents, network_id)
+        return bound_agents
 
     def filter_agents(self, plugin, context, network):
         """Return the agents that can host the network.
@@ -241,3 +341,51 @@ class DhcpFilter(base_resource_filter.BaseResourceFilter):
         n_agents = min(len(hostable_dhcp_agents), n_agents)
         return {'n_agents': n_agents, 'hostable_agents': hostable_dhcp_agents,
                 'hosted_agents': hosted_agents}
+
+
+class LoadTrackingDhcpFilter(DhcpFilter):
+    """DHCP filter accounting for the networks it binds in DhcpAgentLoads."""
+
+    def __init__(self, loads):
+        self.loads = loads
+
+    def bind(self, context, agents, network_id):
+        bound_agents = super(LoadTrackingDhcpFilter, self).bind(
+            context, agents, network_id)
+        for agent in bound_agents:
+            self.loads.add(agent.id)
+        return bound_agents
+
+
+class DhcpAgentLoads(object):
+    """Numbers of networks hosted by the DHCP agents, cached in memory.
+
+    The numbers are counted in the database with a single query every
+    dhcp_load_refresh_interval seconds, and incremented in between as
+    networks are bound by this process. Networks removed from agents, or
+    bound by other processes, are accounted for on the next reload.
+    """
+
+    def __init__(self):
+        # agent id -> number of networks hosted by the agent
+        self._loads = {}
+        self._loaded_at = None
+
+    def _ensure_loaded(self, context):
+        if (self._loaded_at is not None and
+                not timeutils.is_older_than(
+                    self._loaded_at, cfg.CONF.dhcp_load_refresh_interval)):
+            return
+        binding = agentschedulers_db.NetworkDhcpAgentBinding
+        query = context.session.query(binding.dhcp_agent_id,
+                                      func.count(binding.network_id))
+        self._loads = dict(query.group_by(binding.dhcp_agent_id))
+        self._loaded_at = timeutils.utcnow()
+
+    def get(self, context, agent_id):
+        self._ensure_loaded(context)
+        return self._loads.get(agent_id, 0)
+
+    def add(self, agent_id):
+        if self._loaded_at is not None:
+            self._loads[agent_id] = self._loads.get(agent_id, 0) + 1
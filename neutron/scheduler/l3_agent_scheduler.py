@@ -267,6 +267,47 @@ class L3Scheduler(object):
             self.bind_router(context, router_id, chosen_agent)
         return chosen_agent
 
+    def plan_routers(self, plugin, context, routers):
+        """Choose an L3 agent for each router of a batch.
+
+        The active agents and their load are retrieved once for the whole
+        batch, and the routers planned on an agent are added to its load.
+        Only legacy routers are planned; HA and distributed routers are
+        left to the regular scheduling.
+
+        :returns: a dict mapping router ids to the chosen agents
+        """
+        routers = [router for router in routers
+                   if not router.get('ha') and not router.get('distributed')]
+        if not routers:
+            return {}
+        active_l3_agents = plugin.get_l3_agents(context, active=True)
+        if not active_l3_agents:
+            LOG.warn(_LW('No active L3 agents'))
+            return {}
+        loads = plugin.get_l3_agents_router_counts(
+            context, [agent['id'] for agent in active_l3_agents])
+        planned = {}
+        for router in routers:
+            candidates = self._get_planning_candidates(
+                plugin, context, router, active_l3_agents)
+            if not candidates:
+                LOG.warn(_LW('No L3 agents can host the router %s'),
+                         router['id'])
+                continue
+            chosen_agent = self._choose_planned_router_agent(candidates,
+                                                             loads)
+            loads[chosen_agent['id']] = loads.get(chosen_agent['id'], 0) + 1
+            planned[router['id']] = chosen_agent
+        return planned
+
+    def _get_planning_candidates(self, plugin, context, router, l3_agents):
+        return plugin.get_l3_agent_candidates(context, router, l3_agents)
+
+    def _choose_planned_router_agent(self, candidates, loads):
+        """Choose an agent from candidates given the planned loads."""
+        return min(candidates, key=lambda agent: loads.get(agent['id'], 0))
+
     @abc.abstractmethod
     def _choose_router_agent(self, plugin, context, candidates):
         """Choose an agent from candidates based on a specific policy."""
@@ -367,6 +408,9 @@ class ChanceScheduler(L3Scheduler):
     def _choose_router_agent(self, plugin, context, candidates):
         return random.choice(candidates)
 
+    def _choose_planned_router_agent(self, candidates, loads):
+        return random.choice(candidates)
+
     def _choose_router_agents_for_ha(self, plugin, context, candidates):
         num_agents = self._get_num_of_agents_for_ha(len(candidates))
         return random.sample(candidates, num_agents)
@@ -431,6 +475,15 @@ class AZLeastRoutersScheduler(LeastRoutersScheduler):
 
         return candidates
 
+    def _get_planning_candidates(self, plugin, context, router, l3_agents):
+        """Overwrite L3Scheduler's method to filter by availability zone."""
+        az_hints = self._get_az_hints(router)
+        if az_hints:
+            l3_agents = [agent for agent in l3_agents
+                         if agent['availability_zone'] in az_hints]
+        return super(AZLeastRoutersScheduler, self)._get_planning_candidates(
+            plugin, context, router, l3_agents)
+
     def get_ha_routers_l3_agents_counts(self, context, plugin, filters=None):
         """Overwrite L3Scheduler's method to filter by availability zone."""
         all_routers_agents = (
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import netaddr
 from oslo_config import cfg
 from oslo_db.sqlalchemy import session
 import testtools
@@ -73,7 +74,9 @@ class IpamTestCase(object):
         cfg.CONF.set_override('ipam_driver', 'internal')
         DB_PLUGIN_KLASS = 'neutron.db.db_base_plugin_v2.NeutronDbPluginV2'
         self.setup_coreplugin(DB_PLUGIN_KLASS)
-        self.ip_availability_range = ipam_models.IpamAvailabilityRange
+        # The reference IPAM driver allocates addresses straight from the
+        # allocation pools and does not maintain availability ranges
+        self.ip_availability_range = None
 
     def result_set_to_dicts(self, resultset, keys):
         dicts = []
@@ -89,12 +92,33 @@ class IpamTestCase(object):
         self.assertEqual(expected, actual)
 
     def assert_ip_avail_range_matches(self, expected):
+        if not self.ip_availability_range:
+            self.assert_ipam_alloc_matches(expected)
+            return
         result_set = self.cxt.session.query(
             self.ip_availability_range).all()
         keys = ['first_ip', 'last_ip']
         actual = self.result_set_to_dicts(result_set, keys)
         self.assertEqual(expected, actual)
 
+    def assert_ipam_alloc_matches(self, expected_avail_ranges):
+        """Check the allocations of the IPAM driver against free ranges.
+
+        The addresses of the allocation pools which are not in the expected
+        availability ranges must be allocated by the IPAM driver.
+        """
+        pools = netaddr.IPSet()
+        for pool in self.cxt.session.query(models_v2.IPAllocationPool):
+            pools.add(netaddr.IPRange(pool['first_ip'], pool['last_ip']))
+        available = netaddr.IPSet()
+        for avail_range in expected_avail_ranges:
+            available.add(netaddr.IPRange(avail_range['first_ip'],
+                                          avail_range['last_ip']))
+        allocated = netaddr.IPSet(
+            allocation['ip_address'] for allocation in
+            self.cxt.session.query(ipam_models.IpamAllocation)) & pools
+        self.assertEqual(pools - available, allocated)
+
     def assert_ip_alloc_pool_matches(self, expected):
         result_set = self.cxt.session.query(models_v2.IPAllocationPool).all()
         keys = ['first_ip', 'last_ip', 'subnet_id']
@@ -388,6 +388,86 @@ class TestDhcpAgent(base.BaseTestCase):
             self._test_sync_state_helper(known_net_ids, active_net_ids)
             w.assert_called_once_with()
 
+    def test_sync_state_bootstrap_pool_size(self):
+        cfg.CONF.set_override('bootstrap_sync_threads', 16)
+        with mock.patch.object(dhcp_agent.eventlet, 'GreenPool') as pool:
+            self._test_sync_state_helper([], ['a'])
+            pool.assert_called_once_with(16)
+
+    def test_sync_state_bootstrap_pool_size_default(self):
+        with mock.patch.object(dhcp_agent.eventlet, 'GreenPool') as pool,\
+                mock.patch.object(dhcp_agent.processutils,
+                                  'get_worker_count', return_value=32):
+            self._test_sync_state_helper([], ['a'])
+            pool.assert_called_once_with(32)
+
+    def test_sync_state_bootstrap_pool_size_default_few_cpus(self):
+        with mock.patch.object(dhcp_agent.eventlet, 'GreenPool') as pool,\
+                mock.patch.object(dhcp_agent.processutils,
+                                  'get_worker_count', return_value=2):
+            self._test_sync_state_helper([], ['a'])
+            pool.assert_called_once_with(4)
+
+    def test_sync_state_pool_size_after_bootstrap(self):
+        cfg.CONF.set_override('bootstrap_sync_threads', 16)
+        with mock.patch(DHCP_PLUGIN) as plug,\
+                mock.patch.object(dhcp_agent.eventlet, 'GreenPool') as pool:
+            plug.return_value.get_active_networks_info.return_value = []
+            dhcp = dhcp_agent.DhcpAgent(HOSTNAME)
+            dhcp.sync_state()
+            dhcp.sync_state()
+            self.assertEqual([mock.call(16), mock.call(4)],
+                             pool.call_args_list)
+
+    def test_sync_state_changed_networks_only(self):
+        cfg.CONF.set_override('sync_changed_networks_only', True)
+        changed_network = mock.Mock(id='c')
+        with mock.patch(DHCP_PLUGIN) as plug:
+            mock_plugin = mock.Mock()
+            mock_plugin.get_changed_networks_info.return_value = (
+                {'a': 'digest_a', 'c': 'digest_c'}, [changed_network])
+            plug.return_value = mock_plugin
+
+            dhcp = dhcp_agent.DhcpAgent(HOSTNAME)
+
+            attrs_to_mock = dict([(a, mock.DEFAULT)
+                                 for a in ['disable_dhcp_helper', 'cache',
+                                           'safe_configure_dhcp_for_network']])
+
+            with mock.patch.multiple(dhcp, **attrs_to_mock) as mocks,\
+                    mock.patch.object(
+                        dhcp_agent.utils, 'get_dhcp_network_digest',
+                        side_effect=lambda network: 'digest_%s' % network.id):
+                mocks['cache'].get_network_ids.return_value = ['a', 'b']
+                mocks['cache'].get_network_by_id.side_effect = (
+                    lambda network_id: mock.Mock(id=network_id))
+                dhcp.sync_state(['b'])
+
+                mock_plugin.get_changed_networks_info.assert_called_once_with(
+                    {'a': 'digest_a'})
+                mocks['disable_dhcp_helper'].assert_called_once_with('b')
+                configure = mocks['safe_configure_dhcp_for_network']
+                configure.assert_called_once_with(changed_network)
+
+    def test_sync_state_changed_networks_only_other_networks(self):
+        cfg.CONF.set_override('sync_changed_networks_only', True)
+        network = dhcp.NetModel(dict(fake_network,
+                                     ports=[fake_port1, fake_port2]))
+        with mock.patch(DHCP_PLUGIN) as plug:
+            mock_plugin = mock.Mock()
+            mock_plugin.get_changed_networks_info.return_value = (
+                {network.id: 'digest'}, [network])
+            plug.return_value = mock_plugin
+
+            dhcp = dhcp_agent.DhcpAgent(HOSTNAME)
+            dhcp.cache.put(fake_network)
+            with mock.patch.object(
+                    dhcp, 'safe_configure_dhcp_for_network') as configure:
+                dhcp.sync_state(['other_network'])
+        mock_plugin.get_changed_networks_info.assert_called_once_with(
+            {fake_network.id: utils.get_dhcp_network_digest(fake_network)})
+        self.assertFalse(configure.called)
+
     def test_sync_state_for_all_networks_plugin_error(self):
         with mock.patch(DHCP_PLUGIN) as plug:
             mock_plugin = mock.Mock()
@@ -1057,6 +1137,37 @@ class TestDhcpPluginApiProxy(base.BaseTestCase):
         self._test_dhcp_api('get_network_info', network_id='fake_id',
                             return_value=None)
 
+    def test_get_changed_networks_info(self):
+        ctxt = context.get_admin_context()
+        proxy = dhcp_agent.DhcpPluginApi('foo', ctxt, host='foo')
+        with mock.patch.object(proxy.client, 'call') as rpc_mock,\
+                mock.patch.object(proxy.client, 'prepare') as prepare_mock:
+            prepare_mock.return_value = proxy.client
+            rpc_mock.return_value = {
+                'digests': {'a': 'digest_a', 'b': 'digest_b'},
+                'networks': [{'id': 'b', 'subnets': [], 'ports': []}]}
+            digests, networks = proxy.get_changed_networks_info(
+                {'a': 'digest_a'})
+            prepare_mock.assert_called_once_with(version='1.4')
+            rpc_mock.assert_called_once_with(
+                ctxt, 'get_changed_networks_info',
+                network_digests={'a': 'digest_a'}, host='foo')
+        self.assertEqual({'a': 'digest_a', 'b': 'digest_b'}, digests)
+        self.assertEqual(['b'], [network.id for network in networks])
+        self.assertIsInstance(networks[0], dhcp.NetModel)
+
+    def test_get_changed_networks_info_unsupported(self):
+        ctxt = context.get_admin_context()
+        proxy = dhcp_agent.DhcpPluginApi('foo', ctxt, host='foo')
+        with mock.patch.object(proxy.client, 'prepare',
+                               side_effect=oslo_messaging.UnsupportedVersion(
+                                   '1.4')),\
+                mock.patch.object(proxy, 'get_active_networks_info',
+                                  return_value=[fake_network]):
+            digests, networks = proxy.get_changed_networks_info({})
+        self.assertIsNone(digests)
+        self.assertEqual([fake_network], networks)
+
     def test_create_dhcp_port(self):
         self._test_dhcp_api('create_dhcp_port', port='fake_port',
                             return_value=None, version='1.1')
@@ -1070,6 +1181,26 @@ class TestDhcpPluginApiProxy(base.BaseTestCase):
                             device_id='fake_id_2')
 
 
+class TestSyncTimings(base.BaseTestCase):
+
+    def test_stages(self):
+        timings = dhcp_agent.SyncTimings()
+        func = mock.Mock(return_value='result')
+        self.assertEqual('result', timings.timed('configure', func)(1, a=2))
+        func.assert_called_once_with(1, a=2)
+        with timings.stage('retrieve'):
+            pass
+        self.assertRaises(RuntimeError,
+                          timings.timed('configure', mock.Mock(
+                              side_effect=RuntimeError)))
+        self.assertEqual(['configure', 'retrieve'], list(timings.durations))
+        self.assertEqual(2, len(timings.durations['configure']))
+        report = str(timings)
+        self.assertIn('configure: 2 in', report)
+        self.assertIn('retrieve: 1 in', report)
+        self.assertIn('elapsed:', report)
+
+
 class TestNetworkCache(base.BaseTestCase):
     def test_put_network(self):
         nc = dhcp_agent.NetworkCache()
@@ -1179,6 +1310,26 @@ class TestNetworkCache(base.BaseTestCase):
         nc.put(fake_network)
         self.assertEqual(nc.get_port_by_id(fake_port1.id), fake_port1)
 
+    def test_get_port_by_id_unknown_port(self):
+        nc = dhcp_agent.NetworkCache()
+        nc.put(fake_network)
+        self.assertIsNone(nc.get_port_by_id(fake_port2.id))
+
+    def test_get_state(self):
+        fake_net = dhcp.NetModel(
+            dict(id='12345678-1234-5678-1234567890ab',
+                 tenant_id='aaaaaaaa-aaaa-aaaa-aaaaaaaaaaaa',
+                 subnets=[fake_subnet1],
+                 ports=[fake_port1]))
+        nc = dhcp_agent.NetworkCache()
+        nc.put(fake_net)
+        nc.put_port(fake_port2)
+        self.assertEqual({'networks': 1, 'subnets': 1, 'ports': 2},
+                         nc.get_state())
+        nc.remove_port(fake_port2)
+        self.assertEqual({'networks': 1, 'subnets': 1, 'ports': 1},
+                         nc.get_state())
+
 
 class FakePort1(object):
     id = 'eeeeeeee-eeee-eeee-eeee-eeeeeeeeeeee'
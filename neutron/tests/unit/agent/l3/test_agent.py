@@ -203,6 +203,33 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
         agent.enqueue_state_change(router.id, 'master')
         self.assertFalse(agent._update_metadata_proxy.call_count)
 
+    def test_keepalived_state_change_pipe_handle_line(self):
+        agent = mock.Mock()
+        pipe = ha.L3AgentKeepalivedStateChangePipe(agent, self.conf)
+        pipe.handle_line('router1 master\n')
+        agent.enqueue_state_change.assert_called_once_with('router1',
+                                                           'master')
+
+    def test_keepalived_state_change_pipe_handle_invalid_line(self):
+        agent = mock.Mock()
+        pipe = ha.L3AgentKeepalivedStateChangePipe(agent, self.conf)
+        pipe.handle_line('garbage\n')
+        pipe.handle_line('router1 unknown\n')
+        self.assertFalse(agent.enqueue_state_change.called)
+
+    def test_keepalived_state_change_pipe_setup(self):
+        pipe = ha.L3AgentKeepalivedStateChangePipe(mock.Mock(), self.conf)
+        with mock.patch.object(ha.agent_utils,
+                               'ensure_directory_exists_without_file'),\
+                mock.patch('os.mkfifo') as mkfifo:
+            pipe_path = pipe._setup()
+        mkfifo.assert_called_once_with(pipe_path, 0o600)
+        self.utils_replace_file.assert_called_once_with(
+            pipe.get_notify_script_path(self.conf), mock.ANY,
+            file_mode=0o755)
+        script = self.utils_replace_file.call_args[0][1]
+        self.assertIn(pipe_path, script)
+
     def test_periodic_sync_routers_task_raise_exception(self):
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
         self.plugin_api.get_router_ids.return_value = ['fake_id']
@@ -2146,6 +2173,31 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
         self.assertRaises(oslo_messaging.MessagingTimeout, l3_agent.L3NATAgent,
                           HOSTNAME, self.conf)
 
+    def test_get_arp_entries_by_subnet_fallback(self):
+        self.plugin_api.get_arp_entries_by_subnet.side_effect = (
+            oslo_messaging.RemoteError(exc_type='UnsupportedVersion'))
+        self.plugin_api.get_ports_by_subnet.return_value = [
+            {'mac_address': '00:11:22:33:44:55',
+             'device_owner': l3_constants.DEVICE_OWNER_DHCP,
+             'fixed_ips': [{'ip_address': '1.2.3.4',
+                            'subnet_id': 'subnet1'}]},
+            {'mac_address': '00:11:22:33:44:66',
+             'device_owner': l3_constants.DEVICE_OWNER_DVR_INTERFACE,
+             'fixed_ips': [{'ip_address': '1.2.3.1',
+                            'subnet_id': 'subnet1'}]}]
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        self.assertEqual(
+            [{'ip_address': '1.2.3.4', 'mac_address': '00:11:22:33:44:55'}],
+            agent.get_arp_entries_by_subnet('subnet1'))
+
+    def test_get_arp_entries_by_subnet_remote_error(self):
+        self.plugin_api.get_arp_entries_by_subnet.side_effect = (
+            oslo_messaging.RemoteError(exc_type='DBError'))
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        self.assertRaises(oslo_messaging.RemoteError,
+                          agent.get_arp_entries_by_subnet, 'subnet1')
+        self.assertFalse(self.plugin_api.get_ports_by_subnet.called)
+
     def test_external_gateway_removed_ext_gw_port_no_fip_ns(self):
         self.conf.set_override('state_path', '/tmp')
 
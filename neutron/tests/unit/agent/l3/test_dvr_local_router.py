@@ -219,6 +219,124 @@ class TestDvrRouterOperations(base.BaseTestCase):
         ri.fip_ns.local_subnets.allocate.assert_called_once_with(ri.router_id)
         # TODO(mrsmith): add more asserts
 
+    def _get_ip_batch_router(self, fips):
+        self.conf.set_override('dvr_ip_batch', True)
+        ri = self._create_router(mock.MagicMock())
+        ri.get_floating_ips = mock.Mock(return_value=fips)
+        ri.get_router_cidrs = mock.Mock(return_value=set())
+        ri.fip_ns = mock.Mock()
+        ri.fip_ns.get_name.return_value = 'fip-ns'
+        ri.fip_ns.get_int_device_name.return_value = 'fpr-dev'
+        ri.fip_ns.allocate_rule_priority.side_effect = [FIP_PRI, FIP_PRI + 1]
+        ri.rtr_fip_subnet = lla.LinkLocalAddressPair('169.254.30.42/31')
+        ri.dist_fip_count = 0
+        return ri
+
+    def _get_fip(self, floating_ip_address, fixed_ip_address):
+        return {'id': _uuid(),
+                'host': HOSTNAME,
+                'floating_ip_address': floating_ip_address,
+                'fixed_ip_address': fixed_ip_address,
+                'status': l3_constants.FLOATINGIP_STATUS_DOWN,
+                'floating_network_id': _uuid(),
+                'port_id': _uuid()}
+
+    @mock.patch.object(ip_lib, 'send_ip_addr_adv_notif')
+    @mock.patch.object(ip_lib, 'IPBatch')
+    @mock.patch.object(ip_lib, 'IPDevice')
+    @mock.patch.object(ip_lib, 'IPRule')
+    def test_process_floating_ip_addresses_ip_batch(self, mIPRule, mIPDevice,
+                                                    mIPBatch, mock_adv_notif):
+        fip = self._get_fip('15.1.2.3', '192.168.0.1')
+        ri = self._get_ip_batch_router([fip])
+        mIPDevice.return_value.name = 'rfp-dev'
+        batch = mIPBatch.return_value
+
+        def _execute():
+            self.assertEqual({}, ri.floating_ips_dict)
+        batch.execute.side_effect = _execute
+
+        fip_statuses = ri.process_floating_ip_addresses('rfp-dev')
+
+        self.assertEqual({fip['id']: l3_constants.FLOATINGIP_STATUS_ACTIVE},
+                         fip_statuses)
+        self.assertFalse(mIPRule.called)
+        mIPBatch.assert_has_calls([mock.call(ri.ns_name),
+                                   mock.call('fip-ns')], any_order=True)
+        batch.add_address.assert_called_once_with('rfp-dev', '15.1.2.3/32')
+        batch.add_rule.assert_called_once_with(
+            '192.168.0.1', table=16, priority=FIP_PRI)
+        batch.add_route.assert_called_once_with(
+            '15.1.2.3/32', via='169.254.30.42', device_name='fpr-dev')
+        self.assertEqual(2, batch.execute.call_count)
+        self.assertEqual({'15.1.2.3': FIP_PRI}, ri.floating_ips_dict)
+        self.assertEqual(1, ri.dist_fip_count)
+        self.assertEqual(1, mock_adv_notif.call_count)
+        self.assertIsNone(ri._fip_batches)
+        self.assertIsNone(ri._batched_fips)
+
+    @mock.patch.object(ip_lib, 'send_ip_addr_adv_notif')
+    @mock.patch.object(ip_lib, 'IPBatch')
+    @mock.patch.object(ip_lib, 'IPDevice')
+    @mock.patch.object(ip_lib, 'IPRule')
+    def test_process_floating_ip_addresses_ip_batch_failure(
+            self, mIPRule, mIPDevice, mIPBatch, mock_adv_notif):
+        fip1 = self._get_fip('15.1.2.3', '192.168.0.1')
+        fip2 = self._get_fip('15.1.2.4', '192.168.0.2')
+        ri = self._get_ip_batch_router([fip1, fip2])
+        mIPBatch.return_value.execute.side_effect = RuntimeError
+        device = mIPDevice.return_value
+        device.name = 'rfp-dev'
+        # the address of the first floating IP was added by the batch
+        ri.get_router_cidrs.side_effect = [set(), {'15.1.2.3/32'}]
+        device.addr.add.side_effect = RuntimeError
+
+        fip_statuses = ri.process_floating_ip_addresses('rfp-dev')
+
+        self.assertEqual(
+            {fip1['id']: l3_constants.FLOATINGIP_STATUS_ACTIVE,
+             fip2['id']: l3_constants.FLOATINGIP_STATUS_ERROR},
+            fip_statuses)
+        device.addr.add.assert_called_once_with('15.1.2.4/32')
+        mIPRule.return_value.rule.add.assert_called_once_with(
+            ip='192.168.0.1', table=16, priority=FIP_PRI)
+        device.route.add_route.assert_called_once_with('15.1.2.3/32',
+                                                       '169.254.30.42')
+        ri.fip_ns.deallocate_rule_priority.assert_called_once_with(
+            '15.1.2.4')
+        self.assertEqual({'15.1.2.3': FIP_PRI}, ri.floating_ips_dict)
+        self.assertEqual(1, ri.dist_fip_count)
+
+    @mock.patch.object(ip_lib, 'send_ip_addr_adv_notif')
+    @mock.patch.object(ip_lib, 'IPBatch')
+    @mock.patch.object(ip_lib, 'IPWrapper')
+    @mock.patch.object(ip_lib, 'IPDevice')
+    @mock.patch.object(ip_lib, 'IPRule')
+    def test_process_floating_ip_addresses_ip_batch_swapped_fip(
+            self, mIPRule, mIPDevice, mIPWrapper, mIPBatch, mock_adv_notif):
+        fip = self._get_fip('15.1.2.3', '192.168.0.1')
+        ri = self._get_ip_batch_router([fip])
+        mIPDevice.return_value.name = 'rfp-dev'
+        # The only floating IP of the router is replaced by another one
+        ri.get_router_cidrs.return_value = {'15.1.2.5/32'}
+        ri.floating_ips_dict['15.1.2.5'] = FIP_PRI - 1
+        ri.dist_fip_count = 1
+
+        def _execute():
+            self.assertFalse(mIPWrapper.return_value.del_veth.called)
+        mIPBatch.return_value.execute.side_effect = _execute
+
+        fip_statuses = ri.process_floating_ip_addresses('rfp-dev')
+
+        self.assertEqual({fip['id']: l3_constants.FLOATINGIP_STATUS_ACTIVE},
+                         fip_statuses)
+        self.assertFalse(mIPWrapper.return_value.del_veth.called)
+        self.assertFalse(ri.fip_ns.unsubscribe.called)
+        self.assertFalse(ri.fip_ns.local_subnets.release.called)
+        self.assertIsNotNone(ri.rtr_fip_subnet)
+        self.assertEqual(FIP_PRI, ri.floating_ips_dict['15.1.2.3'])
+        self.assertEqual(1, ri.dist_fip_count)
+
     @mock.patch.object(ip_lib, 'IPWrapper')
     @mock.patch.object(ip_lib, 'IPDevice')
     @mock.patch.object(ip_lib, 'IPRule')
@@ -375,6 +493,69 @@ class TestDvrRouterOperations(base.BaseTestCase):
         ri._set_subnet_arp_info(subnet_id)
         self.mock_ip_dev.neigh.add.never_called()
 
+    def test__set_subnet_arp_info_ip_batch(self):
+        self.conf.set_override('dvr_ip_batch', True)
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        router = l3_test_common.prepare_router_data(num_internal_ports=2)
+        router['distributed'] = True
+        ri = dvr_router.DvrLocalRouter(
+            agent, HOSTNAME, router['id'], router, **self.ri_kwargs)
+        ports = ri.router.get(l3_constants.INTERFACE_KEY, [])
+        subnet_id = l3_test_common.get_subnet_id(ports[0])
+        self.plugin_api.get_arp_entries_by_subnet.return_value = [
+            {'ip_address': '1.2.3.4', 'mac_address': '00:11:22:33:44:55'},
+            {'ip_address': '1.2.3.5', 'mac_address': '00:11:22:33:44:66'},
+            {'ip_address': '1.2.3.6', 'mac_address': '00:11:22:33:44:77'},
+            {'ip_address': '1.2.3.7', 'mac_address': '00:11:22:33:44:88'}]
+        self.mock_ip_dev.neigh.dump.return_value = [
+            {'ip_address': '1.2.3.4', 'mac_address': '00:11:22:33:44:55',
+             'state': 'PERMANENT'},
+            {'ip_address': '1.2.3.5', 'mac_address': '00:11:22:33:44:00',
+             'state': 'PERMANENT'},
+            {'ip_address': '1.2.3.7', 'mac_address': '00:11:22:33:44:88',
+             'state': 'STALE'}]
+        interface_name = ri.get_internal_device_name(ports[0]['id'])
+
+        with mock.patch.object(ip_lib, 'IPBatch') as ip_batch, \
+                mock.patch.object(
+                    ri, '_process_arp_cache_for_internal_port') as parp:
+            ri._set_subnet_arp_info(subnet_id)
+
+        self.assertFalse(self.plugin_api.get_ports_by_subnet.called)
+        self.assertFalse(self.mock_ip_dev.neigh.add.called)
+        self.mock_ip_dev.neigh.dump.assert_called_once_with(4)
+        batch = ip_batch.return_value
+        batch.add_neigh.assert_has_calls([
+            mock.call(interface_name, '1.2.3.5', '00:11:22:33:44:66'),
+            mock.call(interface_name, '1.2.3.6', '00:11:22:33:44:77'),
+            mock.call(interface_name, '1.2.3.7', '00:11:22:33:44:88')])
+        self.assertEqual(3, batch.add_neigh.call_count)
+        batch.execute.assert_called_once_with()
+        parp.assert_called_once_with(subnet_id)
+
+    def test__set_subnet_arp_info_ip_batch_no_device(self):
+        self.conf.set_override('dvr_ip_batch', True)
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        router = l3_test_common.prepare_router_data(num_internal_ports=2)
+        router['distributed'] = True
+        ri = dvr_router.DvrLocalRouter(
+            agent, HOSTNAME, router['id'], router, **self.ri_kwargs)
+        ports = ri.router.get(l3_constants.INTERFACE_KEY, [])
+        subnet_id = l3_test_common.get_subnet_id(ports[0])
+        self.plugin_api.get_arp_entries_by_subnet.return_value = [
+            {'ip_address': '1.2.3.4', 'mac_address': '00:11:22:33:44:55'}]
+        self.mock_ip_dev.exists.return_value = False
+
+        with mock.patch.object(ip_lib, 'IPBatch') as ip_batch:
+            ri._set_subnet_arp_info(subnet_id)
+
+        self.assertFalse(ip_batch.called)
+        self.assertIn(dvr_router.Arp_entry(ip='1.2.3.4',
+                                           mac='00:11:22:33:44:55',
+                                           subnet_id=subnet_id,
+                                           operation='add'),
+                      ri._pending_arp_set)
+
     def test_add_arp_entry(self):
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
         router = l3_test_common.prepare_router_data(num_internal_ports=2)
@@ -68,3 +68,26 @@ class TestBasicRouterOperations(base.BaseTestCase):
                         'gateway_ip': '30.0.0.1'})
         ri._add_default_gw_virtual_route(ex_gw_port, 'qg-abc')
         self.assertEqual(1, len(mock_instance.virtual_routes.gateway_routes))
+
+    def test_spawn_state_change_monitor_with_notify_scripts(self):
+        ri = self._create_router()
+        self.agent_conf.ha_keepalived_notify_scripts = True
+        process_monitor = mock.Mock()
+        with mock.patch.object(ri, '_get_state_change_monitor_process_manager'
+                               ) as pm:
+            ri.spawn_state_change_monitor(process_monitor)
+        self.assertFalse(pm.return_value.enable.called)
+        self.assertFalse(process_monitor.register.called)
+        pm.return_value.disable.assert_called_once_with()
+
+    def test_spawn_state_change_monitor(self):
+        ri = self._create_router()
+        self.agent_conf.ha_keepalived_notify_scripts = False
+        process_monitor = mock.Mock()
+        with mock.patch.object(ri, '_get_state_change_monitor_process_manager'
+                               ) as pm:
+            ri.spawn_state_change_monitor(process_monitor)
+        pm.return_value.enable.assert_called_once_with()
+        process_monitor.register.assert_called_once_with(
+            self.router_id, ha_router.IP_MONITOR_PROCESS_SERVICE,
+            pm.return_value)
@@ -2115,3 +2115,37 @@ class TestDictModel(base.BaseTestCase):
     def test_string_representation_network(self):
         net = dhcp.DictModel({'id': 'id', 'name': 'myname'})
         self.assertEqual('id=id, name=myname', str(net))
+
+
+class TestPortList(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestPortList, self).setUp()
+        self.port1 = dhcp.DictModel({'id': 'id1', 'mac_address': 'mac1'})
+        self.port2 = dhcp.DictModel({'id': 'id2', 'mac_address': 'mac2'})
+        self.ports = dhcp.PortList([self.port1, self.port2])
+
+    def test_iteration_keeps_order(self):
+        self.assertEqual([self.port1, self.port2], list(self.ports))
+        self.assertEqual(self.port2, self.ports[1])
+        self.assertEqual(2, len(self.ports))
+
+    def test_get(self):
+        self.assertEqual(self.port2, self.ports.get('id2'))
+        self.assertIsNone(self.ports.get('id3'))
+
+    def test_put_replaces_port_with_same_id(self):
+        new_port1 = dhcp.DictModel({'id': 'id1', 'mac_address': 'mac3'})
+        self.ports.put(new_port1)
+        self.assertEqual([new_port1, self.port2], self.ports)
+        self.assertNotIn(self.port1, self.ports)
+
+    def test_remove(self):
+        self.ports.remove(self.port1)
+        self.assertEqual([self.port2], self.ports)
+        self.assertRaises(ValueError, self.ports.remove, self.port1)
+
+    def test_net_model_indexes_ports(self):
+        net = dhcp.NetModel({'id': 'net_id', 'ports': [{'id': 'id1'}]})
+        self.assertIsInstance(net.ports, dhcp.PortList)
+        self.assertEqual('id1', net.ports.get('id1').id)
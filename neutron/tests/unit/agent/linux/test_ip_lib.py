@@ -667,6 +667,19 @@ class TestIpRuleCommand(TestIPCmdBase):
         actual = self.rule_cmd._make_canonical(6, {'fwmark': (0x400, 0xffff)})
         self.assertEqual({'fwmark': '0x400/0xffff', 'type': 'unicast'}, actual)
 
+    def test_get_canonical_rule(self):
+        actual = self.rule_cmd.get_canonical_rule('192.168.45.100',
+                                                  lookup=2, priority=100)
+        self.assertEqual({'from': '192.168.45.100', 'table': '2',
+                          'priority': '100', 'type': 'unicast'}, actual)
+
+    def test_get_rule_args(self):
+        actual = self.rule_cmd.get_rule_args(
+            'add', {'from': '192.168.45.100', 'table': '2',
+                    'priority': '100', 'type': 'unicast'})
+        self.assertEqual(('add', 'from', '192.168.45.100', 'priority', '100',
+                          'table', '2', 'type', 'unicast'), actual)
+
     def test_add_rule_v4(self):
         self._test_add_rule('192.168.45.100', 2, 100)
 
@@ -1295,6 +1308,77 @@ class TestIpNeighCommand(TestIPCmdBase):
         self.neigh_cmd.flush(4, '192.168.0.1')
         self._assert_sudo([4], ('flush', 'to', '192.168.0.1'))
 
+    def test_dump(self):
+        self.parent._as_root.return_value = (
+            '192.168.45.100 lladdr CC:DD:EE:FF:AB:CD PERMANENT\n'
+            '192.168.45.101  FAILED\n'
+            '192.168.45.1 lladdr 00:11:22:33:44:55 REACHABLE\n')
+        self.assertEqual(
+            [{'ip_address': '192.168.45.100',
+              'mac_address': 'cc:dd:ee:ff:ab:cd',
+              'state': 'PERMANENT'},
+             {'ip_address': '192.168.45.1',
+              'mac_address': '00:11:22:33:44:55',
+              'state': 'REACHABLE'}],
+            self.neigh_cmd.dump(4))
+        self._assert_sudo([4], ('show', 'dev', 'tap0'))
+
+
+class TestIPBatch(base.BaseTestCase):
+    def setUp(self):
+        super(TestIPBatch, self).setUp()
+        self.execute = mock.patch.object(ip_lib.utils, 'execute').start()
+        self.batch = ip_lib.IPBatch(namespace='ns')
+        self.list_rules = mock.patch.object(
+            self.batch._ip_rule.rule, 'list_rules', return_value=[]).start()
+
+    def _assert_batch(self, lines):
+        self.execute.assert_called_once_with(
+            ['ip', 'netns', 'exec', 'ns', 'ip', '-force', '-batch', '-'],
+            process_input='\n'.join(lines) + '\n',
+            run_as_root=True, log_fail_as_error=True)
+
+    def test_execute_empty(self):
+        self.assertIsNone(self.batch.execute())
+        self.assertFalse(self.execute.called)
+
+    def test_execute(self):
+        self.batch.add_address('rfp-1', '10.0.0.1/32')
+        self.batch.add_route('10.0.0.1/32', via='169.254.31.28',
+                             device_name='fpr-1')
+        self.batch.add_neigh('qr-1', '10.1.0.5', 'cc:dd:ee:ff:ab:cd')
+        self.batch.delete_neigh('qr-1', '10.1.0.6', 'cc:dd:ee:ff:ab:ce')
+        self.assertEqual(4, len(self.batch))
+        self.batch.execute()
+        self._assert_batch(
+            ['-4 addr add 10.0.0.1/32 scope global dev rfp-1 '
+             'brd 10.0.0.1',
+             '-4 route replace 10.0.0.1/32 via 169.254.31.28 dev fpr-1',
+             '-4 neigh replace 10.1.0.5 lladdr cc:dd:ee:ff:ab:cd '
+             'nud permanent dev qr-1',
+             '-4 neigh del 10.1.0.6 lladdr cc:dd:ee:ff:ab:ce dev qr-1'])
+        self.assertEqual(0, len(self.batch))
+
+    def test_add_rule(self):
+        self.batch.add_rule('10.1.0.5', table=16, priority=32768)
+        self.batch.add_rule('10.1.0.5', table=16, priority=32768)
+        self.batch.add_rule('10.1.0.6', table=16, priority=32769)
+        self.batch.execute()
+        self.list_rules.assert_called_once_with(4)
+        self._assert_batch(
+            ['-4 rule add from 10.1.0.5 priority 32768 table 16 '
+             'type unicast',
+             '-4 rule add from 10.1.0.6 priority 32769 table 16 '
+             'type unicast'])
+
+    def test_add_rule_exists(self):
+        self.list_rules.return_value = [
+            {'from': '10.1.0.5', 'priority': '32768', 'table': '16',
+             'type': 'unicast'}]
+        self.batch.add_rule('10.1.0.5', table=16, priority=32768)
+        self.batch.execute()
+        self.assertFalse(self.execute.called)
+
 
 class TestArpPing(TestIPCmdBase):
     @mock.patch.object(ip_lib, 'IPWrapper')
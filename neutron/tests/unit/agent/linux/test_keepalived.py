@@ -12,6 +12,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import mock
 import testtools
 
 from neutron.agent.linux import keepalived
@@ -312,6 +313,26 @@ vrrp_instance VR_2 {
             'MASTER', 'eth0', 1, ['169.254.192.0/18'])
         self.assertEqual(expected, '\n'.join(instance.build_config()))
 
+    def test_build_config_notify_script(self):
+        expected = """vrrp_instance VR_1 {
+    state MASTER
+    interface eth0
+    virtual_router_id 1
+    priority 50
+    garp_master_repeat 5
+    garp_master_refresh 10
+    virtual_ipaddress {
+        169.254.0.1/24 dev eth0
+    }
+    notify_master "/notify r1 /state master"
+    notify_backup "/notify r1 /state backup"
+    notify_fault "/notify r1 /state fault"
+}"""
+        instance = keepalived.KeepalivedInstance(
+            'MASTER', 'eth0', 1, ['169.254.192.0/18'],
+            notify_script='/notify r1 /state')
+        self.assertEqual(expected, '\n'.join(instance.build_config()))
+
 
 class KeepalivedVipAddressTestCase(base.BaseTestCase):
     def test_vip_with_scope(self):
@@ -339,3 +360,92 @@ class KeepalivedVirtualRouteTestCase(base.BaseTestCase):
     def test_virtual_route_without_dev(self):
         route = keepalived.KeepalivedVirtualRoute('50.0.0.0/8', '1.2.3.4')
         self.assertEqual('50.0.0.0/8 via 1.2.3.4', route.build_config())
+
+
+class KeepalivedManagerTestCase(base.BaseTestCase,
+                                KeepalivedConfBaseMixin):
+    def setUp(self):
+        super(KeepalivedManagerTestCase, self).setUp()
+        self.config = self._get_config()
+        self.batcher = mock.Mock()
+        self.manager = keepalived.KeepalivedManager(
+            'router1', self.config, mock.Mock(),
+            conf_path=self.get_default_temp_dir().path,
+            reload_batcher=self.batcher)
+        self.pm = mock.Mock()
+        mock.patch.object(self.manager, 'get_process',
+                          return_value=self.pm).start()
+        mock.patch.object(self.manager, '_get_vrrp_process').start()
+        self.replace_file = mock.patch(
+            'neutron.common.utils.replace_file').start()
+
+    def test_spawn_not_active(self):
+        self.pm.active = False
+        self.manager.spawn()
+        self.pm.enable.assert_called_once_with()
+        self.assertTrue(self.replace_file.called)
+        self.assertFalse(self.batcher.queue_reload.called)
+
+    def test_spawn_config_changed_queues_reload(self):
+        self.pm.active = True
+        with mock.patch.object(self.manager, 'get_conf_on_disk',
+                               return_value='old config'):
+            self.manager.spawn()
+        self.assertTrue(self.replace_file.called)
+        self.batcher.queue_reload.assert_called_once_with(self.pm)
+        self.assertFalse(self.pm.reload_cfg.called)
+
+    def test_spawn_config_changed_without_batcher(self):
+        self.pm.active = True
+        self.manager.reload_batcher = None
+        with mock.patch.object(self.manager, 'get_conf_on_disk',
+                               return_value='old config'):
+            self.manager.spawn()
+        self.pm.reload_cfg.assert_called_once_with()
+
+    def test_spawn_config_unchanged_skips_write_and_reload(self):
+        self.pm.active = True
+        with mock.patch.object(self.manager, 'get_conf_on_disk',
+                               return_value=self.config.get_config_str()):
+            self.manager.spawn()
+        self.assertFalse(self.replace_file.called)
+        self.assertFalse(self.batcher.queue_reload.called)
+        self.assertFalse(self.pm.reload_cfg.called)
+        self.assertTrue(self.manager.process_monitor.register.called)
+
+
+class KeepalivedReloadBatcherTestCase(base.BaseTestCase):
+    def setUp(self):
+        super(KeepalivedReloadBatcherTestCase, self).setUp()
+        self.execute = mock.patch(
+            'neutron.agent.linux.utils.execute').start()
+        self.batcher = keepalived.KeepalivedReloadBatcher()
+
+    def _get_process_manager(self, pid, active=True):
+        return mock.Mock(pid=pid, active=active, uuid='router-%s' % pid)
+
+    def test_reload_signals_each_process_once(self):
+        pm1 = self._get_process_manager(1)
+        pm2 = self._get_process_manager(2)
+        self.batcher._reload([pm1, pm2, pm1])
+        self.assertEqual(
+            [mock.call(['kill', '-HUP', 1], run_as_root=True),
+             mock.call(['kill', '-HUP', 2], run_as_root=True)],
+            self.execute.call_args_list)
+
+    def test_reload_skips_inactive_process(self):
+        self.batcher._reload([self._get_process_manager(1, active=False),
+                              self._get_process_manager(None)])
+        self.assertFalse(self.execute.called)
+
+    def test_reload_failure_does_not_stop_batch(self):
+        self.execute.side_effect = [RuntimeError, None]
+        self.batcher._reload([self._get_process_manager(1),
+                              self._get_process_manager(2)])
+        self.assertEqual(2, self.execute.call_count)
+
+    def test_queue_reload(self):
+        with mock.patch.object(self.batcher._notifier,
+                               'queue_event') as queue_event:
+            self.batcher.queue_reload(mock.sentinel.pm)
+        queue_event.assert_called_once_with(mock.sentinel.pm)
@@ -76,6 +76,46 @@ class TestDhcpRpcCallback(base.BaseTestCase):
                     {'id': 'b', 'subnets': [subnet], 'ports': []}]
         self.assertEqual(expected, networks)
 
+    def test_get_changed_networks_info(self):
+        self.plugin.get_networks.return_value = [{'id': 'a'}, {'id': 'b'}]
+        subnet = {'id': 's', 'network_id': 'b', 'enable_dhcp': True}
+        self.plugin.get_subnets.return_value = [subnet]
+        dhcp_port = {'id': 'p', 'network_id': 'a', 'fixed_ips': []}
+        get_dhcp_ports = mock.patch.object(
+            self.callbacks, '_get_dhcp_ports',
+            return_value=[dhcp_port]).start()
+        port = dict(dhcp_port, status='ACTIVE')
+        self.plugin.get_ports.return_value = [port]
+        result = self.callbacks.get_changed_networks_info(
+            mock.Mock(), host='host', network_digests={})
+        digests = result['digests']
+        self.assertEqual(set(['a', 'b']), set(digests))
+        self.assertEqual(2, len(result['networks']))
+        get_dhcp_ports.assert_called_once_with(mock.ANY, ['a', 'b'])
+
+        self.plugin.get_networks.return_value = [{'id': 'a'}, {'id': 'b'}]
+        self.plugin.get_ports.return_value = []
+        result = self.callbacks.get_changed_networks_info(
+            mock.Mock(), host='host',
+            network_digests={'a': digests['a'], 'b': 'outdated'})
+        self.assertEqual(digests, result['digests'])
+        self.assertEqual([{'id': 'b', 'subnets': [subnet], 'ports': []}],
+                         result['networks'])
+        self.plugin.get_ports.assert_called_with(
+            mock.ANY, filters={'network_id': ['b']})
+
+    def test_get_changed_networks_info_unchanged(self):
+        self.plugin.get_networks.return_value = [{'id': 'a'}]
+        self.plugin.get_subnets.return_value = []
+        mock.patch.object(self.callbacks, '_get_dhcp_ports',
+                          return_value=[]).start()
+        digest = utils.get_dhcp_network_digest(
+            {'id': 'a', 'subnets': [], 'ports': []})
+        result = self.callbacks.get_changed_networks_info(
+            mock.Mock(), host='host', network_digests={'a': digest})
+        self.assertEqual({'digests': {'a': digest}, 'networks': []}, result)
+        self.assertFalse(self.plugin.get_ports.called)
+
     def _test__port_action_with_failures(self, exc=None, action=None):
         port = {
             'network_id': 'foo_network_id',
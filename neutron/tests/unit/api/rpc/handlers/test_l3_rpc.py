@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import mock
 from oslo_config import cfg
 
 from neutron.api.rpc.handlers import l3_rpc
@@ -64,3 +65,24 @@ class TestL3RpcCallback(testlib_api.SqlTestCase):
         updated_subnet = res[0]
         self.assertEqual(updated_subnet['cidr'], data[subnet['id']])
         self.assertEqual(updated_subnet['allocation_pools'], allocation_pools)
+
+    def test_get_arp_entries_by_subnet(self):
+        ports = [{'mac_address': 'fa:16:3e:00:00:01',
+                  'device_owner': 'compute:nova',
+                  'fixed_ips': [{'subnet_id': 'subnet1',
+                                 'ip_address': '10.0.0.5'},
+                                {'subnet_id': 'subnet2',
+                                 'ip_address': '10.0.1.5'}]},
+                 {'mac_address': 'fa:16:3e:00:00:02',
+                  'device_owner': constants.DEVICE_OWNER_DVR_INTERFACE,
+                  'fixed_ips': [{'subnet_id': 'subnet1',
+                                 'ip_address': '10.0.0.1'}]}]
+        with mock.patch.object(self.plugin, 'get_ports',
+                               return_value=ports) as get_ports:
+            res = self.callbacks.get_arp_entries_by_subnet(
+                self.ctx, subnet_id='subnet1')
+        get_ports.assert_called_once_with(
+            self.ctx, filters={'fixed_ips': {'subnet_id': ['subnet1']}},
+            fields=['mac_address', 'fixed_ips', 'device_owner'])
+        self.assertEqual([{'ip_address': '10.0.0.5',
+                           'mac_address': 'fa:16:3e:00:00:01'}], res)
@@ -621,6 +621,38 @@ class JSONV2TestCase(APIv2TestBase, testlib_api.WebTestCase):
         params['page_reverse'] = ['True']
         self.assertEqual(urlparse.parse_qs(url.query), params)
 
+    def _setup_streaming(self, nets):
+        cfg.CONF.set_override('collection_stream_chunk_size', 2)
+        instance = self.plugin.return_value
+        instance._NeutronPluginBaseV2__native_streaming_support = True
+        instance.get_networks_iter = mock.Mock(return_value=iter(nets))
+        self.api = webtest.TestApp(router.APIRouter())
+        policy.init()
+        return instance
+
+    def _get_stream_nets(self, count):
+        return [{'id': _uuid(), 'name': 'net%d' % i, 'admin_state_up': True,
+                 'status': "ACTIVE", 'tenant_id': '', 'shared': False,
+                 'subnets': []} for i in range(count)]
+
+    def test_list_streaming(self):
+        nets = self._get_stream_nets(5)
+        instance = self._setup_streaming(nets)
+        res = self.api.get(_get_path('networks', fmt=self.fmt))
+        self.assertEqual({'networks': nets}, self.deserialize(res))
+        self.assertEqual(2, instance.get_networks_iter.call_args[1][
+            'chunk_size'])
+        self.assertFalse(instance.get_networks.called)
+
+    def test_list_streaming_not_used_with_limit(self):
+        nets = self._get_stream_nets(2)
+        instance = self._setup_streaming(nets)
+        instance.get_networks.return_value = nets
+        res = self.api.get(_get_path('networks'),
+                           params={'limit': ['2']}).json
+        self.assertEqual(nets, res['networks'])
+        self.assertFalse(instance.get_networks_iter.called)
+
     def test_list_pagination_with_last_page(self):
         id = str(_uuid())
         input_dict = {'id': id,
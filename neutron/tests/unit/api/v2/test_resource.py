@@ -290,6 +290,48 @@ class ResourceTestCase(base.BaseTestCase):
         res = resource.delete('', extra_environ=environ)
         self.assertEqual(res.status_int, 204)
 
+    @staticmethod
+    def _get_items(count, exc_raised):
+        for i in range(count):
+            yield {'id': i}
+        raise exc_raised
+
+    def test_stream(self):
+        controller = mock.MagicMock()
+        controller.test = lambda request: wsgi.CollectionStream(
+            'foos', [{'id': i} for i in range(3)], 2)
+        resource = webtest.TestApp(wsgi_resource.Resource(controller))
+        environ = {'wsgiorg.routing_args': (None, {'action': 'test'})}
+        res = resource.get('', extra_environ=environ)
+        self.assertEqual(200, res.status_int)
+        self.assertEqual({'foos': [{'id': 0}, {'id': 1}, {'id': 2}]},
+                         res.json)
+
+    def test_stream_first_chunk_error(self):
+        controller = mock.MagicMock()
+        controller.test = lambda request: wsgi.CollectionStream(
+            'foos', self._get_items(1, n_exc.NotAuthorized()), 2)
+        faults = {n_exc.NotAuthorized: exc.HTTPForbidden}
+        resource = webtest.TestApp(wsgi_resource.Resource(controller,
+                                                          faults))
+        environ = {'wsgiorg.routing_args': (None, {'action': 'test'})}
+        res = resource.get('', extra_environ=environ, expect_errors=True)
+        self.assertEqual(exc.HTTPForbidden.code, res.status_int)
+        self.assertEqual('NotAuthorized', res.json['NeutronError']['type'])
+
+    def test_stream_later_error_aborts(self):
+        serializer = wsgi.JSONDictSerializer()
+        stream = wsgi.CollectionStream(
+            'foos', self._get_items(3, ValueError()), 2)
+        with mock.patch.object(wsgi_resource, 'LOG') as log:
+            app_iter = wsgi_resource._start_stream(
+                'test', serializer.serialize_stream(stream))
+            self.assertFalse(log.exception.called)
+            self.assertEqual(b'{"foos": [', next(app_iter))
+            self.assertEqual(b'{"id": 0}, {"id": 1}', next(app_iter))
+            self.assertRaises(ValueError, list, app_iter)
+        self.assertTrue(log.exception.called)
+
     def _test_error_log_level(self, expected_webob_exc, expect_log_info=False,
                               use_fault_map=True, exc_raised=None):
         if not exc_raised:
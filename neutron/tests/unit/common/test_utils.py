@@ -739,3 +739,47 @@ class TestSafeDecodeUtf8(base.BaseTestCase):
         s = bytes('test-py2', 'utf_16')
         decoded_str = utils.safe_decode_utf8(s)
         self.assertIsInstance(decoded_str, six.text_type)
+
+
+class TestGetDhcpNetworkDigest(base.BaseTestCase):
+
+    def _get_network(self, **port_attrs):
+        subnet = {'id': 'subnet1', 'enable_dhcp': True, 'ip_version': 4,
+                  'cidr': '10.0.0.0/24', 'gateway_ip': '10.0.0.1',
+                  'host_routes': []}
+        port1 = {'id': 'port1', 'mac_address': 'aa:bb:cc:dd:ee:01',
+                 'status': 'ACTIVE',
+                 'fixed_ips': [{'subnet_id': 'subnet1',
+                                'ip_address': '10.0.0.2'}]}
+        port1.update(port_attrs)
+        port2 = {'id': 'port2', 'mac_address': 'aa:bb:cc:dd:ee:02',
+                 'fixed_ips': [{'subnet_id': 'subnet1',
+                                'ip_address': '10.0.0.3'}]}
+        return {'id': 'net1', 'subnets': [subnet], 'ports': [port1, port2]}
+
+    def test_digest_ignores_ports_order(self):
+        network = self._get_network()
+        reordered = dict(network, ports=network['ports'][::-1])
+        self.assertEqual(utils.get_dhcp_network_digest(network),
+                         utils.get_dhcp_network_digest(reordered))
+
+    def test_digest_ignores_unused_attributes(self):
+        network = self._get_network()
+        fixed_ips = [{'subnet_id': 'subnet1', 'ip_address': '10.0.0.2',
+                      'subnet': {'id': 'subnet1'}}]
+        other = self._get_network(status='DOWN', fixed_ips=fixed_ips)
+        self.assertEqual(utils.get_dhcp_network_digest(network),
+                         utils.get_dhcp_network_digest(other))
+
+    def test_digest_changes_with_port_mac_address(self):
+        network = self._get_network()
+        other = self._get_network(mac_address='aa:bb:cc:dd:ee:03')
+        self.assertNotEqual(utils.get_dhcp_network_digest(network),
+                            utils.get_dhcp_network_digest(other))
+
+    def test_digest_changes_with_port_fixed_ips(self):
+        network = self._get_network()
+        fixed_ips = [{'subnet_id': 'subnet1', 'ip_address': '10.0.0.4'}]
+        other = self._get_network(fixed_ips=fixed_ips)
+        self.assertNotEqual(utils.get_dhcp_network_digest(network),
+                            utils.get_dhcp_network_digest(other))
@@ -84,6 +84,22 @@ class TestQuotaDbApi(testlib_api.SqlTestCaseLight):
         self._verify_quota_usage(usage_info_1,
                                  expected_used=28)
 
+    def test_set_quota_usage_if_unchanged(self):
+        self._create_quota_usage('goals', 26)
+        self.assertEqual(0, quota_api.set_quota_usage_if_unchanged(
+            self.context, 'goals', self.tenant_id, 30, 25))
+        self.assertEqual(1, quota_api.set_quota_usage_if_unchanged(
+            self.context, 'goals', self.tenant_id, 30, 26))
+        usage_info = quota_api.get_quota_usage_by_resource_and_tenant(
+            self.context, 'goals', self.tenant_id)
+        self._verify_quota_usage(usage_info, expected_used=30)
+
+    def test_set_quota_usage_if_unchanged_dirty(self):
+        self._create_quota_usage('goals', 26)
+        quota_api.set_quota_usage_dirty(self.context, 'goals', self.tenant_id)
+        self.assertEqual(0, quota_api.set_quota_usage_if_unchanged(
+            self.context, 'goals', self.tenant_id, 30, 26))
+
     def test_set_quota_usage_dirty(self):
         self._create_quota_usage('goals', 26)
         # Higuain needs a shower after the match
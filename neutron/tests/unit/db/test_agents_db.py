@@ -18,6 +18,7 @@ import mock
 
 from oslo_config import cfg
 from oslo_db import exception as exc
+from oslo_serialization import jsonutils
 from oslo_utils import timeutils
 import testscenarios
 
@@ -161,6 +162,169 @@ class TestAgentsDbMixin(TestAgentsDbBase):
         agent = self.plugin.get_agents(self.context)[0]
         self.assertFalse(agent['admin_state_up'])
 
+    def _enable_heartbeat_batching(self):
+        cfg.CONF.set_override('agent_heartbeat_batch_interval', 5)
+        mock.patch.object(agents_db.AgentHeartbeatBatcher, 'start').start()
+
+    def _get_agent_db(self):
+        return self.plugin._get_agent_by_type_and_host(
+            self.context, self.agent_status['agent_type'],
+            self.agent_status['host'])
+
+    def test_create_or_update_agent_batches_heartbeats(self):
+        self._enable_heartbeat_batching()
+        self.assertEqual(
+            constants.AGENT_NEW,
+            self.plugin.create_or_update_agent(self.context,
+                                               self.agent_status))
+        with mock.patch.object(self.plugin,
+                               '_create_or_update_agent') as update:
+            self.assertEqual(
+                constants.AGENT_ALIVE,
+                self.plugin.create_or_update_agent(self.context,
+                                                   self.agent_status))
+            self.assertFalse(update.called)
+
+        agent_db = self._get_agent_db()
+        self.context.session.expire(agent_db)
+        agent_db.heartbeat_timestamp -= datetime.timedelta(seconds=30)
+        self.context.session.flush()
+        old_heartbeat = agent_db.heartbeat_timestamp
+        self.plugin._heartbeat_batcher.flush()
+        self.context.session.expire(agent_db)
+        self.assertGreater(agent_db.heartbeat_timestamp, old_heartbeat)
+
+    def test_create_or_update_agent_state_change_not_batched(self):
+        self._enable_heartbeat_batching()
+        self.plugin.create_or_update_agent(self.context, self.agent_status)
+        status = dict(self.agent_status, configurations={'devices': 1})
+        self.plugin.create_or_update_agent(self.context, status)
+        self.assertEqual({'devices': 1},
+                         self.plugin.get_agents(self.context)[0][
+                             'configurations'])
+        self.assertFalse(self.plugin._heartbeat_batcher._pending)
+
+    def test_heartbeat_batcher_stale_agent_not_batched(self):
+        batcher = agents_db.AgentHeartbeatBatcher(5)
+        batcher.record('agent_id', self.agent_status, 'digest')
+        self.assertTrue(batcher.queue(self.agent_status, 'digest'))
+        self.assertFalse(batcher.queue(self.agent_status, 'other_digest'))
+        with mock.patch.object(
+                timeutils, 'utcnow',
+                return_value=timeutils.utcnow() + datetime.timedelta(
+                    seconds=cfg.CONF.agent_down_time)):
+            self.assertFalse(batcher.queue(self.agent_status, 'digest'))
+
+    def test_heartbeat_batcher_forgets_deleted_agents(self):
+        batcher = agents_db.AgentHeartbeatBatcher(5)
+        batcher.record('deleted_agent_id', self.agent_status, 'digest')
+        self.assertTrue(batcher.queue(self.agent_status, 'digest'))
+        batcher.flush()
+        self.assertFalse(batcher.queue(self.agent_status, 'digest'))
+
+    def test_heartbeat_batcher_forgets_agents_updated_elsewhere(self):
+        self._enable_heartbeat_batching()
+        self.plugin.create_or_update_agent(self.context, self.agent_status)
+        batcher = self.plugin._heartbeat_batcher
+        digest = batcher.get_state_digest(
+            self.agent_status, self.plugin._get_agent_load(self.agent_status))
+        self.assertTrue(batcher.queue(self.agent_status, digest))
+        # Another server process writes a new state of the agent
+        agent_db = self._get_agent_db()
+        with self.context.session.begin(subtransactions=True):
+            agent_db.configurations = jsonutils.dumps({'devices': 1})
+        batcher.flush()
+        self.assertFalse(batcher.queue(self.agent_status, digest))
+
+    def test_heartbeat_batcher_keeps_unchanged_agents(self):
+        self._enable_heartbeat_batching()
+        self.plugin.create_or_update_agent(self.context, self.agent_status)
+        batcher = self.plugin._heartbeat_batcher
+        digest = batcher.get_state_digest(
+            self.agent_status, self.plugin._get_agent_load(self.agent_status))
+        self.assertTrue(batcher.queue(self.agent_status, digest))
+        batcher.flush()
+        self.assertTrue(batcher.queue(self.agent_status, digest))
+
+    def _enable_agent_registry(self):
+        cfg.CONF.set_override('agent_registry_ttl', 30)
+        agents_db.AgentRegistry._instance = None
+        self.addCleanup(setattr, agents_db.AgentRegistry, '_instance', None)
+
+    def test_get_enabled_agent_on_host_from_registry(self):
+        self._enable_agent_registry()
+        agents = self._create_and_save_agents(['foo_host'],
+                                              constants.AGENT_TYPE_L3)
+        agent = self.plugin.get_enabled_agent_on_host(
+            self.context, constants.AGENT_TYPE_L3, 'foo_host')
+        self.assertEqual(agents[0], agent)
+        with mock.patch.object(agents_db.AgentRegistry, '_load') as load:
+            self.assertIsNone(self.plugin.get_enabled_agent_on_host(
+                self.context, constants.AGENT_TYPE_L3, 'other_host'))
+            self.assertFalse(load.called)
+
+    def test_get_enabled_agent_on_host_from_registry_disabled(self):
+        self._enable_agent_registry()
+        agents = self._create_and_save_agents(['foo_host'],
+                                              constants.AGENT_TYPE_L3)
+        self.plugin.update_agent(self.context, agents[0].id,
+                                 {'agent': {'admin_state_up': False}})
+        self.assertIsNone(self.plugin.get_enabled_agent_on_host(
+            self.context, constants.AGENT_TYPE_L3, 'foo_host'))
+
+    def test_get_enabled_agent_on_host_from_stale_registry_disabled(self):
+        self._enable_agent_registry()
+        agents = self._create_and_save_agents(['foo_host'],
+                                              constants.AGENT_TYPE_L3)
+        info = {'id': agents[0].id, 'admin_state_up': True}
+        with self.context.session.begin(subtransactions=True):
+            agents[0].admin_state_up = False
+        with mock.patch.object(agents_db.AgentRegistry, 'get_agent',
+                               return_value=info):
+            self.assertIsNone(self.plugin.get_enabled_agent_on_host(
+                self.context, constants.AGENT_TYPE_L3, 'foo_host'))
+
+    def test_agent_registry_reloaded_when_stale(self):
+        self._enable_agent_registry()
+        registry = agents_db.AgentRegistry.get_instance()
+        self.assertIsNone(registry.get_agent(
+            self.context, constants.AGENT_TYPE_L3, 'foo_host'))
+        self._create_and_save_agents(['foo_host'], constants.AGENT_TYPE_L3)
+        self.assertIsNone(registry.get_agent(
+            self.context, constants.AGENT_TYPE_L3, 'foo_host'))
+        with mock.patch.object(
+                timeutils, 'utcnow',
+                return_value=timeutils.utcnow() + datetime.timedelta(
+                    seconds=31)):
+            self.assertIsNotNone(registry.get_agent(
+                self.context, constants.AGENT_TYPE_L3, 'foo_host'))
+
+    def test_agent_registry_records_heartbeats(self):
+        self._enable_agent_registry()
+        agent = self._create_and_save_agents(
+            ['foo_host'], constants.AGENT_TYPE_L3, down_agents_count=1)[0]
+        self.assertFalse(agent.is_active)
+        registry = agents_db.AgentRegistry.get_instance()
+        registry.get_agent(self.context, constants.AGENT_TYPE_L3, 'foo_host')
+        registry.heartbeat(constants.AGENT_TYPE_L3, 'foo_host',
+                           timeutils.utcnow())
+        self.assertTrue(agent.is_active)
+        # Heartbeats newer than the database survive reloads
+        registry.invalidate()
+        registry.get_agent(self.context, constants.AGENT_TYPE_L3, 'foo_host')
+        self.assertTrue(agent.is_active)
+
+    def test_create_or_update_agent_records_heartbeat_in_registry(self):
+        self._enable_agent_registry()
+        self.plugin.create_or_update_agent(self.context, self.agent_status)
+        registry = agents_db.AgentRegistry.get_instance()
+        agent = registry.get_agent(self.context,
+                                   self.agent_status['agent_type'],
+                                   self.agent_status['host'])
+        self.assertEqual(self._get_agent_db().id, agent['id'])
+        self.assertIsNotNone(registry.get_heartbeat(
+            self.agent_status['agent_type'], self.agent_status['host']))
+
     def test_agent_health_check(self):
         agents = [{'agent_type': "DHCP Agent",
                    'heartbeat_timestamp': '2015-05-06 22:40:40.432295',
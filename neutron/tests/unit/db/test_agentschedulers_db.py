@@ -753,6 +753,35 @@ class OvsAgentSchedulerTestCase(OvsAgentSchedulerTestCaseBase):
             ret_b = l3_rpc_cb.sync_routers(self.adminContext, host=L3_HOSTB)
         self.assertEqual(ret_b, ret_a)
 
+    def test_router_reschedule_from_dead_agent_in_bulk(self):
+        cfg.CONF.set_override('router_reschedule_batch_size', 1)
+        plugin = manager.NeutronManager.get_service_plugins().get(
+            service_constants.L3_ROUTER_NAT)
+        l3_notifier = mock.Mock()
+        mock.patch.dict(plugin.agent_notifiers,
+                        {constants.AGENT_TYPE_L3: l3_notifier}).start()
+        with self.router() as r1, self.router() as r2:
+            l3_rpc_cb = l3_rpc.L3RpcCallback()
+            self._register_agent_states()
+            # schedule the routers to host A
+            l3_rpc_cb.sync_routers(self.adminContext, host=L3_HOSTA)
+            with mock.patch.object(plugin, 'reschedule_router') as rr:
+                self._take_down_agent_and_run_reschedule(L3_HOSTA)
+                self.assertFalse(rr.called)
+
+            router_ids = set([r1['router']['id'], r2['router']['id']])
+            agents = plugin.get_l3_agents_hosting_routers(
+                self.adminContext, list(router_ids))
+            self.assertEqual(set([L3_HOSTB]),
+                             set(agent['host'] for agent in agents))
+            self.assertEqual(
+                2, l3_notifier.router_removed_from_agent.call_count)
+            l3_notifier.router_added_to_agent.assert_called_once_with(
+                mock.ANY, mock.ANY, L3_HOSTB)
+            self.assertEqual(
+                router_ids,
+                set(l3_notifier.router_added_to_agent.call_args[0][1]))
+
     def test_router_no_reschedule_from_dead_admin_down_agent(self):
         with self.router() as r:
             l3_rpc_cb = l3_rpc.L3RpcCallback()
@@ -13,6 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
+
+from neutron.db import common_db_mixin
 from neutron.db import db_base_plugin_common
 from neutron.tests import base
 
@@ -91,3 +94,31 @@ class FilterFieldsTestCase(base.BaseTestCase):
         expected = {'two': 2}
         observed = self.method_multiple_arguments(list(), fields=['two'])
         self.assertEqual(expected, observed)
+
+
+class LoadingProfilesTestCase(base.BaseTestCase):
+
+    def test_get_loading_options(self):
+
+        class FakeModel(object):
+            used = mock.sentinel.used
+            unused = mock.sentinel.unused
+
+        class FakePlugin(common_db_mixin.CommonDbMixin):
+            def _extend_fake_dict(self, res, db_obj):
+                pass
+
+        loaders = {'joined': mock.Mock(return_value='joined'),
+                   'subquery': mock.Mock(return_value='subquery')}
+        with mock.patch.dict(FakePlugin._model_loading_profiles),\
+                mock.patch.dict(FakePlugin._RELATIONSHIP_LOADERS, loaders),\
+                mock.patch.object(common_db_mixin.orm, 'lazyload',
+                                  return_value='lazy') as lazyload:
+            FakePlugin.register_loading_profile(
+                FakeModel, '_extend_fake_dict', {'used': 'subquery'})
+            FakePlugin.register_loading_profile(
+                FakeModel, '_extend_missing_dict', {'unused': 'subquery'})
+            options = FakePlugin()._get_loading_options(FakeModel)
+        self.assertEqual(['lazy', 'subquery'], options)
+        lazyload.assert_called_once_with(mock.sentinel.unused)
+        loaders['subquery'].assert_called_once_with(mock.sentinel.used)
@@ -1076,6 +1076,41 @@ class TestPortsV2(NeutronDbPluginV2TestCase):
             ports = (v1, v2, v3)
             self._test_list_resources('port', ports)
 
+    def test_list_ports_streaming(self):
+        cfg.CONF.set_default('allow_overlapping_ips', True)
+        cfg.CONF.set_override('collection_stream_chunk_size', 2)
+        with self.port() as v1, self.port() as v2, self.port() as v3:
+            ports = (v1, v2, v3)
+            self._test_list_resources('port', ports)
+
+    def test_list_ports_streaming_with_sort_native(self):
+        if self._skip_native_sorting:
+            self.skipTest("Skip test for not implemented sorting feature")
+        cfg.CONF.set_default('allow_overlapping_ips', True)
+        cfg.CONF.set_override('collection_stream_chunk_size', 2)
+        with self.port(admin_state_up='True',
+                       mac_address='00:00:00:00:00:01') as port1,\
+                self.port(admin_state_up='False',
+                          mac_address='00:00:00:00:00:02') as port2,\
+                self.port(admin_state_up='False',
+                          mac_address='00:00:00:00:00:03') as port3:
+            self._test_list_with_sort('port', (port3, port2, port1),
+                                      [('admin_state_up', 'asc'),
+                                       ('mac_address', 'desc')])
+
+    def test_get_ports_iter_with_concurrent_delete(self):
+        plugin = manager.NeutronManager.get_plugin()
+        ctx = context.get_admin_context()
+        with self.port() as port1, self.port() as port2, \
+                self.port() as port3:
+            port_ids = sorted(p['port']['id'] for p in (port1, port2, port3))
+            ports = plugin.get_ports_iter(ctx, fields=['id'], chunk_size=1)
+            streamed_ids = [next(ports)['id']]
+            # deleting a streamed port must not shift the next chunks
+            plugin.delete_port(ctx, streamed_ids[0])
+            streamed_ids.extend(p['id'] for p in ports)
+        self.assertEqual(port_ids, streamed_ids)
+
     def test_list_ports_filtered_by_fixed_ip(self):
         # for this test we need to enable overlapping ips
         cfg.CONF.set_default('allow_overlapping_ips', True)
@@ -1146,6 +1181,21 @@ fixed_ips=ip_address%%3D%s&fixed_ips=ip_address%%3D%s&fixed_ips=subnet_id%%3D%s
                                             (port1, port2, port3),
                                             ('mac_address', 'asc'), 2, 2)
 
+    def test_list_ports_with_pagination_keyset_markers(self):
+        if self._skip_native_pagination:
+            self.skipTest("Skip test for not implemented pagination feature")
+        cfg.CONF.set_default('allow_overlapping_ips', True)
+        cfg.CONF.set_override('pagination_keyset_markers', True)
+        with self.port(mac_address='00:00:00:00:00:01') as port1,\
+                self.port(mac_address='00:00:00:00:00:02') as port2,\
+                self.port(mac_address='00:00:00:00:00:03') as port3:
+            plugin = manager.NeutronManager.get_plugin()
+            with mock.patch.object(plugin, '_get_port') as get_port:
+                self._test_list_with_pagination('port',
+                                                (port1, port2, port3),
+                                                ('mac_address', 'asc'), 2, 2)
+            self.assertFalse(get_port.called)
+
     def test_list_ports_with_pagination_emulated(self):
         helper_patcher = mock.patch(
             'neutron.api.v2.base.Controller._get_pagination_helper',
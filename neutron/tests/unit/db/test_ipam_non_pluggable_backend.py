@@ -67,9 +67,9 @@ class TestIpamNonPluggableBackend(base.BaseTestCase):
         pool_qry.filter_by.return_value = pools
 
         def return_queries_side_effect(*args, **kwargs):
-            if args[0] == models_v2.IPAllocation:
+            if args[0] is models_v2.IPAllocation.ip_address:
                 return ip_qry
-            if args[0] == models_v2.IPAllocationPool:
+            if args[0] is models_v2.IPAllocationPool:
                 return pool_qry
 
         context = mock.Mock()
@@ -92,13 +92,13 @@ class TestIpamNonPluggableBackend(base.BaseTestCase):
                   'first_ip': '192.168.1.100',
                   'last_ip': '192.168.1.120'}]
 
-        allocations = [{'ip_address': '192.168.1.3'},
-                       {'ip_address': '192.168.1.78'},
-                       {'ip_address': '192.168.1.7'},
-                       {'ip_address': '192.168.1.110'},
-                       {'ip_address': '192.168.1.11'},
-                       {'ip_address': '192.168.1.4'},
-                       {'ip_address': '192.168.1.111'}]
+        allocations = [('192.168.1.3',),
+                       ('192.168.1.78',),
+                       ('192.168.1.7',),
+                       ('192.168.1.110',),
+                       ('192.168.1.11',),
+                       ('192.168.1.4',),
+                       ('192.168.1.111',)]
 
         expected = [['a', '192.168.1.5', '192.168.1.6'],
                     ['a', '192.168.1.8', '192.168.1.10'],
@@ -116,13 +116,13 @@ class TestIpamNonPluggableBackend(base.BaseTestCase):
                   'first_ip': '2001::100',
                   'last_ip': '2001::ffff:ffff:ffff:fffe'}]
 
-        allocations = [{'ip_address': '2001::10'},
-                       {'ip_address': '2001::45'},
-                       {'ip_address': '2001::60'},
-                       {'ip_address': '2001::111'},
-                       {'ip_address': '2001::200'},
-                       {'ip_address': '2001::ffff:ffff:ffff:ff10'},
-                       {'ip_address': '2001::ffff:ffff:ffff:f2f0'}]
+        allocations = [('2001::10',),
+                       ('2001::45',),
+                       ('2001::60',),
+                       ('2001::111',),
+                       ('2001::200',),
+                       ('2001::ffff:ffff:ffff:ff10',),
+                       ('2001::ffff:ffff:ffff:f2f0',)]
 
         expected = [['a', '2001::1', '2001::f'],
                     ['a', '2001::11', '2001::44'],
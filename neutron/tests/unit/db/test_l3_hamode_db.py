@@ -407,12 +407,28 @@ class L3HATestCase(L3HATestFramework):
                                              router['tenant_id'])
 
         with mock.patch.object(self.plugin, '_get_allocated_vr_id',
-                               return_value=set()) as alloc:
+                               return_value=set()) as alloc,\
+                mock.patch('neutron.db.l3_hamode_db.VR_ID_RANGE',
+                           new=set([router['ha_vr_id']])):
             self.assertRaises(l3_ext_ha_mode.MaxVRIDAllocationTriesReached,
                               self.plugin._allocate_vr_id, self.admin_ctx,
                               network.network_id, router['id'])
             self.assertEqual(2, len(alloc.mock_calls))
 
+    def test_vr_id_allocation_picks_random_free_vr_id(self):
+        router = self._create_router()
+        network = self.plugin.get_ha_network(self.admin_ctx,
+                                             router['tenant_id'])
+
+        with mock.patch('neutron.db.l3_hamode_db.VR_ID_RANGE',
+                        new=set(range(1, 5))),\
+                mock.patch('random.choice', return_value=3) as choice:
+            vr_id = self.plugin._allocate_vr_id(
+                self.admin_ctx, network.network_id, _uuid())
+        self.assertEqual(3, vr_id)
+        expected = sorted(set(range(1, 5)) - set([router['ha_vr_id']]))
+        choice.assert_called_once_with(expected)
+
     def test_vr_id_allocation_delete_router(self):
         router = self._create_router()
         network = self.plugin.get_ha_network(self.admin_ctx,
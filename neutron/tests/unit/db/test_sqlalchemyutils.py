@@ -0,0 +1,59 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+
+from oslo_utils import uuidutils
+
+from neutron.common import exceptions as n_exc
+from neutron import context
+from neutron.db import models_v2
+from neutron.db import sqlalchemyutils
+from neutron.tests.unit import testlib_api
+
+
+class TestKeysetMarkers(testlib_api.SqlTestCaseLight):
+
+    def test_encode_decode_marker(self):
+        item = {'id': uuidutils.generate_uuid(), 'name': u'net1',
+                'admin_state_up': True, 'mtu': 1500}
+        marker = sqlalchemyutils.encode_marker(
+            item, ['name', 'admin_state_up', 'mtu', 'id'])
+        marker_obj = sqlalchemyutils.decode_marker(marker)
+        for key in ('name', 'admin_state_up', 'mtu', 'id'):
+            self.assertEqual(item[key], getattr(marker_obj, key))
+
+    def test_encode_marker_unsupported_value(self):
+        item = {'id': uuidutils.generate_uuid(),
+                'created_at': datetime.datetime.utcnow()}
+        self.assertIsNone(sqlalchemyutils.encode_marker(
+            item, ['created_at', 'id']))
+
+    def test_encode_marker_missing_key(self):
+        self.assertIsNone(sqlalchemyutils.encode_marker(
+            {'id': uuidutils.generate_uuid()}, ['name', 'id']))
+
+    def test_decode_marker_id(self):
+        self.assertIsNone(sqlalchemyutils.decode_marker(
+            uuidutils.generate_uuid()))
+
+    def test_paginate_query_marker_sort_mismatch(self):
+        marker_obj = sqlalchemyutils.decode_marker(
+            sqlalchemyutils.encode_marker({'id': 'fake'}, ['id']))
+        query = context.get_admin_context().session.query(
+            models_v2.Network)
+        self.assertRaises(n_exc.BadRequest,
+                          sqlalchemyutils.paginate_query,
+                          query, models_v2.Network, 2,
+                          [('name', True), ('id', True)], marker_obj)
@@ -13,16 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import mock
-
-from oslo_db import exception as db_exc
 from oslo_utils import uuidutils
-from sqlalchemy.orm import exc as orm_exc
 
 from neutron import context
 from neutron.ipam.drivers.neutrondb_ipam import db_api
 from neutron.ipam.drivers.neutrondb_ipam import db_models
-from neutron.ipam import exceptions as ipam_exc
 from neutron.tests.unit import testlib_api
 
 
@@ -75,103 +70,14 @@ class TestIpamSubnetManager(testlib_api.SqlTestCase):
             any(pool == (db_pool.first_ip, db_pool.last_ip) for pool in pools))
 
     def test_create_pool(self):
-        db_pools = self._create_pools([self.single_pool])
+        self._create_pools([self.single_pool])
 
         ipam_pool = self.ctx.session.query(db_models.IpamAllocationPool).\
             filter_by(ipam_subnet_id=self.ipam_subnet_id).first()
         self._validate_ips([self.single_pool], ipam_pool)
 
-        range = self.ctx.session.query(db_models.IpamAvailabilityRange).\
-            filter_by(allocation_pool_id=db_pools[0].id).first()
-        self._validate_ips([self.single_pool], range)
-
-    def test_get_first_range(self):
-        self._create_pools(self.multi_pool)
-        range = self.subnet_manager.get_first_range(self.ctx.session)
-        self._validate_ips(self.multi_pool, range)
-
-    def test_list_ranges_by_subnet_id(self):
-        self._create_pools(self.multi_pool)
-
-        db_ranges = self.subnet_manager.list_ranges_by_subnet_id(
-            self.ctx.session).all()
-        self.assertEqual(2, len(db_ranges))
-        self.assertEqual(db_models.IpamAvailabilityRange, type(db_ranges[0]))
-
-    def test_list_ranges_by_allocation_pool(self):
-        db_pools = self._create_pools([self.single_pool])
-        # generate ids for allocation pools on flush
-        self.ctx.session.flush()
-        db_ranges = self.subnet_manager.list_ranges_by_allocation_pool(
-            self.ctx.session,
-            db_pools[0].id).all()
-        self.assertEqual(1, len(db_ranges))
-        self.assertEqual(db_models.IpamAvailabilityRange, type(db_ranges[0]))
-        self._validate_ips([self.single_pool], db_ranges[0])
-
-    def test_create_range(self):
-        self._create_pools([self.single_pool])
-        pool = self.ctx.session.query(db_models.IpamAllocationPool).\
-            filter_by(ipam_subnet_id=self.ipam_subnet_id).first()
-        self._validate_ips([self.single_pool], pool)
-        allocation_pool_id = pool.id
-
-        # delete the range
-        db_range = self.subnet_manager.list_ranges_by_allocation_pool(
-            self.ctx.session,
-            pool.id).first()
-        self._validate_ips([self.single_pool], db_range)
-        self.ctx.session.delete(db_range)
-
-        # create a new range
-        range_start = '1.2.3.5'
-        range_end = '1.2.3.9'
-        new_range = self.subnet_manager.create_range(self.ctx.session,
-                                                     allocation_pool_id,
-                                                     range_start,
-                                                     range_end)
-        self.assertEqual(range_start, new_range.first_ip)
-        self.assertEqual(range_end, new_range.last_ip)
-
-    def test_update_range(self):
-        self._create_pools([self.single_pool])
-        db_range = self.subnet_manager.get_first_range(self.ctx.session)
-        updated_count = self.subnet_manager.update_range(self.ctx.session,
-                                                         db_range,
-                                                         first_ip='1.2.3.6',
-                                                         last_ip='1.2.3.8')
-        self.assertEqual(1, updated_count)
-
-    def test_update_range_no_new_values(self):
-        self._create_pools([self.single_pool])
-        db_range = self.subnet_manager.get_first_range(self.ctx.session)
-        self.assertRaises(ipam_exc.IpamAvailabilityRangeNoChanges,
-                          self.subnet_manager.update_range,
-                          self.ctx.session, db_range)
-
-    def test_update_range_reraise_error(self):
-        session = mock.Mock()
-        session.query.side_effect = orm_exc.ObjectDeletedError(None, None)
-        self.assertRaises(db_exc.RetryRequest,
-                          self.subnet_manager.update_range,
-                          session,
-                          mock.Mock(),
-                          first_ip='1.2.3.5')
-
-    def test_delete_range(self):
-        self._create_pools([self.single_pool])
-        db_range = self.subnet_manager.get_first_range(self.ctx.session)
-        deleted_count = self.subnet_manager.delete_range(self.ctx.session,
-                                                         db_range)
-        self.assertEqual(1, deleted_count)
-
-    def test_delete_range_reraise_error(self):
-        session = mock.Mock()
-        session.query.side_effect = orm_exc.ObjectDeletedError(None, None)
-        self.assertRaises(db_exc.RetryRequest,
-                          self.subnet_manager.delete_range,
-                          session,
-                          mock.Mock())
+        ranges = self.ctx.session.query(db_models.IpamAvailabilityRange).all()
+        self.assertEqual([], ranges)
 
     def test_check_unique_allocation(self):
         self.assertTrue(self.subnet_manager.check_unique_allocation(
@@ -192,6 +98,13 @@ class TestIpamSubnetManager(testlib_api.SqlTestCase):
         for allocation in allocs:
             self.assertIn(allocation.ip_address, ips)
 
+    def test_list_allocated_ips(self):
+        for ip in ['1.2.3.4', '1.2.3.6']:
+            self.subnet_manager.create_allocation(self.ctx.session, ip)
+        allocated = self.subnet_manager.list_allocated_ips(
+            self.ctx.session, {'1.2.3.4', '1.2.3.5', '1.2.3.6', '1.2.3.7'})
+        self.assertEqual({'1.2.3.4', '1.2.3.6'}, allocated)
+
     def _test_create_allocation(self):
         self.subnet_manager.create_allocation(self.ctx.session,
                                               self.subnet_ip)
@@ -15,7 +15,7 @@
 
 import mock
 import netaddr
-
+from oslo_config import cfg
 from oslo_db import exception as db_exc
 
 from neutron.api.v2 import attributes
@@ -31,10 +31,6 @@ from neutron.tests.unit.db import test_db_base_plugin_v2 as test_db_plugin
 from neutron.tests.unit import testlib_api
 
 
-def convert_firstip_to_ipaddress(range_item):
-    return netaddr.IPAddress(range_item['first_ip'])
-
-
 class TestNeutronDbIpamMixin(object):
 
     def _create_network(self, plugin, ctx, shared=False):
@@ -282,74 +278,112 @@ class TestNeutronDbIpamSubnet(testlib_api.SqlTestCase,
                           self.ctx.session,
                           '10.0.0.0')
 
-    def test__allocate_specific_ip(self):
-        cidr = '10.0.0.0/24'
-        ipam_subnet = self._create_and_allocate_ipam_subnet(cidr)[0]
-        with self.ctx.session.begin():
-            ranges = ipam_subnet._allocate_specific_ip(
-                self.ctx.session, '10.0.0.33')
-        self.assertEqual(2, len(ranges))
-        # 10.0.0.1 should be allocated for gateway ip
-        ranges.sort(key=convert_firstip_to_ipaddress)
-        self.assertEqual('10.0.0.2', ranges[0]['first_ip'])
-        self.assertEqual('10.0.0.32', ranges[0]['last_ip'])
-        self.assertEqual('10.0.0.34', ranges[1]['first_ip'])
-        self.assertEqual('10.0.0.254', ranges[1]['last_ip'])
-        # Limit test - first address in range
-        ranges = ipam_subnet._allocate_specific_ip(
-            self.ctx.session, '10.0.0.2')
-        self.assertEqual(2, len(ranges))
-        ranges.sort(key=convert_firstip_to_ipaddress)
-        self.assertEqual('10.0.0.3', ranges[0]['first_ip'])
-        self.assertEqual('10.0.0.32', ranges[0]['last_ip'])
-        self.assertEqual('10.0.0.34', ranges[1]['first_ip'])
-        self.assertEqual('10.0.0.254', ranges[1]['last_ip'])
-        # Limit test - last address in range
-        ranges = ipam_subnet._allocate_specific_ip(
-            self.ctx.session, '10.0.0.254')
-        self.assertEqual(2, len(ranges))
-        ranges.sort(key=convert_firstip_to_ipaddress)
-        self.assertEqual('10.0.0.3', ranges[0]['first_ip'])
-        self.assertEqual('10.0.0.32', ranges[0]['last_ip'])
-        self.assertEqual('10.0.0.34', ranges[1]['first_ip'])
-        self.assertEqual('10.0.0.253', ranges[1]['last_ip'])
-
-    def test__allocate_specific_ips_multiple_ranges(self):
-        cidr = '10.0.0.0/24'
+    def test__generate_ip_lowest_free_by_default(self):
         ipam_subnet = self._create_and_allocate_ipam_subnet(
-            cidr,
-            allocation_pools=[{'start': '10.0.0.10', 'end': '10.0.0.19'},
+            '10.0.0.0/24',
+            allocation_pools=[{'start': '10.0.0.10', 'end': '10.0.0.11'},
                               {'start': '10.0.0.30', 'end': '10.0.0.39'}])[0]
-        with self.ctx.session.begin():
-            ranges = ipam_subnet._allocate_specific_ip(
-                self.ctx.session, '10.0.0.33')
-        self.assertEqual(3, len(ranges))
-        # 10.0.0.1 should be allocated for gateway ip
-        ranges.sort(key=convert_firstip_to_ipaddress)
-        self.assertEqual('10.0.0.10', ranges[0]['first_ip'])
-        self.assertEqual('10.0.0.19', ranges[0]['last_ip'])
-        self.assertEqual('10.0.0.30', ranges[1]['first_ip'])
-        self.assertEqual('10.0.0.32', ranges[1]['last_ip'])
-        self.assertEqual('10.0.0.34', ranges[2]['first_ip'])
-        self.assertEqual('10.0.0.39', ranges[2]['last_ip'])
-
-    def test__allocate_specific_ip_out_of_range(self):
-        cidr = '10.0.0.0/24'
-        subnet = self._create_subnet(
-            self.plugin, self.ctx, self.net_id, cidr)
-        subnet_req = ipam_req.SpecificSubnetRequest(
-            'tenant_id', subnet['id'], cidr, gateway_ip=subnet['gateway_ip'])
-        ipam_subnet = self.ipam_pool.allocate_subnet(subnet_req)
-        with self.ctx.session.begin():
-            ranges = ipam_subnet._allocate_specific_ip(
-                self.ctx.session, '192.168.0.1')
-        # In this case _allocate_specific_ips does not fail, but
-        # simply does not update availability ranges at all
-        self.assertEqual(1, len(ranges))
-        # 10.0.0.1 should be allocated for gateway ip
-        ranges.sort(key=convert_firstip_to_ipaddress)
-        self.assertEqual('10.0.0.2', ranges[0]['first_ip'])
-        self.assertEqual('10.0.0.254', ranges[0]['last_ip'])
+        for ip in ('10.0.0.10', '10.0.0.11', '10.0.0.30', '10.0.0.32'):
+            ipam_subnet.allocate(ipam_req.SpecificAddressRequest(ip))
+        with mock.patch.object(driver.random, 'choice') as choice:
+            self.assertEqual(
+                '10.0.0.31',
+                ipam_subnet._generate_ip(self.ctx.session)[0])
+            self.assertEqual(
+                '10.0.0.33',
+                ipam_subnet._generate_ip(self.ctx.session,
+                                         ['10.0.0.31'])[0])
+        self.assertFalse(choice.called)
+
+    def test__generate_ip_small_pools(self):
+        cfg.CONF.set_override('ipam_allocation_window', 16)
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '10.0.0.0/24',
+            allocation_pools=[{'start': '10.0.0.10', 'end': '10.0.0.11'},
+                              {'start': '10.0.0.30', 'end': '10.0.0.39'}])[0]
+        ipam_subnet.allocate(ipam_req.SpecificAddressRequest('10.0.0.10'))
+        self.assertEqual(
+            '10.0.0.11',
+            ipam_subnet._generate_ip(self.ctx.session)[0])
+        with mock.patch.object(driver.random, 'choice',
+                               side_effect=lambda c: c[0]) as choice:
+            ip_address = ipam_subnet._generate_ip(self.ctx.session,
+                                                  ['10.0.0.11'])[0]
+        # pools smaller than the window are entirely looked up
+        self.assertEqual(10, len(choice.call_args[0][0]))
+        self.assertEqual('10.0.0.30', ip_address)
+
+    def test__generate_ip_samples_window(self):
+        cfg.CONF.set_override('ipam_allocation_window', 3)
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '10.0.0.0/24',
+            allocation_pools=[{'start': '10.0.0.10', 'end': '10.0.0.39'}])[0]
+        ipam_subnet.allocate(ipam_req.SpecificAddressRequest('10.0.0.20'))
+        sample = [int(netaddr.IPAddress(ip)) for ip in
+                  ('10.0.0.20', '10.0.0.25', '10.0.0.33')]
+        subnet_manager = ipam_subnet.subnet_manager
+        with mock.patch.object(driver.random, 'randint',
+                               side_effect=sample), \
+                mock.patch.object(driver.random, 'choice',
+                                  side_effect=lambda c: c[0]) as choice, \
+                mock.patch.object(subnet_manager,
+                                  'list_allocations') as alloc:
+            ip_address = ipam_subnet._generate_ip(self.ctx.session,
+                                                  ['10.0.0.33'])[0]
+        self.assertEqual(['10.0.0.25'], choice.call_args[0][0])
+        self.assertEqual('10.0.0.25', ip_address)
+        self.assertFalse(alloc.called)
+
+    def test__generate_ip_sample_allocated_scans_pool(self):
+        cfg.CONF.set_override('ipam_allocation_window', 2)
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '10.0.0.0/24',
+            allocation_pools=[{'start': '10.0.0.10', 'end': '10.0.0.14'}])[0]
+        for ip in ('10.0.0.10', '10.0.0.11', '10.0.0.13'):
+            ipam_subnet.allocate(ipam_req.SpecificAddressRequest(ip))
+        sample = [int(netaddr.IPAddress(ip)) for ip in
+                  ('10.0.0.10', '10.0.0.13')]
+        with mock.patch.object(driver.random, 'randint',
+                               side_effect=sample):
+            ip_address = ipam_subnet._generate_ip(self.ctx.session)[0]
+        self.assertIn(ip_address, ('10.0.0.12', '10.0.0.14'))
+
+    def test__generate_ip_exhausted_pools_fails(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '10.0.0.0/24',
+            allocation_pools=[{'start': '10.0.0.10', 'end': '10.0.0.10'}])[0]
+        self.assertRaises(ipam_exc.IpAddressGenerationFailure,
+                          ipam_subnet._generate_ip,
+                          self.ctx.session, ['10.0.0.10'])
+
+    def test_allocate_any_address_retries_on_conflict(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '10.0.0.0/24',
+            allocation_pools=[{'start': '10.0.0.2', 'end': '10.0.0.5'}])[0]
+        create_allocation = ipam_subnet.subnet_manager.create_allocation
+
+        def _concurrent_allocation(session, ip_address):
+            if ip_address == '10.0.0.2':
+                raise db_exc.DBDuplicateEntry()
+            create_allocation(session, ip_address)
+
+        with mock.patch.object(ipam_subnet.subnet_manager,
+                               'create_allocation',
+                               side_effect=_concurrent_allocation), \
+                mock.patch.object(driver.random, 'choice',
+                                  side_effect=lambda c: c[0]):
+            ip_address = ipam_subnet.allocate(ipam_req.AnyAddressRequest)
+        self.assertEqual('10.0.0.3', ip_address)
+
+    def test_allocate_any_address_gives_up_after_max_tries(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet('10.0.0.0/24')[0]
+        with mock.patch.object(ipam_subnet.subnet_manager,
+                               'create_allocation',
+                               side_effect=db_exc.DBDuplicateEntry()) as c:
+            self.assertRaises(db_exc.RetryRequest,
+                              ipam_subnet.allocate,
+                              ipam_req.AnyAddressRequest)
+        self.assertEqual(driver.MAX_ALLOCATION_TRIES, c.call_count)
 
     def _allocate_address(self, cidr, ip_version, address_request):
         ipam_subnet = self._create_and_allocate_ipam_subnet(
@@ -359,18 +393,19 @@ class TestNeutronDbIpamSubnet(testlib_api.SqlTestCase,
     def test_allocate_any_v4_address_succeeds(self):
         ip_address = self._allocate_address(
             '10.0.0.0/24', 4, ipam_req.AnyAddressRequest)
-        # As the DB IPAM driver allocation logic is strictly sequential, we can
-        # expect this test to allocate the .2 address as .1 is used by default
-        # as subnet gateway
-        self.assertEqual('10.0.0.2', ip_address)
+        # Any address of the pool may be allocated, but not the .1 address
+        # which is used by default as subnet gateway
+        self.assertIn(netaddr.IPAddress(ip_address),
+                      netaddr.IPRange('10.0.0.2', '10.0.0.254'))
 
     def test_allocate_any_v6_address_succeeds(self):
         ip_address = self._allocate_address(
             'fde3:abcd:4321:1::/64', 6, ipam_req.AnyAddressRequest)
-        # As the DB IPAM driver allocation logic is strictly sequential, we can
-        # expect this test to allocate the .2 address as .1 is used by default
-        # as subnet gateway
-        self.assertEqual('fde3:abcd:4321:1::2', ip_address)
+        # Any address of the pool may be allocated, but not the ::1 address
+        # which is used by default as subnet gateway
+        self.assertIn(netaddr.IPAddress(ip_address),
+                      netaddr.IPRange('fde3:abcd:4321:1::2',
+                                      'fde3:abcd:4321:1:ffff:ffff:ffff:ffff'))
 
     def test_allocate_specific_v4_address_succeeds(self):
         ip_address = self._allocate_address(
@@ -436,10 +471,6 @@ class TestNeutronDbIpamSubnet(testlib_api.SqlTestCase,
         self.assertRaises(ipam_exc.IpAddressAllocationNotFound,
                           ipam_subnet.deallocate, '10.0.0.2')
 
-    def test_allocate_all_pool_addresses_triggers_range_recalculation(self):
-        # This test instead might be made to pass, but for the wrong reasons!
-        pass
-
     def test_allocate_subnet_for_non_existent_subnet_pass(self):
         # This test should pass because ipam subnet is no longer
         # have foreign key relationship with neutron subnet.
@@ -447,16 +478,3 @@ class TestNeutronDbIpamSubnet(testlib_api.SqlTestCase,
         subnet_req = ipam_req.SpecificSubnetRequest(
             'tenant_id', 'meh', '192.168.0.0/24')
         self.ipam_pool.allocate_subnet(subnet_req)
-
-    def test__allocate_specific_ip_raises_exception(self):
-        cidr = '10.0.0.0/24'
-        ip = '10.0.0.15'
-        ipam_subnet = self._create_and_allocate_ipam_subnet(cidr)[0]
-        ipam_subnet.subnet_manager = mock.Mock()
-        ipam_subnet.subnet_manager.list_ranges_by_subnet_id.return_value = [{
-            'first_ip': '10.0.0.15', 'last_ip': '10.0.0.15'}]
-        ipam_subnet.subnet_manager.delete_range.return_value = 0
-
-        self.assertRaises(db_exc.RetryRequest,
-                          ipam_subnet._allocate_specific_ip,
-                          self.ctx.session, ip)
@@ -190,7 +190,7 @@ class TestSubnetAllocation(testlib_api.SqlTestCase):
     def test_subnetpool_concurrent_allocation_exception(self):
         sp = self._create_subnet_pool(self.plugin, self.ctx, 'test-sp',
                                       ['fe80::/48'],
-                                      48, 6, default_quota=1)
+                                      48, 6)
         sp = self.plugin._get_subnetpool(self.ctx, sp['id'])
         sa = subnet_alloc.SubnetAllocator(sp, self.ctx)
         req = ipam_req.SpecificSubnetRequest(self._tenant_id,
@@ -198,3 +198,19 @@ class TestSubnetAllocation(testlib_api.SqlTestCase):
                                          'fe80::/63')
         with mock.patch("sqlalchemy.orm.query.Query.update", return_value=0):
             self.assertRaises(db_exc.RetryRequest, sa.allocate_subnet, req)
+
+    def test__get_available_prefix_list(self):
+        sp = self._create_subnet_pool(self.plugin, self.ctx, 'test-sp',
+                                      ['10.1.0.0/25', '10.1.0.128/25',
+                                       '192.168.1.0/24'],
+                                      24, 4)
+        sp = self.plugin._get_subnetpool(self.ctx, sp['id'])
+        sa = subnet_alloc.SubnetAllocator(sp, self.ctx)
+        with mock.patch.object(sa, '_get_allocated_cidrs',
+                               return_value=['10.1.0.64/26',
+                                             '192.168.1.0/25',
+                                             '10.1.0.0/28']):
+            available = sa._get_available_prefix_list()
+        self.assertEqual(['10.1.0.16/28', '10.1.0.32/27', '10.1.0.128/25',
+                          '192.168.1.128/25'],
+                         [str(cidr) for cidr in available])
@@ -87,3 +87,21 @@ class TestIpamUtils(base.BaseTestCase):
         cidr = '::/64'
         expected = [netaddr.IPRange('::1', '::FFFF:FFFF:FFFF:FFFF')]
         self.assertEqual(expected, utils.generate_pools(cidr, None))
+
+    def test_get_free_ranges_no_allocations(self):
+        self.assertEqual([(10, 20)], utils.get_free_ranges(10, 20, []))
+
+    def test_get_free_ranges(self):
+        allocations = [1, 10, 12, 13, 17, 20, 25]
+        self.assertEqual([(11, 11), (14, 16), (18, 19)],
+                         utils.get_free_ranges(10, 20, allocations))
+
+    def test_get_free_ranges_exhausted(self):
+        self.assertEqual([], utils.get_free_ranges(10, 12, [10, 11, 12]))
+
+    def test_get_free_ranges_v6(self):
+        first = int(netaddr.IPAddress('2001::100'))
+        last = int(netaddr.IPAddress('2001::ffff:ffff:ffff:fffe'))
+        allocated = int(netaddr.IPAddress('2001::ffff:ffff:ffff:f2f0'))
+        self.assertEqual([(first, allocated - 1), (allocated + 1, last)],
+                         utils.get_free_ranges(first, last, [allocated]))
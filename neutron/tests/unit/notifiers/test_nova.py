@@ -275,6 +275,77 @@ class TestNovaNotify(base.BaseTestCase):
                 {'name': 'network-changed', 'server_uuid': device_id},
                 {'name': 'network-changed', 'server_uuid': device_id}])
 
+    def test_nova_send_events_coalesced(self):
+        device_id = '32102d7b-1cf4-404d-b50a-97aae1f55f87'
+        port_id = 'bee50827-bcee-4cc8-91c1-a27b0ce54222'
+        plugged_failed = {'name': nova.VIF_PLUGGED, 'status': 'failed',
+                          'server_uuid': device_id, 'tag': port_id}
+        unplugged = {'name': nova.VIF_UNPLUGGED, 'status': 'completed',
+                     'server_uuid': device_id, 'tag': port_id}
+        plugged = {'name': nova.VIF_PLUGGED, 'status': 'completed',
+                   'server_uuid': device_id, 'tag': port_id}
+        changed = {'name': 'network-changed', 'server_uuid': device_id}
+        with mock.patch.object(
+            self.nova_notifier.nclient.server_external_events,
+                'create') as nclient_create:
+            self.nova_notifier.send_events(
+                [plugged_failed, changed, unplugged, changed, plugged])
+        nclient_create.assert_called_once_with([unplugged, changed, plugged])
+
+    def test_nova_send_events_chunked(self):
+        cfg.CONF.set_override('send_events_chunk_size', 2)
+        events = [{'name': 'network-changed', 'server_uuid': str(i)}
+                  for i in range(5)]
+        with mock.patch.object(
+            self.nova_notifier.nclient.server_external_events,
+                'create', return_value=[]) as nclient_create:
+            self.nova_notifier.send_events(events)
+        self.assertEqual(3, nclient_create.call_count)
+        sent = [event for call in nclient_create.call_args_list
+                for event in call[0][0]]
+        self.assertEqual(len(events), len(sent))
+        self.assertEqual(set(event['server_uuid'] for event in events),
+                         set(event['server_uuid'] for event in sent))
+
+    def test_nova_send_events_chunked_by_server(self):
+        cfg.CONF.set_override('send_events_chunk_size', 2)
+        events = [{'name': 'network-changed', 'server_uuid': 'a'},
+                  {'name': 'network-changed', 'server_uuid': 'b'},
+                  {'name': nova.VIF_PLUGGED, 'server_uuid': 'a',
+                   'tag': 'port_a'},
+                  {'name': nova.VIF_PLUGGED, 'server_uuid': 'b',
+                   'tag': 'port_b'},
+                  {'name': 'network-changed', 'server_uuid': 'c'}]
+        with mock.patch.object(
+            self.nova_notifier.nclient.server_external_events,
+                'create', return_value=[]) as nclient_create:
+            self.nova_notifier.send_events(events)
+        chunks = sorted((call[0][0] for call in
+                         nclient_create.call_args_list),
+                        key=lambda chunk: chunk[0]['server_uuid'])
+        self.assertEqual([[events[0], events[2]],
+                          [events[1], events[3]],
+                          [events[4]]], chunks)
+
+    def test_nova_send_events_retried(self):
+        cfg.CONF.set_override('send_events_retries', 2)
+        events = [{'name': 'network-changed', 'server_uuid': 'foo'}]
+        with mock.patch.object(
+            self.nova_notifier.nclient.server_external_events,
+                'create', side_effect=[Exception, [{'code': 200}]]
+        ) as nclient_create, mock.patch.object(nova.eventlet, 'sleep'):
+            self.nova_notifier.send_events(events)
+        self.assertEqual(2, nclient_create.call_count)
+
+    def test_nova_send_events_not_found_not_retried(self):
+        cfg.CONF.set_override('send_events_retries', 2)
+        with mock.patch.object(
+            self.nova_notifier.nclient.server_external_events,
+                'create') as nclient_create:
+            nclient_create.side_effect = nova_exceptions.NotFound
+            self.nova_notifier.send_events([])
+        self.assertEqual(1, nclient_create.call_count)
+
     def test_reassociate_floatingip_without_disassociate_event(self):
         returned_obj = {'floatingip':
                         {'port_id': 'f5348a16-609a-4971-b0f0-4b8def5235fb'}}
@@ -252,6 +252,41 @@ class Ml2DBTestCase(testlib_api.SqlTestCase):
         self.assertIsNone(port)
         self.assertIsNone(binding)
 
+    def test_get_locked_ports_and_bindings(self):
+        network_id = 'foo-network-id'
+        port_ids = ['foo-port-id-1', 'foo-port-id-2']
+        self._setup_neutron_network(network_id)
+        for port_id in port_ids:
+            self._setup_neutron_port(network_id, port_id)
+            self._setup_neutron_portbinding(
+                port_id, portbindings.VIF_TYPE_UNBOUND, 'fake_host')
+
+        result = ml2_db.get_locked_ports_and_bindings(
+            self.ctx.session, port_ids + ['missing-port-id'])
+        self.assertEqual(sorted(port_ids),
+                         sorted(port.id for port, binding in result))
+        for port, binding in result:
+            self.assertEqual(port.id, binding.port_id)
+
+    def test_get_binding_levels_for_ports(self):
+        network_id = 'foo-network-id'
+        port_ids = ['foo-port-id-1', 'foo-port-id-2']
+        host = 'fake_host'
+        self._setup_neutron_network(network_id)
+        with self.ctx.session.begin(subtransactions=True):
+            for port_id in port_ids:
+                self._setup_neutron_port(network_id, port_id)
+                for level in (1, 0):
+                    self.ctx.session.add(models.PortBindingLevel(
+                        port_id=port_id, host=host, level=level,
+                        driver='fake_driver'))
+
+        levels = ml2_db.get_binding_levels_for_ports(self.ctx.session,
+                                                     port_ids)
+        for port_id in port_ids:
+            self.assertEqual([0, 1],
+                             [l.level for l in levels[(port_id, host)]])
+
 
 class Ml2DvrDBTestCase(testlib_api.SqlTestCase):
 
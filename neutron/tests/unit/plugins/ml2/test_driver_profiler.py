@@ -0,0 +1,121 @@
+# Copyright (c) 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from oslo_config import cfg
+
+from neutron.plugins.ml2 import driver_profiler
+from neutron.tests import base
+
+
+def _get_driver(name):
+    driver = mock.Mock()
+    driver.name = name
+    return driver
+
+
+class TestDriverProfiler(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestDriverProfiler, self).setUp()
+        self.profiler = driver_profiler.DriverProfiler()
+        mock.patch.object(driver_profiler, 'PROFILER',
+                          self.profiler).start()
+        self.looping_call = mock.patch.object(
+            driver_profiler.loopingcall, 'FixedIntervalLoopingCall').start()
+        self.listen = mock.patch.object(driver_profiler.event,
+                                        'listen').start()
+        self.time = mock.patch.object(driver_profiler.time, 'time').start()
+        self.log = mock.patch.object(driver_profiler, 'LOG').start()
+        cfg.CONF.set_override('driver_profiling', True, 'ml2')
+
+    def test_call_driver_not_profiled_when_disabled(self):
+        cfg.CONF.set_override('driver_profiling', False, 'ml2')
+        driver = _get_driver('fake')
+        driver.obj.bind_port.return_value = 'bound'
+        result = driver_profiler.call_driver('mechanism', driver,
+                                             'bind_port', 'context')
+        self.assertEqual('bound', result)
+        driver.obj.bind_port.assert_called_once_with('context')
+        self.assertEqual({}, self.profiler.get_stats())
+        self.assertFalse(self.listen.called)
+
+    def test_call_driver_records_stats(self):
+        self.time.side_effect = [10.0, 10.05, 20.0, 22.0]
+        driver = _get_driver('fake')
+        driver_profiler.call_driver('mechanism', driver,
+                                    'update_port_postcommit', 'context')
+        driver_profiler.call_driver('mechanism', driver,
+                                    'update_port_postcommit', 'context')
+        stats = self.profiler.get_stats()[
+            ('mechanism', 'fake', 'update_port_postcommit')]
+        self.assertEqual(2, stats['count'])
+        self.assertAlmostEqual(2.05, stats['total_time'])
+        self.assertAlmostEqual(2.0, stats['max_time'])
+        self.assertEqual([0, 0, 1, 0, 1, 0], stats['histogram'])
+        self.assertEqual(1, self.listen.call_count)
+
+    def test_call_driver_records_failed_calls(self):
+        self.time.side_effect = [10.0, 10.0]
+        driver = _get_driver('fake')
+        driver.obj.release_segment.side_effect = ValueError
+        self.assertRaises(ValueError, driver_profiler.call_driver,
+                          'type', driver, 'release_segment', 'session',
+                          'segment')
+        stats = self.profiler.get_stats()[
+            ('type', 'fake', 'release_segment')]
+        self.assertEqual(1, stats['count'])
+
+    def test_call_driver_counts_queries(self):
+        def _query(*args):
+            driver_profiler._count_query()
+            driver_profiler._count_query()
+
+        self.time.side_effect = [10.0, 10.0]
+        driver = _get_driver('fake')
+        driver.obj.process_create_port.side_effect = _query
+        driver_profiler.call_driver('extension', driver,
+                                    'process_create_port', 'context',
+                                    'data', 'result')
+        stats = self.profiler.get_stats()[
+            ('extension', 'fake', 'process_create_port')]
+        self.assertEqual(2, stats['queries'])
+
+    def test_slow_call_logged(self):
+        cfg.CONF.set_override('driver_profiling_slow_threshold', 1.0, 'ml2')
+        self.time.side_effect = [10.0, 10.5, 20.0, 21.5]
+        driver = _get_driver('fake')
+        driver_profiler.call_driver('mechanism', driver, 'bind_port', 'ctx')
+        self.assertFalse(self.log.warning.called)
+        driver_profiler.call_driver('mechanism', driver, 'bind_port', 'ctx')
+        self.assertEqual(1, self.log.warning.call_count)
+
+    def test_stats_logged_periodically(self):
+        cfg.CONF.set_override('driver_profiling_log_interval', 60, 'ml2')
+        self.time.side_effect = [10.0, 10.0]
+        driver_profiler.call_driver('mechanism', _get_driver('fake'),
+                                    'bind_port', 'context')
+        self.looping_call.assert_called_once_with(self.profiler.log_stats)
+        self.looping_call.return_value.start.assert_called_once_with(
+            interval=60, initial_delay=60)
+        self.profiler.log_stats()
+        self.assertEqual(1, self.log.info.call_count)
+
+    def test_stats_not_logged_when_interval_is_zero(self):
+        cfg.CONF.set_override('driver_profiling_log_interval', 0, 'ml2')
+        self.time.side_effect = [10.0, 10.0]
+        driver_profiler.call_driver('mechanism', _get_driver('fake'),
+                                    'bind_port', 'context')
+        self.assertFalse(self.looping_call.called)
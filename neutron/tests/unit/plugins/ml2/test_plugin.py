@@ -244,6 +244,34 @@ class TestMl2NetworksV2(test_plugin.TestNetworksV2,
                                side_effect=sqla_exc.ObjectDeletedError(None)):
             plugin._delete_ports(mock.MagicMock(), [mock.MagicMock()])
 
+    def test_delete_network_deletes_dhcp_ports_in_batch(self):
+        plugin = manager.NeutronManager.get_plugin()
+        with self.network() as net, self.subnet(network=net):
+            net_id = net['network']['id']
+            for i in range(3):
+                self._create_port(self.fmt, net_id,
+                                  device_owner=constants.DEVICE_OWNER_DHCP)
+            with mock.patch.object(plugin, 'delete_port') as delete_port,\
+                    mock.patch.object(mech_test.TestMechanismDriver,
+                                      'delete_port_bulk_postcommit') as bpc,\
+                    mock.patch.object(plugin,
+                                      'notify_security_groups_member_'
+                                      'updated_bulk') as sg_upd:
+                req = self.new_delete_request('networks', net_id)
+                res = req.get_response(self.api)
+                self.assertEqual(webob.exc.HTTPNoContent.code,
+                                 res.status_int)
+                self.assertFalse(delete_port.called)
+                self.assertEqual(1, bpc.call_count)
+                self.assertEqual(3, len(bpc.call_args[0][0]))
+                self.assertEqual(1, sg_upd.call_count)
+                self.assertEqual(3, len(sg_upd.call_args[0][1]))
+            self._show('networks', net_id,
+                       expected_code=webob.exc.HTTPNotFound.code)
+            ports = self._list('ports',
+                               query_params='network_id=%s' % net_id)
+            self.assertFalse(ports['ports'])
+
     def test_subnet_delete_helper_tolerates_failure(self):
         plugin = manager.NeutronManager.get_plugin()
         with mock.patch.object(plugin, "delete_subnet",
@@ -484,9 +512,35 @@ class TestMl2DbOperationBounds(test_plugin.DbOperationBoundMixin,
     def test_subnet_list_queries_constant(self):
         self._assert_object_list_queries_constant(self.make_subnet, 'subnets')
 
+    def make_port_with_extensions(self):
+        net = self.make_network()
+        return self._make_port(
+            self.fmt, net['network']['id'],
+            arg_list=('allowed_address_pairs', 'extra_dhcp_opts'),
+            allowed_address_pairs=[{'ip_address': '10.0.0.100'},
+                                   {'ip_address': '10.0.0.101'}],
+            extra_dhcp_opts=[{'opt_name': 'tftp-server',
+                              'opt_value': '123.123.123.123'},
+                             {'opt_name': 'server-ip-address',
+                              'opt_value': '123.123.123.45'}])
+
     def test_port_list_queries_constant(self):
         self._assert_object_list_queries_constant(self.make_port, 'ports')
 
+    def test_port_list_with_extensions_queries_constant(self):
+        self._assert_object_list_queries_constant(
+            self.make_port_with_extensions, 'ports')
+
+    def test_port_loading_profiles(self):
+        plugin = manager.NeutronManager.get_plugin()
+        loaders = {'joined': mock.Mock(), 'subquery': mock.Mock()}
+        with mock.patch.dict(plugin._RELATIONSHIP_LOADERS, loaders):
+            plugin._get_loading_options(models_v2.Port)
+        loaded = set(call[0][0].key
+                     for call in loaders['subquery'].call_args_list)
+        self.assertTrue({'fixed_ips', 'security_groups',
+                         'allowed_address_pairs', 'dhcp_opts'} <= loaded)
+
 
 class TestMl2PortsV2(test_plugin.TestPortsV2, Ml2PluginV2TestCase):
 
@@ -597,6 +651,34 @@ class TestMl2PortsV2(test_plugin.TestPortsV2, Ml2PluginV2TestCase):
             m_upd.assert_called_once_with(ctx, used_sg)
             self.assertFalse(p_upd.called)
 
+    def test_create_ports_bulk_calls_bulk_postcommit(self):
+        ctx = context.get_admin_context()
+        with self.network() as net,\
+                mock.patch.object(mech_test.TestMechanismDriver,
+                                  'create_port_bulk_postcommit') as bpc,\
+                mock.patch.object(mech_test.TestMechanismDriver,
+                                  'create_port_postcommit') as pc:
+            res = self._create_port_bulk(self.fmt, 3, net['network']['id'],
+                                         'test', True, context=ctx)
+            ports = self.deserialize(self.fmt, res)['ports']
+            self.assertEqual(1, bpc.call_count)
+            self.assertEqual(
+                sorted(port['id'] for port in ports),
+                sorted(c.current['id'] for c in bpc.call_args[0][0]))
+            self.assertFalse(pc.called)
+
+    def test_create_ports_bulk_bulk_postcommit_failure(self):
+        ctx = context.get_admin_context()
+        with self.network() as net,\
+                mock.patch.object(mech_test.TestMechanismDriver,
+                                  'create_port_bulk_postcommit',
+                                  side_effect=ml2_exc.MechanismDriverError(
+                                      method='create_port_bulk_postcommit')):
+            res = self._create_port_bulk(self.fmt, 2, net['network']['id'],
+                                         'test', True, context=ctx)
+            self._validate_behavior_on_bulk_failure(
+                res, 'ports', webob.exc.HTTPServerError.code)
+
     def _check_security_groups_provider_updated_args(self, p_upd_mock, net_id):
         query_params = "network_id=%s" % net_id
         network_ports = self._list('ports', query_params=query_params)
@@ -0,0 +1,180 @@
+# Copyright (c) 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import eventlet
+import mock
+from oslo_config import cfg
+
+from neutron.plugins.ml2.common import exceptions as ml2_exc
+from neutron.plugins.ml2 import config  # noqa
+from neutron.plugins.ml2 import managers
+from neutron.plugins.ml2 import models
+from neutron.plugins.ml2 import postcommit
+from neutron.tests import base
+
+
+class FakePluginContext(object):
+
+    def __init__(self):
+        self._session = 'session'
+
+
+class FakeContext(object):
+
+    def __init__(self, resource_id):
+        self._port = {'id': resource_id}
+        self._plugin_context = FakePluginContext()
+
+    @property
+    def current(self):
+        return self._port
+
+
+def _get_driver(name, requires_synchronous_postcommit=False):
+    driver = mock.Mock()
+    driver.name = name
+    driver.obj.requires_synchronous_postcommit = (
+        requires_synchronous_postcommit)
+    return driver
+
+
+class TestPostcommitEventBus(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestPostcommitEventBus, self).setUp()
+        self.bus = postcommit.PostcommitEventBus(2)
+
+    def _wait_for_calls(self, method, count):
+        for i in range(100):
+            if method.call_count >= count:
+                return
+            eventlet.sleep(0)
+        self.fail("%d calls were not delivered" % count)
+
+    def test_publish_delivers_calls_in_order(self):
+        driver = _get_driver('fake')
+        statuses = []
+        driver.obj.update_port_postcommit.side_effect = (
+            lambda context: statuses.append(context.current['status']))
+        for status in ('BUILD', 'ACTIVE', 'DOWN'):
+            context = FakeContext('port_id')
+            context.current['status'] = status
+            self.bus.publish([driver], 'update_port_postcommit', context)
+        self._wait_for_calls(driver.obj.update_port_postcommit, 3)
+        self.assertEqual(['BUILD', 'ACTIVE', 'DOWN'], statuses)
+
+    def test_publish_copies_context(self):
+        driver = _get_driver('fake')
+        context = FakeContext('port_id')
+        self.bus.publish([driver], 'update_port_postcommit', context)
+        self._wait_for_calls(driver.obj.update_port_postcommit, 1)
+        delivered = driver.obj.update_port_postcommit.call_args[0][0]
+        self.assertIsNot(context, delivered)
+        self.assertEqual(context.current, delivered.current)
+        self.assertIsNone(delivered._plugin_context._session)
+        self.assertEqual('session', context._plugin_context._session)
+
+    def test_publish_snapshots_context(self):
+        driver = _get_driver('fake')
+        context = FakeContext('port_id')
+        context.current['fixed_ips'] = [{'ip_address': '10.0.0.2'}]
+        context._binding = models.PortBinding(
+            port_id='port_id', host='host1', vif_type='ovs')
+        context._binding_levels = [models.PortBindingLevel(
+            port_id='port_id', host='host1', level=0, driver='ovs',
+            segment_id='segment_id')]
+        self.bus.publish([driver], 'update_port_postcommit', context)
+        context.current['fixed_ips'][0]['ip_address'] = '10.0.0.3'
+        context._binding.host = 'host2'
+        context._binding_levels[0].driver = 'other'
+        self._wait_for_calls(driver.obj.update_port_postcommit, 1)
+        delivered = driver.obj.update_port_postcommit.call_args[0][0]
+        self.assertEqual('10.0.0.2',
+                         delivered.current['fixed_ips'][0]['ip_address'])
+        self.assertEqual('host1', delivered._binding.host)
+        self.assertEqual(['ovs'],
+                         [level.driver for level in
+                          delivered._binding_levels])
+
+    def test_failures_are_recorded(self):
+        driver = _get_driver('fake')
+        driver.obj.delete_port_postcommit.side_effect = Exception
+        with mock.patch.object(postcommit.LOG, 'exception') as log:
+            self.bus.publish([driver], 'delete_port_postcommit',
+                             FakeContext('port_id'))
+            self._wait_for_calls(driver.obj.delete_port_postcommit, 1)
+            eventlet.sleep(0)
+            self.assertTrue(log.called)
+        stats = self.bus.get_stats()[('fake', 'delete_port_postcommit')]
+        self.assertEqual(1, stats['count'])
+        self.assertEqual(1, stats['failures'])
+
+
+class TestMechanismManagerAsyncPostcommit(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestMechanismManagerAsyncPostcommit, self).setUp()
+        with mock.patch.object(managers.MechanismManager, '__init__',
+                               return_value=None):
+            self.manager = managers.MechanismManager()
+        self.sync_driver = _get_driver('sync', True)
+        self.async_driver = _get_driver('async')
+        self.manager.ordered_mech_drivers = [self.async_driver,
+                                             self.sync_driver]
+        self.manager.postcommit_bus = mock.Mock()
+        self.context = FakeContext('port_id')
+
+    def test_postcommit_synchronous_by_default(self):
+        self.manager.update_port_postcommit(self.context)
+        self.assertFalse(self.manager.postcommit_bus.publish.called)
+        self.async_driver.obj.update_port_postcommit.assert_called_once_with(
+            self.context)
+
+    def test_postcommit_published_when_async(self):
+        cfg.CONF.set_override('async_postcommit', True, group='ml2')
+        self.sync_driver.obj.update_port_postcommit.side_effect = Exception
+        self.assertRaises(ml2_exc.MechanismDriverError,
+                          self.manager.update_port_postcommit, self.context)
+        self.manager.postcommit_bus.publish.assert_called_once_with(
+            [self.async_driver], 'update_port_postcommit', self.context)
+        self.assertFalse(self.async_driver.obj.update_port_postcommit.called)
+        self.sync_driver.obj.update_port_postcommit.assert_called_once_with(
+            self.context)
+
+    def test_postcommit_published_in_driver_order(self):
+        cfg.CONF.set_override('async_postcommit', True, group='ml2')
+        first_driver = _get_driver('first', True)
+        self.manager.ordered_mech_drivers.insert(0, first_driver)
+        calls = mock.Mock()
+        calls.attach_mock(first_driver.obj.update_port_postcommit, 'first')
+        calls.attach_mock(self.manager.postcommit_bus.publish, 'publish')
+        calls.attach_mock(self.sync_driver.obj.update_port_postcommit,
+                          'sync')
+        first_driver.obj.update_port_postcommit.side_effect = Exception
+        self.assertRaises(ml2_exc.MechanismDriverError,
+                          self.manager.update_port_postcommit, self.context)
+        self.assertEqual(
+            [mock.call.first(self.context),
+             mock.call.publish([self.async_driver],
+                               'update_port_postcommit', self.context),
+             mock.call.sync(self.context)],
+            calls.mock_calls)
+
+    def test_create_postcommit_not_published(self):
+        cfg.CONF.set_override('async_postcommit', True, group='ml2')
+        self.manager.create_port_postcommit(self.context)
+        self.assertFalse(self.manager.postcommit_bus.publish.called)
+        self.async_driver.obj.create_port_postcommit.assert_called_once_with(
+            self.context)
@@ -249,3 +249,115 @@ class TestTrackedResource(testlib_api.SqlTestCaseLight):
             self.assertNotIn(self.tenant_id, res._out_of_sync_tenants)
             mock_set_quota_usage.assert_called_once_with(
                 self.context, self.resource, self.tenant_id, in_use=2)
+
+
+class TestTrackedResourceUsageCounters(testlib_api.SqlTestCaseLight):
+
+    def setUp(self):
+        base.BaseTestCase.config_parse()
+        cfg.CONF.register_opts(meh_quota_opts, 'QUOTAS')
+        self.addCleanup(cfg.CONF.reset)
+        cfg.CONF.set_override('track_quota_usage_by_counters', True,
+                              group='QUOTAS')
+        self.resource = 'meh'
+        self.tenant_id = 'meh'
+        self.context = context.Context(
+            user_id='', tenant_id=self.tenant_id, is_admin=False)
+        super(TestTrackedResourceUsageCounters, self).setUp()
+        self.res = resource.TrackedResource(
+            self.resource, test_quota.MehModel, meh_quota_flag)
+        self.res.register_events()
+        self.addCleanup(self.res.unregister_events)
+
+    def _add_data(self, count=2, tenant_id=None):
+        session = db_api.get_session()
+        with session.begin():
+            for i in range(count):
+                session.add(test_quota.MehModel(
+                    meh='meh_%s' % uuid.uuid4(),
+                    tenant_id=tenant_id or self.tenant_id))
+
+    def _get_usage(self):
+        return quota_api.get_quota_usage_by_resource_and_tenant(
+            self.context, self.resource, self.tenant_id)
+
+    def test_add_data_records_pending_delta(self):
+        quota_api.set_quota_usage(
+            self.context, self.resource, self.tenant_id, in_use=0)
+        self._add_data()
+        self.assertEqual({self.tenant_id: 2}, dict(self.res.pending_deltas))
+        self.assertFalse(self.res.dirty)
+
+    def test_count_includes_pending_delta(self):
+        self._add_data()
+        # The first invocation synchronizes usage with the database
+        self.assertEqual(2, self.res.count(self.context, None,
+                                           self.tenant_id))
+        self._add_data(count=3)
+        with mock.patch.object(self.res, '_resync') as mock_resync:
+            self.assertEqual(5, self.res.count(self.context, None,
+                                               self.tenant_id))
+            self.assertFalse(mock_resync.called)
+
+    def test_mark_dirty_applies_deltas(self):
+        quota_api.set_quota_usage(
+            self.context, self.resource, self.tenant_id, in_use=1)
+        self._add_data()
+        self.res.mark_dirty(self.context)
+        self.assertFalse(self.res.pending_deltas)
+        usage = self._get_usage()
+        self.assertEqual(3, usage.used)
+        self.assertFalse(usage.dirty)
+
+    def test_delete_data_records_negative_delta(self):
+        self._add_data()
+        self.res.pending_deltas.clear()
+        session = db_api.get_session()
+        with session.begin():
+            item = session.query(test_quota.MehModel).first()
+            session.delete(item)
+        self.assertEqual({self.tenant_id: -1}, dict(self.res.pending_deltas))
+
+    def test_rollback_marks_tenant_dirty(self):
+        session = db_api.get_session()
+        session.begin()
+        session.add(test_quota.MehModel(meh='meh_%s' % uuid.uuid4(),
+                                        tenant_id=self.tenant_id))
+        session.flush()
+        session.rollback()
+        self.assertFalse(self.res.pending_deltas)
+        self.assertIn(self.tenant_id, self.res.dirty)
+
+    def test_reconcile(self):
+        quota_api.set_quota_usage(
+            self.context, self.resource, self.tenant_id, in_use=5)
+        self._add_data()
+        self.res.pending_deltas.clear()
+        self.res.reconcile(self.context)
+        self.assertEqual(2, self._get_usage().used)
+
+    def test_reconcile_skips_concurrently_updated_counter(self):
+        quota_api.set_quota_usage(
+            self.context, self.resource, self.tenant_id, in_use=5)
+        self._add_data()
+        self.res.pending_deltas.clear()
+        get_usages = quota_api.get_quota_usage_by_resource
+
+        def _get_usages(context, resource):
+            usages = get_usages(context, resource)
+            # another worker applies a delta after the usage was read
+            quota_api.update_quota_usage_in_use(
+                context, resource, self.tenant_id, 1)
+            return usages
+
+        with mock.patch.object(quota_api, 'get_quota_usage_by_resource',
+                               side_effect=_get_usages):
+            self.res.reconcile(self.context)
+        self.assertEqual(6, self._get_usage().used)
+
+    def test_reconcile_skips_tenant_with_pending_deltas(self):
+        quota_api.set_quota_usage(
+            self.context, self.resource, self.tenant_id, in_use=5)
+        self._add_data()
+        self.res.reconcile(self.context)
+        self.assertEqual(5, self._get_usage().used)
@@ -104,6 +104,17 @@ class TestAuxiliaryFunctions(base.DietTestCase):
             resource_registry.resync_resource(mock.ANY, 'meh', 'tenant_id')
             mock_resync.assert_called_once_with(mock.ANY, 'tenant_id')
 
+    def test_resync_on_list_disabled(self):
+        cfg.CONF.set_override('resync_quota_usage_on_list', False,
+                              group='QUOTAS')
+        self.addCleanup(cfg.CONF.reset)
+        with mock.patch('neutron.quota.resource.'
+                        'TrackedResource.resync') as mock_resync:
+            self.registry.set_tracked_resource('meh', test_quota.MehModel)
+            self.registry.register_resource_by_name('meh')
+            resource_registry.resync_resource(mock.ANY, 'meh', 'tenant_id')
+            self.assertEqual(0, mock_resync.call_count)
+
     def test_resync_non_tracked_resource(self):
         with mock.patch('neutron.quota.resource.'
                         'TrackedResource.resync') as mock_resync:
@@ -157,3 +168,38 @@ class TestAuxiliaryFunctions(base.DietTestCase):
             res._dirty_tenants.add('tenant_id')
             resource_registry.set_resources_dirty(ctx)
             mock_mark_dirty.assert_called_once_with(ctx)
+
+    def test_set_resources_dirty_pending_deltas(self):
+        ctx = context.Context('user_id', 'tenant_id',
+                              is_admin=False, is_advsvc=False)
+        with mock.patch('neutron.quota.resource.'
+                        'TrackedResource.mark_dirty') as mock_mark_dirty:
+            self.registry.set_tracked_resource('meh', test_quota.MehModel)
+            self.registry.register_resource_by_name('meh')
+            res = self.registry.get_resource('meh')
+            res.pending_deltas['tenant_id'] += 1
+            resource_registry.set_resources_dirty(ctx)
+            mock_mark_dirty.assert_called_once_with(ctx)
+
+    def test_start_usage_reconciliation_disabled(self):
+        with mock.patch('oslo_service.loopingcall.'
+                        'FixedIntervalLoopingCall') as mock_loop:
+            self.registry.start_usage_reconciliation()
+            self.assertFalse(mock_loop.called)
+
+    def test_start_usage_reconciliation(self):
+        cfg.CONF.set_override('track_quota_usage_by_counters', True,
+                              group='QUOTAS')
+        cfg.CONF.set_override('quota_usage_reconcile_interval', 60,
+                              group='QUOTAS')
+        self.addCleanup(cfg.CONF.reset)
+        with mock.patch('oslo_service.loopingcall.'
+                        'FixedIntervalLoopingCall') as mock_loop:
+            self.registry.start_usage_reconciliation()
+            self.registry.start_usage_reconciliation()
+            mock_loop.assert_called_once_with(
+                resource_registry.reconcile_tracked_resources)
+            mock_loop.return_value.start.assert_called_once_with(
+                interval=60, initial_delay=60)
+            self.registry.unregister_resources()
+            mock_loop.return_value.stop.assert_called_once_with()
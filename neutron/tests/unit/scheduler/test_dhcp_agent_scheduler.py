@@ -284,6 +284,78 @@ class TestAutoScheduleNetworks(TestDhcpSchedulerBaseTestCase):
         self.assertEqual(expected_hosted_agents, len(hosted_agents))
 
 
+class TestLeastNetworksScheduler(TestDhcpSchedulerBaseTestCase):
+    """Unit test scenarios for LeastNetworksScheduler."""
+
+    def setUp(self):
+        super(TestLeastNetworksScheduler, self).setUp()
+        self.scheduler = dhcp_agent_scheduler.LeastNetworksScheduler()
+
+    def _save_subnet(self, network_id, enable_dhcp=True):
+        with self.ctx.session.begin(subtransactions=True):
+            self.ctx.session.add(models_v2.Subnet(
+                network_id=network_id, ip_version=4, cidr='10.0.0.0/24',
+                enable_dhcp=enable_dhcp))
+
+    def _get_hosted_network_ids(self, agent):
+        return set(binding.network_id for binding in
+                   self.ctx.session.query(sched_db.NetworkDhcpAgentBinding).
+                   filter_by(dhcp_agent_id=agent.id))
+
+    def test_auto_schedule_networks(self):
+        cfg.CONF.set_override('dhcp_agents_per_network', 2)
+        self._save_networks(['hosted_twice', 'hosted_once', 'no_dhcp'])
+        self._save_subnet(self.network_id)
+        self._save_subnet('hosted_twice')
+        self._save_subnet('hosted_once')
+        self._save_subnet('no_dhcp', enable_dhcp=False)
+        agent_a, agent_b, agent_c = self._create_and_set_agents_down(
+            ['host-a', 'host-b', 'host-c'])
+        self._test_schedule_bind_network([agent_a, agent_b], 'hosted_twice')
+        self._test_schedule_bind_network([agent_a], 'hosted_once')
+
+        self.assertTrue(self.scheduler.auto_schedule_networks(
+            mock.ANY, self.ctx, 'host-a'))
+        self.assertEqual(set([self.network_id, 'hosted_twice',
+                              'hosted_once']),
+                         self._get_hosted_network_ids(agent_a))
+        self.assertTrue(self.scheduler.auto_schedule_networks(
+            mock.ANY, self.ctx, 'host-c'))
+        self.assertEqual(set([self.network_id, 'hosted_once']),
+                         self._get_hosted_network_ids(agent_c))
+
+    def test_auto_schedule_networks_no_dhcp_subnet(self):
+        self._create_and_set_agents_down(['host-a'])
+        self.assertFalse(self.scheduler.auto_schedule_networks(
+            mock.ANY, self.ctx, 'host-a'))
+
+    def test_auto_schedule_networks_az_hints(self):
+        with self.ctx.session.begin(subtransactions=True):
+            network = self.ctx.session.query(models_v2.Network).get(
+                self.network_id)
+            network.availability_zone_hints = '["not-match"]'
+        self._save_subnet(self.network_id)
+        agent = self._create_and_set_agents_down(['host-a'])[0]
+        self.scheduler.auto_schedule_networks(mock.ANY, self.ctx, 'host-a')
+        self.assertEqual(set(), self._get_hosted_network_ids(agent))
+
+    def test_select_uses_cached_loads(self):
+        self._save_networks(['network1', 'network2'])
+        agent_a, agent_b = self._create_and_set_agents_down(
+            ['host-a', 'host-b'])
+        self._test_schedule_bind_network([agent_a], self.network_id)
+        chosen = self.scheduler.select(mock.ANY, self.ctx,
+                                       [agent_a, agent_b], [], 1)
+        self.assertEqual([agent_b], chosen)
+        self.scheduler.resource_filter.bind(self.ctx, [agent_b], 'network1')
+        self.scheduler.resource_filter.bind(self.ctx, [agent_b], 'network2')
+        with mock.patch.object(self.ctx.session, 'query') as query:
+            chosen = self.scheduler.select(mock.ANY, self.ctx,
+                                           [agent_a, agent_b], [], 1)
+            self.assertFalse(query.called)
+        self.assertEqual([agent_a], chosen)
+
+
 class TestNetworksFailover(TestDhcpSchedulerBaseTestCase,
                            sched_db.DhcpAgentSchedulerDbMixin,
                            common_db_mixin.CommonDbMixin):
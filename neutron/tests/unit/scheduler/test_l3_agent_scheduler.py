@@ -177,6 +177,26 @@ class L3SchedulerBaseTestCase(base.BaseTestCase):
         self.assertTrue(self.plugin.get_enabled_agent_on_host.called)
         self.assertFalse(result)
 
+    def test_plan_routers_accounts_for_planned_load(self):
+        agents = [{'id': 'agent1'}, {'id': 'agent2'}]
+        routers = [{'id': 'router%d' % i} for i in range(4)]
+        self.plugin.get_l3_agents.return_value = agents
+        self.plugin.get_l3_agents_router_counts.return_value = {'agent1': 1}
+        self.plugin.get_l3_agent_candidates.side_effect = (
+            lambda context, router, l3_agents: l3_agents)
+        planned = self.scheduler.plan_routers(self.plugin, mock.ANY, routers)
+        chosen = [planned[router['id']]['id'] for router in routers]
+        self.assertEqual(1, chosen.count('agent1'))
+        self.assertEqual(3, chosen.count('agent2'))
+        self.assertEqual(1, self.plugin.get_l3_agents.call_count)
+
+    def test_plan_routers_skips_ha_and_distributed_routers(self):
+        routers = [{'id': 'router1', 'ha': True},
+                   {'id': 'router2', 'distributed': True}]
+        self.assertEqual({}, self.scheduler.plan_routers(
+            self.plugin, mock.ANY, routers))
+        self.assertFalse(self.plugin.get_l3_agents.called)
+
     def test__get_routers_to_schedule_with_router_ids(self):
         router_ids = ['foo_router_1', 'foo_router_2']
         expected_routers = [
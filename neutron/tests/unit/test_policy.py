@@ -602,3 +602,65 @@ class NeutronPolicyTestCase(base.BaseTestCase):
         policy.log_rule_list(oslo_policy.RuleCheck('rule', 'create_'))
         self.assertTrue(mock_is_e.called)
         self.assertTrue(mock_debug.called)
+
+    def test_check_collection(self):
+        self.fakepolicyinit()
+        targets = [{'id': 'a', 'tenant_id': 'fake'},
+                   {'id': 'b', 'tenant_id': 'other'},
+                   {'id': 'c', 'tenant_id': 'fake'}]
+        result = policy.check_collection(self.context, 'get_port', targets)
+        self.assertEqual([t for t in targets
+                          if policy.check(self.context, 'get_port', t)],
+                         result)
+        self.assertEqual(['a', 'c'], [t['id'] for t in result])
+
+    def test_check_collection_admin_context(self):
+        targets = [{'tenant_id': 'fake'}, {'tenant_id': 'other'}]
+        result = policy.check_collection(context.get_admin_context(),
+                                         'get_port', targets)
+        self.assertEqual(targets, result)
+
+    def test_check_collection_parent_resource_fetched_once(self):
+        self._set_rules(get_port="rule:admin_or_network_owner")
+        self.fakepolicyinit()
+        tenants = {'net1': 'fake', 'net2': 'other'}
+
+        def fakegetnetwork(context, id, fields=None):
+            return {'tenant_id': tenants[id]}
+
+        targets = [{'id': str(i), 'network_id': 'net%d' % (i % 2 + 1)}
+                   for i in range(6)]
+        with mock.patch.object(manager.NeutronManager.get_instance().plugin,
+                               'get_network',
+                               side_effect=fakegetnetwork) as get_network:
+            result = policy.check_collection(self.context, 'get_port',
+                                             targets)
+        self.assertEqual(2, get_network.call_count)
+        self.assertEqual(['0', '2', '4'], [t['id'] for t in result])
+        for target in targets:
+            self.assertEqual(tenants[target['network_id']],
+                             target['network:tenant_id'])
+
+    def test_check_collection_write_action_checks_each_target(self):
+        targets = [{'tenant_id': 'fake'}, {'tenant_id': 'fake'}]
+        with mock.patch.object(policy, 'check',
+                               return_value=True) as check:
+            result = policy.check_collection(self.context, 'update_port',
+                                             targets)
+        self.assertEqual(targets, result)
+        self.assertEqual(2, check.call_count)
+
+    def test_get_target_keys(self):
+        self._set_rules(get_port="rule:admin_or_network_owner or "
+                                 "rule:network_device")
+        self.fakepolicyinit()
+        keys = policy._get_target_keys(
+            oslo_policy.RuleCheck('rule', 'get_port'))
+        self.assertEqual({'network:tenant_id', 'network_id', 'device_owner'},
+                         keys)
+
+    def test_get_target_keys_unknown_check(self):
+        self._set_rules(get_port="http://www.example.com")
+        self.fakepolicyinit()
+        self.assertIsNone(policy._get_target_keys(
+            oslo_policy.RuleCheck('rule', 'get_port')))
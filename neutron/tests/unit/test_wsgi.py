@@ -19,6 +19,7 @@ import ssl
 
 import mock
 from oslo_config import cfg
+from oslo_serialization import jsonutils
 import six.moves.urllib.request as urlrequest
 import testtools
 import webob
@@ -494,6 +495,22 @@ class JSONDictSerializerTest(base.BaseTestCase):
 
         self.assertEqual(expected_json, result)
 
+    def test_serialize_stream(self):
+        items = [{'id': i} for i in range(5)]
+        serializer = wsgi.JSONDictSerializer()
+        chunks = list(serializer.serialize_stream(
+            wsgi.CollectionStream('servers', items, 2)))
+        # opening, three chunks of items and closing
+        self.assertEqual(5, len(chunks))
+        self.assertEqual({'servers': items},
+                         jsonutils.loads(b''.join(chunks).decode('utf-8')))
+
+    def test_serialize_stream_empty(self):
+        serializer = wsgi.JSONDictSerializer()
+        result = b''.join(serializer.serialize_stream(
+            wsgi.CollectionStream('servers', [], 2)))
+        self.assertEqual(b'{"servers": []}', result)
+
     # The tested behaviour is only meant to be witnessed in Python 2, so it is
     # OK to skip this test with Python 3.
     @helpers.requires_py2
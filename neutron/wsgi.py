@@ -19,6 +19,7 @@ Utility methods for working with WSGI servers
 from __future__ import print_function
 
 import errno
+import itertools
 import socket
 import sys
 import time
@@ -311,13 +312,42 @@ class DictSerializer(ActionDispatcher):
         return ""
 
 
+class CollectionStream(object):
+    """A collection of resources produced lazily.
+
+    Controllers return it in place of a {collection: [...]} dict when the
+    response body should be serialized incrementally.
+    """
+
+    def __init__(self, collection, items, chunk_size):
+        self.collection = collection
+        self.items = iter(items)
+        self.chunk_size = chunk_size
+
+
 class JSONDictSerializer(DictSerializer):
     """Default JSON request body serialization."""
 
+    @staticmethod
+    def _sanitizer(obj):
+        return six.text_type(obj)
+
     def default(self, data):
-        def sanitizer(obj):
-            return six.text_type(obj)
-        return encode_body(jsonutils.dumps(data, default=sanitizer))
+        return encode_body(jsonutils.dumps(data, default=self._sanitizer))
+
+    def serialize_stream(self, stream):
+        """Serialize a CollectionStream into an iterator of body chunks."""
+        yield encode_body('{%s: [' % jsonutils.dumps(stream.collection))
+        separator = ''
+        while True:
+            chunk = list(itertools.islice(stream.items, stream.chunk_size))
+            if not chunk:
+                break
+            yield encode_body(separator + ', '.join(
+                jsonutils.dumps(item, default=self._sanitizer)
+                for item in chunk))
+            separator = ', '
+        yield encode_body(']}')
 
 
 class ResponseHeaderSerializer(ActionDispatcher):
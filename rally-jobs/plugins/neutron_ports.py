@@ -0,0 +1,37 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from rally import consts
+from rally.plugins.openstack.scenarios.neutron import utils
+from rally.task import scenario
+from rally.task import validation
+
+
+class NeutronPorts(utils.NeutronScenario):
+    """Benchmark scenarios for Neutron ports."""
+
+    @validation.required_services(consts.Service.NEUTRON)
+    @validation.required_openstack(users=True)
+    @validation.required_contexts("network")
+    @scenario.configure(context={"cleanup": ["neutron"]})
+    def create_ports_on_shared_subnet(self, port_create_args=None):
+        """Create a port on the network of the tenant network context.
+
+        All the iterations allocate their addresses from the same subnet,
+        so running this scenario with a high concurrency stresses the IP
+        allocation of a single subnet. Ports are removed by the cleanup
+        context.
+
+        :param port_create_args: dict, POST /v2.0/ports request options
+        """
+        network = self.context["tenant"]["networks"][0]
+        self._create_port({"network": network}, port_create_args or {})
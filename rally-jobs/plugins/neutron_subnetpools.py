@@ -0,0 +1,62 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from rally.common import utils as rally_utils
+from rally import consts
+from rally.plugins.openstack.scenarios.neutron import utils
+from rally.task import atomic
+from rally.task import scenario
+from rally.task import validation
+
+
+class NeutronSubnetPools(utils.NeutronScenario):
+    """Benchmark scenarios for Neutron subnet pools."""
+
+    @validation.required_services(consts.Service.NEUTRON)
+    @validation.required_openstack(users=True)
+    @scenario.configure(context={"cleanup": ["neutron"]})
+    def grow_subnetpool(self, prefix="10.0.0.0/8", prefixlen=24,
+                        subnets=50000, step=5000):
+        """Allocate a large number of subnets from a single subnet pool.
+
+        The time needed to allocate each batch of step subnets is recorded,
+        which shows how the allocation cost grows with the number of subnets
+        already allocated from the pool.
+
+        :param prefix: prefix of the subnet pool
+        :param prefixlen: prefix length of the allocated subnets
+        :param subnets: total number of subnets to allocate
+        :param step: number of subnets allocated per timed batch
+        """
+        subnetpool = self._create_subnetpool(prefix, prefixlen)
+        network = self._create_network({})
+        for allocated in range(0, subnets, step):
+            with atomic.ActionTimer(
+                    self, "neutron.create_subnets_%d_to_%d" % (
+                        allocated, min(allocated + step, subnets))):
+                for i in range(allocated, min(allocated + step, subnets)):
+                    self._create_subnet_from_pool(network, subnetpool)
+
+    @atomic.action_timer("neutron.create_subnetpool")
+    def _create_subnetpool(self, prefix, prefixlen):
+        subnetpool_args = {
+            "name": rally_utils.generate_random_name("rally_sp_"),
+            "prefixes": [prefix],
+            "default_prefixlen": prefixlen}
+        return self.clients("neutron").create_subnetpool(
+            {"subnetpool": subnetpool_args})
+
+    def _create_subnet_from_pool(self, network, subnetpool):
+        subnet_args = {"network_id": network["network"]["id"],
+                       "subnetpool_id": subnetpool["subnetpool"]["id"],
+                       "ip_version": 4}
+        return self.clients("neutron").create_subnet({"subnet": subnet_args})